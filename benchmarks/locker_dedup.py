@@ -0,0 +1,65 @@
+# benchmarks/locker_dedup.py
+"""Locker disk usage and upload time for successive versions of one file.
+
+Run from the repository root:
+
+    python -m benchmarks.locker_dedup --size-mb 64 --versions 5 --edits 20
+
+Each version is the previous one with a few small inserts and overwrites, like
+an edited document or a VM image after a session. Every version is stored in
+the per-file locker format and in the deduplicating chunk store; the output is
+the bytes each adds to disk and its upload time. The store lives in a
+temporary folder.
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+from openvault import chunkstore, locker
+
+def versions(size_mb: int, count: int, edits: int, seed: int = 1):
+    rng = random.Random(seed)
+    data = bytearray(os.urandom(size_mb * 1024 * 1024))
+    for _ in range(count):
+        yield bytes(data)
+        for _ in range(edits):
+            pos = rng.randrange(len(data))
+            if rng.random() < 0.5:
+                data[pos:pos] = os.urandom(rng.randint(1, 4096))
+            else:
+                data[pos:pos + 512] = os.urandom(512)
+
+def run(size_mb: int, count: int, edits: int, compression: str):
+    key = os.urandom(32)
+    print(f"{size_mb} MiB x {count} versions, {edits} edits each, {os.cpu_count()} CPUs")
+    print(f"{'version':>8} {'file MB':>9} {'file s':>8} {'chunks MB':>10} {'chunks s':>9}")
+    totals = [0, 0]
+    with tempfile.TemporaryDirectory() as root:
+        store = chunkstore.ChunkStore(root, key)
+        for n, data in enumerate(versions(size_mb, count, edits), start=1):
+            sealed = io.BytesIO()
+            start = time.perf_counter()
+            locker.encrypt_stream(io.BytesIO(data), sealed, key, None)
+            per_file = time.perf_counter() - start
+            start = time.perf_counter()
+            ids, _, stored = store.put_stream(io.BytesIO(data), compression=compression)
+            chunked = time.perf_counter() - start
+            out = io.BytesIO()
+            store.read_stream(ids, out)
+            assert out.getvalue() == data
+            totals[0] += sealed.tell()
+            totals[1] += stored
+            print(f"{n:>8} {sealed.tell() / 2**20:>9.1f} {per_file:>8.2f} {stored / 2**20:>10.1f} {chunked:>9.2f}")
+    print(f"{'total':>8} {totals[0] / 2**20:>9.1f} {'':>8} {totals[1] / 2**20:>10.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--versions", type=int, default=5)
+    parser.add_argument("--edits", type=int, default=20)
+    parser.add_argument("--compression", choices=chunkstore.COMPRESSION_MODES, default="auto",
+                        help="chunk compression (random data is stored raw)")
+    args = parser.parse_args()
+    run(args.size_mb, args.versions, args.edits, args.compression)
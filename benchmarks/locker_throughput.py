@@ -0,0 +1,47 @@
+# benchmarks/locker_throughput.py
+"""Locker encrypt/decrypt throughput at 1, 2, 4 and N workers.
+
+Run from the repository root:
+
+    python -m benchmarks.locker_throughput --size-mb 512
+
+A random data key is used, as for files uploaded to the vault, so the numbers
+reflect the chunk engine only. Source and sink are in memory to keep disk
+speed out of it.
+"""
+import argparse
+import io
+import os
+import time
+from openvault import locker
+
+def worker_counts():
+    n = os.cpu_count() or 1
+    return sorted({1, 2, 4, n})
+
+def run(size_mb: int, chunk_size: int):
+    key = os.urandom(32)
+    data = os.urandom(size_mb * 1024 * 1024)
+    print(f"{size_mb} MiB, chunk {chunk_size // 1024} KiB, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'encrypt MB/s':>14} {'decrypt MB/s':>14}")
+    for workers in worker_counts():
+        sealed = io.BytesIO()
+        start = time.perf_counter()
+        locker.encrypt_stream(io.BytesIO(data), sealed, key, None, chunk_size=chunk_size, workers=workers)
+        enc = time.perf_counter() - start
+
+        sealed.seek(0)
+        header, _, _, stored_chunk, prefix = locker.read_header(sealed)
+        out = io.BytesIO()
+        start = time.perf_counter()
+        locker.decrypt_stream(sealed, out, key, header, stored_chunk, prefix, workers=workers)
+        dec = time.perf_counter() - start
+        assert out.getvalue() == data
+        print(f"{workers:>8} {size_mb / enc:>14.1f} {size_mb / dec:>14.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--chunk-kb", type=int, default=locker.CHUNK_SIZE // 1024)
+    args = parser.parse_args()
+    run(args.size_mb, args.chunk_kb * 1024)
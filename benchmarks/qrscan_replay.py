@@ -0,0 +1,35 @@
+# benchmarks/qrscan_replay.py
+"""Replay a recorded video or a folder of frames through the QR scanner pipeline.
+
+Run from the repository root:
+
+    python -m benchmarks.qrscan_replay recording.mp4 --workers 1 2 4
+    python -m benchmarks.qrscan_replay frames/ --max-fps 0
+
+Offline sources hand every frame to a decoder, so runs are repeatable: the
+output is the frame that first decoded, frames read/decoded and wall time.
+Needs opencv-python (pyzbar optional).
+"""
+import argparse
+import time
+from openvault import qrscan
+
+def run(source: str, workers: int, max_fps: float):
+    scanner = qrscan.QrScanner(source, timeout=None, workers=workers, max_fps=max_fps, preview=False)
+    start = time.perf_counter()
+    payloads = scanner.run()
+    elapsed = time.perf_counter() - start
+    found = f"{len(payloads)} QR" if payloads else "none"
+    print(f"{workers:>8} {scanner.frames_read:>8} {scanner.frames_decoded:>8} {elapsed:>9.2f} {found:>8}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="video file or folder of images")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, qrscan.DECODE_WORKERS])
+    parser.add_argument("--max-fps", type=float, default=0, help="decode rate limit (0 = none)")
+    args = parser.parse_args()
+    if not qrscan.available():
+        raise SystemExit("opencv-python is required")
+    print(f"{'workers':>8} {'read':>8} {'decoded':>8} {'seconds':>9} {'found':>8}")
+    for workers in args.workers:
+        run(args.source, workers, args.max_fps)
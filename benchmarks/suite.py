@@ -0,0 +1,249 @@
+# benchmarks/suite.py
+"""Offline benchmark suite for the vault and locker hot paths, with JSON output.
+
+Run from the repository root:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --entries 10000 --locker-mb 1 64 --output quick.json
+
+Each case runs in a fresh interpreter so its peak RSS is its own. Everything
+happens under a temporary OpenVault home; nothing touches ~/.openvault. The
+vault KDF is pinned (default PBKDF2 parameters) so results compare across
+machines and releases; pass --kdf scrypt to use a calibrated scrypt instead.
+
+Compare two runs with:
+
+    python -m benchmarks.suite --compare old.json new.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import datetime
+import subprocess
+from typing import Any, Dict, List
+
+DEFAULT_ENTRIES = [10_000, 100_000, 1_000_000]
+DEFAULT_LOCKER_MB = [1, 16, 256, 1024, 4096]
+# a case is reported as a regression when it gets this much slower
+REGRESSION_RATIO = 1.10
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def _use_home(home: str):
+    """Point every OpenVault path at a scratch directory."""
+    from openvault import config
+    config.CONFIG_DIR = home
+    config.VAULTS_DIR = os.path.join(home, "vaults")
+    config.VAULT_FILE_TEMPLATE = os.path.join(config.VAULTS_DIR, "{name}.enc")
+    config.CONFIG_FILE = os.path.join(home, "config.json")
+    config.LOCKER_DIR = os.path.join(home, "locker")
+    config.CHUNKS_DIR = os.path.join(config.LOCKER_DIR, "chunks")
+    config.QR_CACHE_DIR = os.path.join(home, "qr_cache")
+    config.TEMP_DIR = os.path.join(home, "temp")
+    config.BACKUPS_DIR = os.path.join(home, "backups")
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def _kdf(name: str) -> Dict[str, Any]:
+    from openvault import encryption
+    if name == "default":
+        return dict(encryption.DEFAULT_KDF)
+    return encryption.VaultEncryption.calibrate_kdf(name)
+
+def case_vault(entries: int, kdf_name: str) -> Dict[str, Any]:
+    """create_new, a full save of N entries, one journaled edit, then load (lazy and full)."""
+    from openvault import vault as vault_module
+    from benchmarks.synthetic import make_vault_data
+    data = make_vault_data(entries)
+    kdf = _kdf(kdf_name)
+    v = vault_module.Vault("bench")
+    ok, create = _timed(lambda: v.create_new("benchmark", kdf))
+    assert ok, "create_new failed"
+    for name, section in data.items():
+        v.vault_data[name] = section
+    ok, save = _timed(v.save)
+    assert ok, "save failed"
+    entry_id = next(iter(data["passwords"]), None) or "00000000-0000-4000-8000-000000000000"
+    v.upsert("passwords", entry_id, {"name": "edited", "password": "x"})
+    ok, edit = _timed(v.flush)
+    assert ok, "flush failed"
+    v.lock()
+    size = os.path.getsize(v.path)
+
+    loaded = vault_module.Vault("bench")
+    ok, load = _timed(lambda: loaded.load("benchmark"))
+    assert ok, "load failed"
+    _, open_all = _timed(lambda: [loaded.vault_data[name] for name in loaded.vault_data])
+    assert len(loaded.vault_data["passwords"]) == len(data["passwords"]) + (not data["passwords"])
+    loaded.lock()
+    return {"kdf": kdf, "file_bytes": size,
+            "seconds": {"create_new": create, "save": save, "edit_flush": edit,
+                        "load": load, "load_all_sections": load + open_all}}
+
+def case_totp(entries: int) -> Dict[str, Any]:
+    """Current code for every 2FA entry of an N-entry vault, the way the 2FA views compute it."""
+    from openvault import totp
+    from benchmarks.synthetic import make_vault_data
+    twofa = make_vault_data(entries)["twofa"]
+    engine, build = _timed(lambda: totp.TotpEngine(twofa))
+    _, total = _timed(engine.codes)
+    # within the same period every code comes from the per-group cache
+    _, cached = _timed(engine.codes)
+    return {"codes": len(twofa),
+            "seconds": {"build_engine": build, "generate_all": total, "cached_all": cached},
+            "codes_per_second": len(twofa) / total if total else None}
+
+def case_locker(size_mb: int) -> Dict[str, Any]:
+    """Encrypt and decrypt a random file of the given size with a data key, as the locker does."""
+    from openvault import config, locker
+    from openvault.encryption import VaultEncryption
+    plain = os.path.join(config.TEMP_DIR, "plain.bin")
+    sealed = os.path.join(config.LOCKER_DIR, "plain.bin.enc")
+    restored = os.path.join(config.TEMP_DIR, "restored.bin")
+    os.makedirs(config.TEMP_DIR, exist_ok=True)
+    os.makedirs(config.LOCKER_DIR, exist_ok=True)
+    with open(plain, "wb") as f:
+        # written in slices so generating a 4 GB input does not itself need 4 GB of RAM
+        for _ in range(size_mb):
+            f.write(os.urandom(1024 * 1024))
+    data_key = locker.new_data_key()
+    ok, encrypt = _timed(lambda: VaultEncryption.encrypt_file_with_key(plain, sealed, data_key))
+    assert ok, "encrypt_file failed"
+    ok, decrypt = _timed(lambda: VaultEncryption.decrypt_file_with_key(sealed, restored, data_key))
+    assert ok, "decrypt_file failed"
+    assert os.path.getsize(restored) == os.path.getsize(plain)
+    sealed_size = os.path.getsize(sealed)
+    for path in (plain, sealed, restored):
+        os.remove(path)
+    return {"file_bytes": size_mb * 1024 * 1024, "sealed_bytes": sealed_size,
+            "seconds": {"encrypt_file": encrypt, "decrypt_file": decrypt},
+            "mb_per_second": {"encrypt_file": size_mb / encrypt, "decrypt_file": size_mb / decrypt}}
+
+def case_chunks(size_mb: int) -> Dict[str, Any]:
+    """Upload a random file through the chunk store, upload it again (every chunk deduplicated), download it."""
+    from openvault import config, locker
+    from openvault.chunkstore import ChunkStore
+    plain = os.path.join(config.TEMP_DIR, "plain.bin")
+    restored = os.path.join(config.TEMP_DIR, "restored.bin")
+    os.makedirs(config.TEMP_DIR, exist_ok=True)
+    with open(plain, "wb") as f:
+        for _ in range(size_mb):
+            f.write(os.urandom(1024 * 1024))
+    store = ChunkStore(os.path.join(config.CHUNKS_DIR, "bench"), locker.new_data_key())
+    put, upload = _timed(lambda: store.put_file(plain))
+    assert put, "put_file failed"
+    again, reupload = _timed(lambda: store.put_file(plain))
+    assert again and again[0] == put[0], "re-upload changed the manifest"
+    ok, download = _timed(lambda: store.get_file(put[0], restored))
+    assert ok, "get_file failed"
+    assert os.path.getsize(restored) == os.path.getsize(plain)
+    for path in (plain, restored):
+        os.remove(path)
+    return {"file_bytes": size_mb * 1024 * 1024, "written_bytes": put[2], "reupload_written_bytes": again[2],
+            "seconds": {"upload": upload, "reupload": reupload, "download": download},
+            "mb_per_second": {"upload": size_mb / upload, "reupload": size_mb / reupload,
+                              "download": size_mb / download}}
+
+def run_case(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one case in this process (the child side of run_isolated)."""
+    _use_home(spec["home"])
+    kind = spec["case"]
+    if kind == "vault":
+        result = case_vault(spec["entries"], spec["kdf"])
+    elif kind == "totp":
+        result = case_totp(spec["entries"])
+    elif kind == "locker":
+        result = case_locker(spec["size_mb"])
+    elif kind == "chunks":
+        result = case_chunks(spec["size_mb"])
+    else:
+        raise ValueError(f"Unknown case {kind}")
+    result["peak_rss_bytes"] = _peak_rss_bytes()
+    return result
+
+def run_isolated(spec: Dict[str, Any]) -> Dict[str, Any]:
+    proc = subprocess.run([sys.executable, "-m", "benchmarks.suite", "--child", json.dumps(spec)],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(proc.stdout)
+
+def _case_id(spec: Dict[str, Any]) -> str:
+    if spec["case"] in ("locker", "chunks"):
+        return f"{spec['case']}/{spec['size_mb']}MB"
+    return f"{spec['case']}/{spec['entries']}"
+
+def run(entry_counts: List[int], locker_sizes: List[int], kdf_name: str) -> Dict[str, Any]:
+    from openvault import config, locker
+    specs = []
+    for entries in entry_counts:
+        specs.append({"case": "vault", "entries": entries, "kdf": kdf_name})
+        specs.append({"case": "totp", "entries": entries})
+    for size in locker_sizes:
+        specs.append({"case": "locker", "size_mb": size})
+        specs.append({"case": "chunks", "size_mb": size})
+    report = {
+        "app_version": config.APP_VERSION,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "locker_workers": locker.DEFAULT_WORKERS,
+        "results": {},
+    }
+    for spec in specs:
+        with tempfile.TemporaryDirectory(prefix="openvault-bench-") as home:
+            result = run_isolated(dict(spec, home=home))
+        report["results"][_case_id(spec)] = result
+        status = result.get("error") or ", ".join(f"{k} {v:.3f}s" for k, v in result["seconds"].items())
+        print(f"{_case_id(spec):>16}  {status}", file=sys.stderr)
+    return report
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """Timings that got more than REGRESSION_RATIO slower between two reports."""
+    regressions = []
+    for case, result in new["results"].items():
+        before = old["results"].get(case, {}).get("seconds", {})
+        for name, seconds in result.get("seconds", {}).items():
+            if before.get(name) and seconds > before[name] * REGRESSION_RATIO:
+                regressions.append(f"{case} {name}: {before[name]:.3f}s -> {seconds:.3f}s "
+                                   f"({seconds / before[name]:.2f}x)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="*", default=DEFAULT_ENTRIES)
+    parser.add_argument("--locker-mb", type=int, nargs="*", default=DEFAULT_LOCKER_MB)
+    parser.add_argument("--kdf", choices=["default", "scrypt", "pbkdf2-sha256"], default="default")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(run_case(json.loads(args.child))))
+        return
+    if args.compare:
+        with open(args.compare[0]) as f_old, open(args.compare[1]) as f_new:
+            regressions = compare(json.load(f_old), json.load(f_new))
+        print("\n".join(regressions) or "No regressions")
+        sys.exit(1 if regressions else 0)
+    report = json.dumps(run(args.entries, args.locker_mb, args.kdf), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/vault_format.py
+"""Vault file size and save/load time: legacy JSON+Fernet vs the v2 container.
+
+Run from the repository root:
+
+    python -m benchmarks.vault_format --entries 10000 100000 1000000
+
+The key is derived once up front so KDF time is excluded. "load (lazy)" only
+verifies the file; "load (all)" also decrypts and decodes every section.
+"""
+import argparse
+import time
+from openvault import encryption, sections
+from openvault.encryption import VaultEncryption
+from benchmarks.synthetic import make_vault_data
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def legacy(data: dict, session_key):
+    blob, save = _timed(lambda: session_key.salt + VaultEncryption.encrypt_data_with_key(data, session_key))
+    _, load = _timed(lambda: VaultEncryption.decrypt_data_with_key(blob[encryption.SALT_SIZE:], session_key))
+    return len(blob), save, load, load
+
+def container(data: dict, session_key):
+    def save():
+        store = sections.LazySections(session_key, plain=data)
+        return sections.pack(session_key, store.seal())
+    blob, save_time = _timed(save)
+
+    def load():
+        version, segments = sections.unpack(blob, session_key)
+        return sections.LazySections(session_key, segments, version=version)
+    store, lazy_time = _timed(load)
+    _, open_time = _timed(lambda: [store[name] for name in store])
+    assert dict(store) == data
+    return len(blob), save_time, lazy_time, lazy_time + open_time
+
+def run(entry_counts):
+    session_key = VaultEncryption.derive_session_key("benchmark")
+    print(f"{'entries':>9} {'format':>9} {'size MB':>9} {'save s':>8} {'load lazy s':>12} {'load all s':>11}")
+    for entries in entry_counts:
+        data = make_vault_data(entries)
+        for name, fn in (("legacy", legacy), ("v2", container)):
+            size, save, lazy, full = fn(data, session_key)
+            print(f"{entries:>9} {name:>9} {size / 1e6:>9.2f} {save:>8.2f} {lazy:>12.3f} {full:>11.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[10_000, 100_000])
+    run(parser.parse_args().entries)
@@ -1,9 +1,10 @@
 # main.py
 import os
+import threading
 from openvault import config, ui
 from openvault.ui import console, show_menu, show_header, ask_password
 from openvault.vault import Vault
-from openvault import passwords, twofa, files, notes, settings, updater, backups
+from openvault import passwords, twofa, otp_import, qrexport, files, notes, settings, updater, backups, strength
 from openvault.utils import load_config, save_config, ClipboardManager
 
 def ensure_dirs():
@@ -38,6 +39,38 @@ def load_active_vault(cfg):
     v.path = meta.get("path") or v.path
     return v
 
+def unlock_vault(vault) -> bool:
+    """Prompt until the vault unlocks; returns False if the user leaves blank to exit."""
+    while True:
+        show_header(f"{config.APP_NAME} - Locked", subtitle=vault.vault_name)
+        pwd = ask_password("Enter your master password (or blank to exit)")
+        if not pwd:
+            return False
+        if vault.load(pwd):
+            console.print("[green]Vault unlocked[/]")
+            # score password strength in the background while the menu is in use
+            strength.StrengthAudit.for_vault(vault).start()
+            return True
+        console.print("[red]Invalid password[/]")
+
+def lock_vault(vault, message: str):
+    if vault.lock():
+        console.print(f"[yellow]{message}[/]")
+    else:
+        console.print(f"[red]{message}, but recent changes could not be saved[/]")
+
+def start_idle_lock(vault, timeout):
+    """Lock the vault from a timer thread if the menu is left unanswered for timeout seconds."""
+    if not timeout:
+        return None
+    def expire():
+        lock_vault(vault, "Vault auto-locked after inactivity")
+        console.print("[dim]Press Enter to unlock[/]")
+    timer = threading.Timer(timeout, expire)
+    timer.daemon = True
+    timer.start()
+    return timer
+
 def main():
     ensure_dirs()
     cfg = load_config()
@@ -63,7 +96,7 @@ def main():
                     console.print("[red]Name and password required[/]")
                     continue
                 v = Vault(name)
-                if v.create_new(password):
+                if v.create_new(password, settings.calibrated_kdf(cfg)):
                     cfg.setdefault("vaults", {})[name] = {"display_name": display, "path": v.path}
                     cfg['active_vault'] = name
                     save_config(cfg)
@@ -83,21 +116,14 @@ def main():
 
     vault = active_vault
 
-    
-    while True:
-        show_header(f"{config.APP_NAME} - Locked", subtitle=vault.vault_name)
-        pwd = ask_password("Enter your master password (or blank to exit)")
-        if not pwd:
-            return
-        if vault.load(pwd):
-            console.print("[green]Vault unlocked[/]")
-            break
-        else:
-            console.print("[red]Invalid password[/]")
+    if not unlock_vault(vault):
+        return
 
-    
     while True:
         show_header(f"{config.APP_NAME} - Unlocked", subtitle=vault.vault_name)
+        if vault.save_error:
+            console.print(f"[red]{vault.save_error} (will retry)[/]")
+        idle_lock = start_idle_lock(vault, cfg.get("auto_lock_timeout", config.DEFAULT_TIMEOUT))
         choice = show_menu([
             "Password Manager",
             "2FA Authenticator",
@@ -109,20 +135,40 @@ def main():
             "Lock Vault",
             "Exit"
         ], title="Main")
+        if idle_lock:
+            idle_lock.cancel()
+            # wait out a lock that fired just as the choice came in
+            idle_lock.join()
+        if vault.is_locked:
+            if not unlock_vault(vault):
+                return
+            continue
         if choice == "Password Manager":
-            pm_choice = show_menu(["Add Password", "View Passwords", "Search Passwords", "Back"], title="Password Manager")
+            pm_choice = show_menu(["Add Password", "View Passwords", "Search Passwords", "Health Report", "Strength Audit", "Breach Check", "Back"], title="Password Manager")
             if pm_choice == "Add Password":
                 passwords.add_password(vault, ui)
             elif pm_choice == "View Passwords":
                 passwords.view_passwords(vault, ui)
             elif pm_choice == "Search Passwords":
                 passwords.search_passwords(vault, ui)
+            elif pm_choice == "Health Report":
+                passwords.health_report(vault, ui)
+            elif pm_choice == "Strength Audit":
+                passwords.strength_audit(vault, ui)
+            elif pm_choice == "Breach Check":
+                passwords.breach_report(vault, ui)
         elif choice == "2FA Authenticator":
-            tf_choice = show_menu(["Add 2FA", "View 2FA", "Back"], title="2FA Authenticator")
+            tf_choice = show_menu(["Add 2FA", "View 2FA", "Live Codes", "Bulk Import", "Bulk Export", "Back"], title="2FA Authenticator")
             if tf_choice == "Add 2FA":
                 twofa.add_twofa(vault, ui)
             elif tf_choice == "View 2FA":
                 twofa.view_twofa(vault, ui)
+            elif tf_choice == "Live Codes":
+                twofa.live_dashboard(vault, ui)
+            elif tf_choice == "Bulk Import":
+                otp_import.bulk_import(vault, ui)
+            elif tf_choice == "Bulk Export":
+                qrexport.bulk_export(vault, ui)
         elif choice == "Secure File Locker":
             fl = show_menu(["Upload File", "View Files", "Back"], title="Secure File Locker")
             if fl == "Upload File":
@@ -130,11 +176,13 @@ def main():
             elif fl == "View Files":
                 files.view_files(vault, ui)
         elif choice == "Secure Notes":
-            nn = show_menu(["Add Note", "View Notes", "Back"], title="Secure Notes")
+            nn = show_menu(["Add Note", "View Notes", "Search Notes", "Back"], title="Secure Notes")
             if nn == "Add Note":
                 notes.add_note(vault, ui)
             elif nn == "View Notes":
                 notes.view_notes(vault, ui)
+            elif nn == "Search Notes":
+                notes.search_notes(vault, ui)
         elif choice == "Backups":
             b_choice = show_menu(["Save Backup", "Load Backup", "Back"], title="Backups")
             if b_choice == "Save Backup":
@@ -142,25 +190,16 @@ def main():
             elif b_choice == "Load Backup":
                 backups.load_backup_for_vault(vault)
         elif choice == "Settings":
-            settings.open_settings_menu(cfg)
+            settings.open_settings_menu(cfg, vault)
         elif choice == "About":
             console.print(ui.about_panel(config.APP_NAME, config.APP_VERSION, author="OR-6", repo=f"https://github.com/{config.GITHUB_REPO}"))
         elif choice == "Lock Vault":
-            vault.master_password = None
-            vault.vault_data = None
-            console.print("[yellow]Vault locked[/]")
-            
-            while True:
-                show_header(f"{config.APP_NAME} - Locked", subtitle=vault.vault_name)
-                pwd = ask_password("Enter your master password (or blank to exit)")
-                if not pwd:
-                    return
-                if vault.load(pwd):
-                    console.print("[green]Vault unlocked[/]")
-                    break
-                else:
-                    console.print("[red]Invalid password[/]")
+            lock_vault(vault, "Vault locked")
+            if not unlock_vault(vault):
+                return
         elif choice == "Exit":
+            if not vault.flush():
+                console.print("[red]Recent changes could not be saved[/]")
             console.print("[green]Goodbye[/]")
             return
 
@@ -1,5 +1,6 @@
 # openvault/__init__.py
 __all__ = [
-    "config", "encryption", "utils", "ui", "vault",
-    "twofa", "files", "settings", "updater", "backups"
+    "config", "encryption", "codec", "utils", "ui", "vault", "sections", "search", "indexes", "fulltext",
+    "health", "breach", "strength", "totp", "twofa", "otp_import", "qrdecode", "qrscan", "qrexport",
+    "files", "locker", "chunkstore", "settings", "updater", "backups"
 ]
@@ -1,6 +1,5 @@
 # openvault/backups.py
 import os
-import shutil
 from openvault import ui, config
 from typing import Optional
 from datetime import datetime
@@ -23,12 +22,10 @@ def save_backup_for_vault(vault):
         if not dest:
             ui.console.print("[yellow]Cancelled[/]")
             return
-    try:
-        os.makedirs(os.path.dirname(dest), exist_ok=True)
-        shutil.copy2(vault.path, dest)
+    if vault.backup_to(dest):
         ui.console.print(f"[green]Backup saved to {dest}[/]")
-    except Exception as e:
-        ui.console.print(f"[red]Failed to save backup: {e}[/]")
+    else:
+        ui.console.print("[red]Failed to save backup[/]")
 
 def load_backup_for_vault(vault):
     """Let user pick a backup file to restore into the selected vault."""
@@ -46,8 +43,10 @@ def load_backup_for_vault(vault):
     if not os.path.exists(src):
         ui.console.print("[red]Backup file not found[/]")
         return
-    try:
-        shutil.copy2(src, vault.path)
-        ui.console.print("[green]Backup restored (please unlock to verify)[/]")
-    except Exception as e:
-        ui.console.print(f"[red]Failed to restore backup: {e}[/]")
+    if vault.restore_from(src):
+        if vault.is_locked:
+            ui.console.print("[green]Backup restored[/] [yellow](unlock it with the backup's master password)[/]")
+        else:
+            ui.console.print("[green]Backup restored and reloaded[/]")
+    else:
+        ui.console.print("[red]Failed to restore backup[/]")
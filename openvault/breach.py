@@ -0,0 +1,212 @@
+# openvault/breach.py
+"""Offline breached-password check against a sorted SHA-1 corpus.
+
+Two corpus layouts are accepted:
+
+* text, one "HASH[:COUNT]" line per password sorted by hash (the format of
+  the Pwned Passwords "ordered by hash" download),
+* binary, sorted 20-byte SHA-1 digests back to back.
+
+The file is memory-mapped, never read into RAM. A table of byte offsets for
+every 16-bit hash prefix is built once (a binary search per prefix) and
+cached next to the corpus as "<corpus>.ovidx"; a lookup then binary-searches
+only its prefix bucket. Vault passwords are hashed and looked up in sorted
+order, so a batch touches each corpus page at most once.
+"""
+import os
+import mmap
+import struct
+import hashlib
+from array import array
+from typing import Any, Dict, Iterable, Optional
+from openvault import utils
+
+PREFIX_BITS = 16
+BUCKETS = 1 << PREFIX_BITS
+DIGEST_SIZE = 20
+HEX_SIZE = 40
+INDEX_SUFFIX = ".ovidx"
+INDEX_MAGIC = b"OVBI"
+_INDEX_HEADER = struct.Struct("<4sBQQ")  # magic, layout, corpus size, corpus mtime (ns)
+LAYOUT_TEXT = 1
+LAYOUT_BINARY = 2
+
+class CorpusError(Exception):
+    pass
+
+def sha1(password: str) -> bytes:
+    return hashlib.sha1(password.encode("utf-8", "surrogatepass")).digest()
+
+class BreachCorpus:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._size = os.fstat(self._file.fileno()).st_size
+            if not self._size:
+                raise CorpusError("Corpus file is empty")
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        head = self._mm[:HEX_SIZE + 1]
+        if len(head) > HEX_SIZE and all(c in b"0123456789abcdefABCDEF" for c in head[:HEX_SIZE]) \
+                and head[HEX_SIZE:HEX_SIZE + 1] in (b":", b"\r", b"\n"):
+            self.layout = LAYOUT_TEXT
+            self._upper = head[:HEX_SIZE] == head[:HEX_SIZE].upper()
+        elif self._size % DIGEST_SIZE == 0:
+            self.layout = LAYOUT_BINARY
+        else:
+            self.close()
+            raise CorpusError("Unrecognized corpus format")
+        self._offsets = self._load_index()
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- record access -------------------------------------------------
+
+    def _key(self, digest: bytes) -> bytes:
+        if self.layout == LAYOUT_BINARY:
+            return digest
+        text = digest.hex()
+        return (text.upper() if self._upper else text).encode()
+
+    def _lower_bound(self, lo: int, hi: int, key: bytes) -> int:
+        """First record position in [lo, hi) whose hash is >= key (positions are record starts)."""
+        mm = self._mm
+        if self.layout == LAYOUT_BINARY:
+            while lo < hi:
+                mid = (lo + hi) // 2 // DIGEST_SIZE * DIGEST_SIZE
+                if mm[mid:mid + DIGEST_SIZE] < key:
+                    lo = mid + DIGEST_SIZE
+                else:
+                    hi = mid
+            return lo
+        while lo < hi:
+            mid = (lo + hi) // 2
+            newline = mm.rfind(b"\n", lo, mid)
+            start = lo if newline < 0 else newline + 1
+            if mm[start:start + HEX_SIZE] < key:
+                end = mm.find(b"\n", start, hi)
+                lo = hi if end < 0 else end + 1
+            else:
+                hi = start
+        return lo
+
+    def _count_at(self, pos: int) -> int:
+        if self.layout == LAYOUT_BINARY:
+            return 1
+        end = self._mm.find(b"\n", pos, pos + 64)
+        line = self._mm[pos:end if end >= 0 else pos + 64].strip()
+        _, _, count = line.partition(b":")
+        return int(count) if count.isdigit() else 1
+
+    # --- prefix index --------------------------------------------------
+
+    def _index_path(self) -> str:
+        return self.path + INDEX_SUFFIX
+
+    def _load_index(self) -> array:
+        stat = os.stat(self.path)
+        try:
+            with open(self._index_path(), "rb") as f:
+                raw = f.read()
+            magic, layout, size, mtime = _INDEX_HEADER.unpack_from(raw)
+            if (magic, layout, size, mtime) == (INDEX_MAGIC, self.layout, stat.st_size, stat.st_mtime_ns):
+                offsets = array("Q")
+                offsets.frombytes(raw[_INDEX_HEADER.size:])
+                if len(offsets) == BUCKETS + 1:
+                    return offsets
+        except (OSError, struct.error, ValueError):
+            # missing, truncated or foreign index: rebuild it
+            pass
+        offsets = self._build_index()
+        try:
+            utils.atomic_write(self._index_path(), _INDEX_HEADER.pack(INDEX_MAGIC, self.layout, stat.st_size,
+                                                                        stat.st_mtime_ns) + offsets.tobytes())
+        except OSError:
+            # read-only corpus location: keep the index for this session only
+            pass
+        return offsets
+
+    def _build_index(self) -> array:
+        offsets = array("Q", [0]) * (BUCKETS + 1)
+        lo = 0
+        for prefix in range(BUCKETS):
+            key = self._key(prefix.to_bytes(2, "big") + bytes(DIGEST_SIZE - 2))
+            lo = self._lower_bound(lo, self._size, key)
+            offsets[prefix] = lo
+        offsets[BUCKETS] = self._size
+        return offsets
+
+    # --- lookups -------------------------------------------------------
+
+    def lookup(self, digest: bytes) -> int:
+        """Times the SHA-1 digest occurs in the corpus (1 for binary corpora), 0 if absent."""
+        prefix = int.from_bytes(digest[:2], "big")
+        key = self._key(digest)
+        pos = self._lower_bound(self._offsets[prefix], self._offsets[prefix + 1], key)
+        if self._mm[pos:pos + len(key)] != key:
+            return 0
+        return self._count_at(pos)
+
+    def lookup_many(self, digests: Iterable[bytes]) -> Dict[bytes, int]:
+        """Only digests found are returned; lookups run in hash order for locality."""
+        found = {}
+        for digest in sorted(set(digests)):
+            count = self.lookup(digest)
+            if count:
+                found[digest] = count
+        return found
+
+class BreachStatus:
+    """Per-unlock breach results for vault_data["passwords"], kept through Vault.derived().
+
+    checked maps entry id -> times seen (0 = not found). Editing an entry drops
+    its result so it is looked up again.
+    """
+    def __init__(self):
+        self.corpus: Optional[BreachCorpus] = None
+        self.checked: Dict[str, int] = {}
+
+    @classmethod
+    def for_vault(cls, vault) -> "BreachStatus":
+        return vault.derived("breach", lambda v: cls())
+
+    def use(self, path: str) -> BreachCorpus:
+        if self.corpus is None or self.corpus.path != path:
+            if self.corpus is not None:
+                self.corpus.close()
+            self.corpus = BreachCorpus(path)
+            self.checked.clear()
+        return self.corpus
+
+    def close(self):
+        if self.corpus is not None:
+            self.corpus.close()
+            self.corpus = None
+
+    def update(self, section: str, entry_id: str, entry: Optional[Dict[str, Any]]):
+        if section == "passwords":
+            self.checked.pop(entry_id, None)
+
+    def screen(self, entries: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """Check every entry in one batch; returns entry id -> times seen for breached entries."""
+        digests = {eid: sha1(entry["password"]) for eid, entry in entries.items() if entry.get("password")}
+        found = self.corpus.lookup_many(digests.values())
+        self.checked = {eid: found.get(digest, 0) for eid, digest in digests.items()}
+        return {eid: count for eid, count in self.checked.items() if count}
+
+    def check(self, entry_id: str, entry: Dict[str, Any]) -> int:
+        if entry_id not in self.checked:
+            password = entry.get("password")
+            self.checked[entry_id] = self.corpus.lookup(sha1(password)) if password else 0
+        return self.checked[entry_id]
@@ -0,0 +1,378 @@
+# openvault/chunkstore.py
+"""Content-addressed, deduplicating store for Secure File Locker uploads.
+
+Files are cut into chunks at content-defined boundaries, so an insert or
+delete only changes the chunks around it and the rest of the file keeps
+its chunks. Each position gets a rolling hash of the WINDOW bytes ending
+there (per-offset random byte tables, XORed); a boundary falls after a run
+of positions whose hash is a "hit". Like FastCDC's normalized chunking, a
+longer run is needed before CHUNK_AVG than after it, which keeps chunk
+sizes close to the average, and CHUNK_MIN / CHUNK_MAX bound them. Runs of
+one repeated byte (zero-filled disk images) never hit and are cut at
+CHUNK_MAX. The hashes are computed a block at a time with bytes.translate
+and big-int XOR, so chunking runs at C speed instead of a Python loop per byte.
+
+Every vault has one store: a random chunk key, kept wrapped by the vault
+key in the STORE_SECTION vault section, and a folder CHUNKS_DIR/<vault>/<store id>.
+A chunk is named by a keyed BLAKE2b hash of its contents, stored once, and
+shared by every file containing it. A file entry keeps its manifest (the chunk names
+in order) and the sealed size of each chunk, so its own stored size is known
+whatever it shares; chunks no other manifest uses are deleted with the file. Chunks an
+interrupted upload left behind (written, but no entry saved) are swept the
+first time the store is opened in a session.
+
+Chunks are compressed before they are encrypted. A few spread-out slices of
+each chunk are sampled for byte entropy: chunks at or above RAW_ENTROPY
+(JPEG, ZIP, video, already encrypted data) are stored as they are, and in
+"auto" mode text-like chunks (below TEXT_ENTROPY) use bz2 and the rest zlib.
+Output that saves less than MIN_SAVING is dropped for the raw chunk. The
+codec is recorded in each chunk file's header:
+
+    chunk file = CHUNK_MAGIC | codec (1) | nonce (12) | AES-256-GCM(payload)
+
+with the chunk name and header as associated data.
+"""
+import os
+import bz2
+import lzma
+import math
+import uuid
+import zlib
+import base64
+import struct
+import hashlib
+from collections import Counter
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from openvault import config, encryption, locker
+
+STORE_SECTION = "chunk_store"
+CHUNK_MIN = 16 * 1024
+CHUNK_AVG = 64 * 1024
+CHUNK_MAX = 256 * 1024
+WINDOW = 4  # bytes hashed per position
+READ_SIZE = 4 * 1024 * 1024  # bytes chunked per block
+ID_SIZE = 16
+_NONCE_SIZE = 12
+CHUNK_MAGIC = b"OVCK"
+_CHUNK_HEADER = struct.Struct(">4sB")
+CODEC_RAW, CODEC_ZLIB, CODEC_BZ2, CODEC_LZMA = 0, 1, 2, 3
+COMPRESSION_MODES = ["auto", "zlib", "bz2", "lzma", "off"]
+_MODE_CODECS = {"zlib": CODEC_ZLIB, "bz2": CODEC_BZ2, "lzma": CODEC_LZMA}
+_COMPRESS = {
+    CODEC_ZLIB: lambda data: zlib.compress(data, 6),
+    CODEC_BZ2: lambda data: bz2.compress(data, 9),
+    CODEC_LZMA: lambda data: lzma.compress(data, preset=1),
+}
+_DECOMPRESS = {CODEC_ZLIB: zlib.decompress, CODEC_BZ2: bz2.decompress, CODEC_LZMA: lzma.decompress}
+SAMPLE_SLICES = 4  # slices of SAMPLE_SLICE bytes, spread over the chunk, are sampled for entropy
+SAMPLE_SLICE = 1024
+RAW_ENTROPY = 7.5  # bits per byte; at or above this a chunk is not compressed
+TEXT_ENTROPY = 6.0  # below this "auto" picks bz2 (logs, CSV, documents), zlib otherwise
+MIN_SAVING = 0.05  # compressed output must be at least this much smaller than the chunk
+# a hit is 1 in 16 positions: 4 hits in a row before CHUNK_AVG, 3 after
+_HIT = bytes(1 if v >= 240 else 0 for v in range(256))
+_STRICT_RUN = b"\x01" * 4
+_LOOSE_RUN = b"\x01" * 3
+
+def _window_tables() -> List[bytes]:
+    """Byte tables for each window offset; fixed forever, since they decide where files are cut."""
+    tables = [hashlib.shake_256(f"openvault:cdc:{i}".encode()).digest(256) for i in range(WINDOW - 1)]
+    # the last table cancels the others for a run of one byte value: its hash is 0, never a hit
+    last = bytearray(256)
+    for table in tables:
+        for value in range(256):
+            last[value] ^= table[value]
+    return tables + [bytes(last)]
+
+_TABLES = _window_tables()
+
+def _hits(buf: bytes) -> bytes:
+    """One 0/1 byte per position of buf: whether the hash of the window starting there is a hit."""
+    acc = 0
+    for offset, table in enumerate(_TABLES):
+        acc ^= int.from_bytes(buf[offset:].translate(table), "little")
+    return acc.to_bytes(len(buf), "little").translate(_HIT)
+
+def cut_points(buf: bytes, final: bool) -> List[int]:
+    """Chunk end offsets in buf. Unless final, the tail that could still grow is left uncut."""
+    hits = _hits(buf)
+    size = len(buf)
+    ends = []
+    pos = 0
+    while size - pos > CHUNK_MIN:
+        if not final and size - pos < CHUNK_MAX + WINDOW:
+            break
+        found = hits.find(_STRICT_RUN, pos + CHUNK_MIN - len(_STRICT_RUN), min(size, pos + CHUNK_AVG))
+        if found >= 0:
+            pos = found + len(_STRICT_RUN)
+        else:
+            found = hits.find(_LOOSE_RUN, pos + CHUNK_AVG - len(_LOOSE_RUN), min(size, pos + CHUNK_MAX))
+            pos = found + len(_LOOSE_RUN) if found >= 0 else min(size, pos + CHUNK_MAX)
+        ends.append(pos)
+    if final and pos < size:
+        ends.append(size)
+    return ends
+
+def iter_chunks(src: BinaryIO, read_size: int = READ_SIZE) -> Iterator[bytes]:
+    carry = b""
+    while True:
+        block = src.read(read_size)
+        buf = carry + block if carry else block
+        start = 0
+        for end in cut_points(buf, not block):
+            yield buf[start:end]
+            start = end
+        if not block:
+            return
+        carry = buf[start:]
+
+def sample_entropy(chunk: bytes) -> float:
+    """Shannon entropy in bits per byte of SAMPLE_SLICES slices spread over the chunk."""
+    if len(chunk) <= SAMPLE_SLICES * SAMPLE_SLICE:
+        sample = chunk
+    else:
+        step = (len(chunk) - SAMPLE_SLICE) // (SAMPLE_SLICES - 1)
+        sample = b"".join(chunk[i * step:i * step + SAMPLE_SLICE] for i in range(SAMPLE_SLICES))
+    if not sample:
+        return 0.0
+    total = len(sample)
+    return -sum(n / total * math.log2(n / total) for n in Counter(sample).values())
+
+def choose_codec(chunk: bytes, mode: str = "auto") -> int:
+    if mode not in _MODE_CODECS and mode != "auto":
+        return CODEC_RAW
+    entropy = sample_entropy(chunk)
+    if entropy >= RAW_ENTROPY:
+        return CODEC_RAW
+    if mode == "auto":
+        return CODEC_BZ2 if entropy < TEXT_ENTROPY else CODEC_ZLIB
+    return _MODE_CODECS[mode]
+
+def compress_chunk(chunk: bytes, mode: str = "auto") -> Tuple[int, bytes]:
+    """(codec, payload) for a chunk: compressed if the sample says it is worth trying and it paid off."""
+    codec = choose_codec(chunk, mode)
+    if codec == CODEC_RAW:
+        return CODEC_RAW, chunk
+    packed = _COMPRESS[codec](chunk)
+    if len(packed) > len(chunk) * (1 - MIN_SAVING):
+        return CODEC_RAW, chunk
+    return codec, packed
+
+def encode_manifest(ids: List[bytes]) -> str:
+    return base64.b64encode(b"".join(ids)).decode()
+
+def decode_manifest(manifest: str) -> List[bytes]:
+    raw = base64.b64decode(manifest)
+    return [raw[i:i + ID_SIZE] for i in range(0, len(raw), ID_SIZE)]
+
+def encode_sizes(sizes: List[int]) -> str:
+    return base64.b64encode(struct.pack(f">{len(sizes)}I", *sizes)).decode()
+
+def decode_sizes(sizes: str) -> List[int]:
+    raw = base64.b64decode(sizes)
+    return list(struct.unpack(f">{len(raw) // 4}I", raw))
+
+def sealed_sizes(manifest: str, sizes: str) -> Dict[bytes, int]:
+    """Chunk id -> bytes on disk, for each distinct chunk of a file."""
+    return dict(zip(decode_manifest(manifest), decode_sizes(sizes)))
+
+def key_context(store_id: str) -> str:
+    """Associated data the chunk key is wrapped under (see Vault.wrap_file_key)."""
+    return f"chunk-store:{store_id}"
+
+def store_dir(vault_name: Optional[str], store_id: str) -> str:
+    return os.path.join(config.CHUNKS_DIR, vault_name or "default", store_id)
+
+def _open_store(vault) -> "ChunkStore":
+    store = vault.vault_data.get(STORE_SECTION)
+    if store is None:
+        store_id = uuid.uuid4().hex
+        key = locker.new_data_key()
+        vault.vault_data[STORE_SECTION] = {"id": store_id, "key": vault.wrap_file_key(key, key_context(store_id))}
+        # the key must be on disk before any chunk is encrypted with it
+        if not vault.save():
+            del vault.vault_data[STORE_SECTION]
+            raise OSError("Could not save the chunk store key")
+        return ChunkStore(store_dir(vault.vault_name, store_id), key)
+    store_id = store["id"]
+    key = encryption.VaultEncryption.unwrap_key(store["key"], vault.session_key, key_context(store_id))
+    chunks = ChunkStore(store_dir(vault.vault_name, store_id), key)
+    chunks.sweep(info["chunks"] for info in vault.vault_data.get("files", {}).values() if "chunks" in info)
+    return chunks
+
+class ChunkStore:
+    """Encrypted chunks under root, named by a keyed hash; the vault's store comes from for_vault()."""
+    def __init__(self, root: str, key: bytes):
+        self.root = root
+        self._aead = AESGCM(key)
+        self._id_key = hashlib.blake2b(b"openvault:chunk-id", key=key, digest_size=32).digest()
+
+    @classmethod
+    def for_vault(cls, vault) -> "ChunkStore":
+        return vault.derived("chunk-store", _open_store)
+
+    def chunk_id(self, chunk: bytes) -> bytes:
+        return hashlib.blake2b(chunk, key=self._id_key, digest_size=ID_SIZE).digest()
+
+    def _path(self, cid: bytes) -> str:
+        name = cid.hex()
+        return os.path.join(self.root, name[:2], name)
+
+    def _store(self, cid: bytes, chunk: bytes, first: bool, compression: str) -> Tuple[int, int, bool]:
+        """(plain size, sealed size, newly written): chunks already stored are not written again.
+
+        Chunks seen earlier in this file are skipped entirely (sealed size 0).
+        """
+        path = self._path(cid)
+        if not first:
+            return len(chunk), 0, False
+        if os.path.exists(path):
+            return len(chunk), os.path.getsize(path), False
+        codec, payload = compress_chunk(chunk, compression)
+        header = _CHUNK_HEADER.pack(CHUNK_MAGIC, codec)
+        nonce = os.urandom(_NONCE_SIZE)
+        sealed = header + nonce + self._aead.encrypt(nonce, payload, cid + header)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(sealed)
+            os.replace(tmp, path)
+        finally:
+            locker._remove_quietly(tmp)
+        return len(chunk), len(sealed), True
+
+    def put_stream(self, src: BinaryIO, total_size: int = 0,
+                   progress_callback: Optional[Callable[[int], None]] = None,
+                   workers: int = locker.DEFAULT_WORKERS,
+                   compression: str = "auto") -> Tuple[List[bytes], List[int], int]:
+        """Chunk ids of the stream in order, their sealed sizes, and the bytes newly written to the store.
+
+        New chunks are compressed (compression is one of COMPRESSION_MODES),
+        sealed and written on a thread pool; if anything fails, the chunks
+        this call added are removed again and the error is raised.
+        """
+        ids: List[bytes] = []
+        added: List[bytes] = []
+        seen = set()
+
+        def items():
+            for chunk in iter_chunks(src):
+                cid = self.chunk_id(chunk)
+                ids.append(cid)
+                yield cid, chunk, cid not in seen, compression
+                seen.add(cid)
+
+        sizes: List[int] = []
+        by_id: Dict[bytes, int] = {}
+        done = written = 0
+        try:
+            for index, (plain_len, sealed_len, new) in enumerate(locker._ordered_map(self._store, items(), workers)):
+                cid = ids[index]
+                done += plain_len
+                # a repeat inside the file reuses the size of its first occurrence, which came earlier
+                sizes.append(by_id.setdefault(cid, sealed_len))
+                if new:
+                    written += sealed_len
+                    added.append(cid)
+                if progress_callback and total_size:
+                    progress_callback(min(100, int(done / total_size * 100)))
+        except Exception:
+            for cid in added:
+                locker._remove_quietly(self._path(cid))
+            raise
+        return ids, sizes, written
+
+    def read_stream(self, ids: List[bytes], dst: BinaryIO, total_size: int = 0,
+                    progress_callback: Optional[Callable[[int], None]] = None,
+                    workers: int = locker.DEFAULT_WORKERS):
+        def load(cid):
+            try:
+                with open(self._path(cid), "rb") as f:
+                    sealed = f.read()
+            except FileNotFoundError:
+                raise locker.LockerFormatError(f"Missing chunk {cid.hex()}")
+            header = sealed[:_CHUNK_HEADER.size]
+            magic, codec = _CHUNK_HEADER.unpack(header)
+            if magic != CHUNK_MAGIC or (codec != CODEC_RAW and codec not in _DECOMPRESS):
+                raise locker.LockerFormatError(f"Unsupported chunk {cid.hex()}")
+            body = sealed[_CHUNK_HEADER.size:]
+            payload = self._aead.decrypt(body[:_NONCE_SIZE], body[_NONCE_SIZE:], cid + header)
+            return payload if codec == CODEC_RAW else _DECOMPRESS[codec](payload)
+
+        done = 0
+        for plain in locker._ordered_map(load, ((cid,) for cid in ids), workers):
+            dst.write(plain)
+            done += len(plain)
+            if progress_callback and total_size:
+                progress_callback(min(100, int(done / total_size * 100)))
+
+    def put_file(self, input_path: str, progress_callback: Optional[Callable[[int], None]] = None,
+                 compression: str = "auto") -> Optional[Tuple[str, str, int]]:
+        """(manifest, encoded chunk sizes, bytes newly written) for a file, or None if it could not be stored."""
+        try:
+            with open(input_path, "rb") as src:
+                ids, sizes, written = self.put_stream(src, os.path.getsize(input_path), progress_callback,
+                                                      compression=compression)
+            if progress_callback:
+                progress_callback(100)
+            return encode_manifest(ids), encode_sizes(sizes), written
+        except Exception:
+            return None
+
+    def get_file(self, manifest: str, out_path: str, total_size: int = 0,
+                 progress_callback: Optional[Callable[[int], None]] = None) -> bool:
+        try:
+            with open(out_path, "wb") as dst:
+                self.read_stream(decode_manifest(manifest), dst, total_size, progress_callback)
+            if progress_callback:
+                progress_callback(100)
+            return True
+        except Exception:
+            # never leave a partially authenticated plaintext behind
+            locker._remove_quietly(out_path)
+            return False
+
+    def sweep(self, manifests: Iterable[str]) -> Tuple[int, int]:
+        """Delete every chunk (and temporary file) no manifest uses; (files removed, bytes freed)."""
+        referenced = {cid.hex() for manifest in manifests for cid in decode_manifest(manifest)}
+        removed = freed = 0
+        try:
+            folders = os.listdir(self.root)
+        except OSError:
+            return 0, 0
+        for folder in folders:
+            try:
+                names = os.listdir(os.path.join(self.root, folder))
+            except OSError:
+                continue
+            for name in names:
+                if name in referenced:
+                    continue
+                path = os.path.join(self.root, folder, name)
+                try:
+                    size = os.path.getsize(path)
+                    os.remove(path)
+                except OSError:
+                    continue
+                removed += 1
+                freed += size
+        return removed, freed
+
+    def release(self, manifest: str, remaining: Iterable[str]) -> Tuple[int, int]:
+        """Delete the chunks of manifest that no remaining manifest uses; (chunks removed, bytes freed)."""
+        referenced = set()
+        for other in remaining:
+            referenced.update(decode_manifest(other))
+        removed = freed = 0
+        for cid in set(decode_manifest(manifest)) - referenced:
+            path = self._path(cid)
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                continue
+            removed += 1
+            freed += size
+        return removed, freed
@@ -0,0 +1,182 @@
+# openvault/codec.py
+"""Compact binary encoding for vault sections.
+
+Sections shaped like ``{uuid: {field: scalar}}`` (passwords, 2FA, notes, files)
+are stored column by column: ids as packed 16-byte UUIDs, ISO timestamps and
+integers as int64 arrays, low-cardinality strings (category, algo, ...) as an
+interned table plus indices, other strings as lengths plus one UTF-8 blob.
+Anything else (categories list, irregular data) falls back to JSON.
+
+Every value round-trips exactly: ids and timestamps are only packed when
+their text is in the canonical form that re-formatting reproduces.
+"""
+import re
+import sys
+import json
+import struct
+import operator
+import datetime
+from array import array
+from itertools import accumulate, chain, repeat
+from typing import Any, Dict, List, Tuple
+
+FORMAT_JSON = 0
+FORMAT_TABLE = 1
+
+COL_JSON = 0
+COL_STR = 1
+COL_ENUM = 2
+COL_INT = 3
+COL_TIMESTAMP = 4
+
+_MISSING = object()
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICRO = datetime.timedelta(microseconds=1)
+_UUID = r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+_UUID_RE = re.compile(_UUID)
+# ".000000" is excluded because isoformat() would drop it on the way back
+_TS = r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.(?!000000)\d{6})?"
+_TS_LINES_RE = re.compile(f"(?:{_TS}\n)*")
+_U32 = struct.Struct("<I")
+_HEAD = struct.Struct("<BI")
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+# Columns are converted with map() over builtins rather than per-item Python
+# code; on 1M-entry vaults that is the difference between matching json and
+# being several times slower than it.
+
+def _le(arr: array) -> bytes:
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+def _from_le(typecode: str, raw: bytes) -> array:
+    arr = array(typecode)
+    arr.frombytes(raw)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+def _blob(raw: bytes) -> bytes:
+    return _U32.pack(len(raw)) + raw
+
+def _read_blob(data: memoryview, offset: int) -> Tuple[bytes, int]:
+    (length,) = _U32.unpack_from(data, offset)
+    offset += _U32.size
+    return bytes(data[offset:offset + length]), offset + length
+
+def _is_table(value: Any) -> bool:
+    if not isinstance(value, dict) or not value:
+        return False
+    if set(map(type, value.values())) != {dict} or set(map(type, value)) != {str}:
+        return False
+    # each key on its own: keys that only join into a run of UUIDs would not round-trip
+    return all(map(_UUID_RE.fullmatch, value))
+
+def _encode_column(values: List[Any]) -> Tuple[int, bytes]:
+    types = set(map(type, values))
+    if types == {int} and _INT64_MIN <= min(values) and max(values) <= _INT64_MAX:
+        return COL_INT, _le(array("q", values))
+    if types != {str}:
+        return COL_JSON, json.dumps(values).encode()
+    if _TS_LINES_RE.fullmatch("\n".join(values) + "\n"):
+        stamps = map(datetime.datetime.fromisoformat, values)
+        micros = map(operator.floordiv, map(operator.sub, stamps, repeat(_EPOCH)), repeat(_MICRO))
+        return COL_TIMESTAMP, _le(array("q", micros))
+    distinct = list(dict.fromkeys(values))
+    if len(distinct) <= 65535 and len(distinct) * 4 <= len(values):
+        lookup = {v: i for i, v in enumerate(distinct)}
+        table = json.dumps(distinct).encode()
+        return COL_ENUM, _blob(table) + _le(array("H", map(lookup.__getitem__, values)))
+    lengths = _le(array("I", map(len, values)))
+    return COL_STR, lengths + "".join(values).encode("utf-8", "surrogatepass")
+
+def _decode_column(kind: int, raw: bytes, count: int) -> List[Any]:
+    if kind == COL_INT:
+        return _from_le("q", raw).tolist()
+    if kind == COL_TIMESTAMP:
+        deltas = map(operator.mul, _from_le("q", raw), repeat(_MICRO))
+        return list(map(datetime.datetime.isoformat, map(operator.add, repeat(_EPOCH), deltas)))
+    if kind == COL_ENUM:
+        table, offset = _read_blob(memoryview(raw), 0)
+        return list(map(json.loads(table.decode()).__getitem__, _from_le("H", raw[offset:])))
+    if kind == COL_STR:
+        lengths = _from_le("I", raw[:4 * count])
+        text = raw[4 * count:].decode("utf-8", "surrogatepass")
+        ends = list(accumulate(lengths))
+        starts = chain((0,), ends)
+        return list(map(text.__getitem__, map(slice, starts, ends)))
+    return json.loads(raw.decode())
+
+def _encode_table(section: Dict[str, Dict[str, Any]]) -> bytes:
+    ids = list(section)
+    rows = list(section.values())
+    fields = list(dict.fromkeys(chain.from_iterable(rows)))
+    parts = [_HEAD.pack(FORMAT_TABLE, len(ids)),
+             bytes.fromhex("".join(ids).replace("-", "")),
+             struct.pack("<H", len(fields))]
+    for field in fields:
+        column = list(map(dict.get, rows, repeat(field), repeat(_MISSING)))
+        partial = _MISSING in column
+        if partial:
+            present = [v is not _MISSING for v in column]
+            column = [v for v in column if v is not _MISSING]
+        kind, payload = _encode_column(column)
+        name = field.encode()
+        parts.append(_blob(name) + bytes([kind, partial]))
+        if partial:
+            parts.append(bytes(present))
+        parts.append(_blob(payload))
+    return b"".join(parts)
+
+def _decode_table(data: memoryview) -> Dict[str, Dict[str, Any]]:
+    _, count = _HEAD.unpack_from(data, 0)
+    offset = _HEAD.size
+    hexed = bytes(data[offset:offset + 16 * count]).hex()
+    offset += 16 * count
+    groups = [map(hexed.__getitem__, map(slice, range(a, len(hexed), 32), range(b, len(hexed) + 1, 32)))
+              for a, b in ((0, 8), (8, 12), (12, 16), (16, 20), (20, 32))]
+    ids = list(map("{}-{}-{}-{}-{}".format, *groups))
+    (field_count,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    names, columns = [], []
+    sparse = []
+    for _ in range(field_count):
+        name, offset = _read_blob(data, offset)
+        kind, partial = data[offset], data[offset + 1]
+        offset += 2
+        present = None
+        if partial:
+            present = bytes(data[offset:offset + count])
+            offset += count
+        payload, offset = _read_blob(data, offset)
+        values = _decode_column(kind, payload, sum(present) if partial else count)
+        if partial:
+            sparse.append((name.decode(), present, values))
+        else:
+            names.append(name.decode())
+            columns.append(values)
+    if columns:
+        rows = list(map(dict, map(zip, repeat(names), zip(*columns))))
+    else:
+        rows = [{} for _ in ids]
+    for name, present, values in sparse:
+        it = iter(values)
+        for row, has in zip(rows, present):
+            if has:
+                row[name] = next(it)
+    return dict(zip(ids, rows))
+
+def encode(value: Any) -> bytes:
+    if _is_table(value):
+        return _encode_table(value)
+    return bytes([FORMAT_JSON]) + json.dumps(value).encode()
+
+def decode(data: bytes) -> Any:
+    view = memoryview(data)
+    if data[0] == FORMAT_TABLE:
+        return _decode_table(view)
+    if data[0] == FORMAT_JSON:
+        return json.loads(bytes(view[1:]).decode())
+    raise ValueError(f"Unknown section encoding {data[0]}")
@@ -11,12 +11,21 @@ VAULTS_DIR = os.path.join(CONFIG_DIR, "vaults")
 VAULT_FILE_TEMPLATE = os.path.join(VAULTS_DIR, "{name}.enc")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
 LOCKER_DIR = os.path.join(CONFIG_DIR, "locker")
+CHUNKS_DIR = os.path.join(LOCKER_DIR, "chunks")  # deduplicated locker chunks, one folder per vault
 TEMP_DIR = os.path.join(CONFIG_DIR, "temp")
 BACKUPS_DIR = os.path.join(CONFIG_DIR, "backups")
+QR_CACHE_DIR = os.path.join(CONFIG_DIR, "qr_cache")  # encrypted rendered QR codes, one folder per vault
 
 # defaults
 DEFAULT_TIMEOUT = 300  # seconds to auto-lock
 DEFAULT_CLIP_CLEAR = 15
+DEFAULT_KDF_TARGET_MS = 500  # unlock latency the KDF is calibrated for
+JOURNAL_MAX_RECORDS = 256  # compact the vault journal into a snapshot past either limit
+JOURNAL_MAX_BYTES = 1024 * 1024
+SAVE_DEBOUNCE_SECONDS = 0.5  # queued vault changes are written after this much quiet...
+SAVE_MAX_DELAY_SECONDS = 5  # ...or at the latest this long after the first one
+SECTION_IDLE_SECONDS = 120  # decrypted vault sections are dropped after this long unused
+PASSWORD_MAX_AGE_DAYS = 365  # health report flags passwords not changed for this long
 DEFAULT_CONFIG = {
     "active_vault": None,
     "vaults": {},  # name -> metadata dict {display_name, path}
@@ -24,5 +33,9 @@ DEFAULT_CONFIG = {
     "clipboard_clear_time": DEFAULT_CLIP_CLEAR,
     "auto_update": True,
     "default_backup_path": "",  # user can set
+    "kdf_algorithm": "scrypt",
+    "kdf_target_ms": DEFAULT_KDF_TARGET_MS,
+    "breach_corpus_path": "",  # sorted SHA-1 hash file for the offline breach check
+    "locker_compression": "auto",  # auto / zlib / bz2 / lzma / off, for new locker uploads
     "last_update_check": None
 }
@@ -1,85 +1,236 @@
 # openvault/encryption.py
 import os
+import hmac
 import base64
+import hashlib
 import json
+import time
 from typing import Tuple, Optional, Callable
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
 from cryptography.fernet import Fernet, InvalidToken
 
 SALT_SIZE = 16
+PBKDF2_ITERATIONS = 480000
+# parameters implied by files written before KDF settings were stored
+DEFAULT_KDF = {"name": "pbkdf2-sha256", "iterations": PBKDF2_ITERATIONS}
+KDF_NAMES = ["scrypt", "pbkdf2-sha256"]
+# calibration never goes below these floors, whatever the target latency
+PBKDF2_MIN_ITERATIONS = 100000
+SCRYPT_MIN_N = 1 << 14
+SCRYPT_R = 8
+SCRYPT_MAX_MEMORY = 256 * 1024 * 1024
+WRAP_NONCE_SIZE = 12
+
+class SessionKey:
+    """Key derived once at unlock and reused by every encrypt/decrypt until the vault is locked."""
+    def __init__(self, key: bytes, salt: bytes, password: Optional[str] = None, kdf: Optional[dict] = None):
+        self._key = bytearray(key)
+        self.salt = salt
+        self.kdf = dict(kdf or DEFAULT_KDF)
+        self._fernet: Optional[Fernet] = Fernet(bytes(key))
+        self._password_check = self._check(password) if password is not None else None
+
+    @property
+    def active(self) -> bool:
+        return self._fernet is not None
+
+    @property
+    def fernet(self) -> Fernet:
+        if self._fernet is None:
+            raise ValueError("Session key has been wiped")
+        return self._fernet
+
+    def _check(self, password: str) -> bytes:
+        return hmac.new(bytes(self._key), password.encode(), hashlib.sha256).digest()
+
+    def matches(self, salt: Optional[bytes], password: Optional[str] = None) -> bool:
+        """True if this key was derived from the given salt (and password, when known)."""
+        if not self.active or salt != self.salt:
+            return False
+        if password is None or self._password_check is None:
+            return True
+        return hmac.compare_digest(self._check(password), self._password_check)
+
+    def subkey(self, label: str, length: int = 32) -> bytes:
+        """Independent key for a specific purpose, derived from the session key with HKDF."""
+        if not self.active:
+            raise ValueError("Session key has been wiped")
+        return HKDF(algorithm=hashes.SHA256(), length=length, salt=None,
+                    info=f"openvault:{label}".encode()).derive(bytes(self._key))
+
+    def wipe(self):
+        """Overwrite the key material we own and drop the cipher object."""
+        for i in range(len(self._key)):
+            self._key[i] = 0
+        self._key = bytearray()
+        self._fernet = None
+        self._password_check = None
 
 class VaultEncryption:
     @staticmethod
-    def generate_key(password: str, salt: Optional[bytes] = None) -> Tuple[bytes, bytes]:
+    def generate_key(password: str, salt: Optional[bytes] = None, kdf: Optional[dict] = None) -> Tuple[bytes, bytes]:
         if salt is None:
             salt = os.urandom(SALT_SIZE)
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=480000,
-            backend=default_backend()
-        )
+        params = kdf or DEFAULT_KDF
+        if params["name"] == "pbkdf2-sha256":
+            kdf = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=salt,
+                iterations=params["iterations"],
+                backend=default_backend()
+            )
+        elif params["name"] == "scrypt":
+            kdf = Scrypt(salt=salt, length=32, n=params["n"], r=params["r"], p=params["p"],
+                         backend=default_backend())
+        else:
+            raise ValueError(f"Unsupported KDF {params['name']}")
         key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
         return key, salt
 
+    @staticmethod
+    def time_kdf(kdf: dict) -> float:
+        """Seconds one derivation with these parameters takes on this machine."""
+        start = time.perf_counter()
+        VaultEncryption.generate_key("calibration", os.urandom(SALT_SIZE), kdf)
+        return time.perf_counter() - start
+
+    @staticmethod
+    def calibrate_kdf(name: str = "scrypt", target_ms: int = 500) -> dict:
+        """Pick parameters so one derivation takes about target_ms here.
+
+        Both KDFs scale linearly with their cost parameter, so a single cheap
+        probe is extrapolated rather than searching.
+        """
+        target = target_ms / 1000.0
+        if name == "pbkdf2-sha256":
+            probe = {"name": name, "iterations": 50000}
+            per_iteration = VaultEncryption.time_kdf(probe) / probe["iterations"]
+            iterations = int(target / per_iteration) // 1000 * 1000
+            return {"name": name, "iterations": max(PBKDF2_MIN_ITERATIONS, iterations)}
+        if name == "scrypt":
+            probe = {"name": name, "n": SCRYPT_MIN_N, "r": SCRYPT_R, "p": 1}
+            elapsed = VaultEncryption.time_kdf(probe)
+            max_n = SCRYPT_MAX_MEMORY // (128 * SCRYPT_R)
+            n = SCRYPT_MIN_N
+            while n * 2 <= max_n and elapsed * (n * 2) / SCRYPT_MIN_N <= target:
+                n *= 2
+            return {"name": name, "n": n, "r": SCRYPT_R, "p": 1}
+        raise ValueError(f"Unsupported KDF {name}")
+
+    @staticmethod
+    def describe_kdf(kdf: dict) -> str:
+        if kdf["name"] == "scrypt":
+            return f"scrypt (N=2^{kdf['n'].bit_length() - 1}, r={kdf['r']}, p={kdf['p']})"
+        return f"PBKDF2-SHA256 ({kdf['iterations']:,} iterations)"
+
+    @staticmethod
+    def derive_session_key(password: str, salt: Optional[bytes] = None, kdf: Optional[dict] = None) -> SessionKey:
+        key, salt = VaultEncryption.generate_key(password, salt, kdf)
+        return SessionKey(key, salt, password, kdf)
+
     @staticmethod
     def encrypt_data(data: dict, password: str, salt: Optional[bytes] = None) -> Tuple[bytes, bytes]:
-        key, salt = VaultEncryption.generate_key(password, salt)
-        fernet = Fernet(key)
-        encrypted = fernet.encrypt(json.dumps(data).encode())
-        return encrypted, salt
+        session_key = VaultEncryption.derive_session_key(password, salt)
+        return VaultEncryption.encrypt_data_with_key(data, session_key), session_key.salt
 
     @staticmethod
     def decrypt_data(encrypted_data: bytes, password: str, salt: bytes) -> Optional[dict]:
-        key, _ = VaultEncryption.generate_key(password, salt)
-        fernet = Fernet(key)
+        session_key = VaultEncryption.derive_session_key(password, salt)
+        return VaultEncryption.decrypt_data_with_key(encrypted_data, session_key)
+
+    @staticmethod
+    def encrypt_data_with_key(data: dict, session_key: SessionKey) -> bytes:
+        return session_key.fernet.encrypt(json.dumps(data).encode())
+
+    @staticmethod
+    def decrypt_data_with_key(encrypted_data: bytes, session_key: SessionKey) -> Optional[dict]:
         try:
-            raw = fernet.decrypt(encrypted_data)
+            raw = session_key.fernet.decrypt(encrypted_data)
             return json.loads(raw.decode())
         except InvalidToken:
             return None
 
+    @staticmethod
+    def wrap_key(data_key: bytes, session_key: SessionKey, context: str) -> str:
+        """Encrypt a per-file data key under the session key; context binds it to one file."""
+        nonce = os.urandom(WRAP_NONCE_SIZE)
+        aead = AESGCM(session_key.subkey("file-key-wrap"))
+        return base64.b64encode(nonce + aead.encrypt(nonce, data_key, context.encode())).decode()
+
+    @staticmethod
+    def unwrap_key(wrapped: str, session_key: SessionKey, context: str) -> bytes:
+        raw = base64.b64decode(wrapped)
+        aead = AESGCM(session_key.subkey("file-key-wrap"))
+        return aead.decrypt(raw[:WRAP_NONCE_SIZE], raw[WRAP_NONCE_SIZE:], context.encode())
+
+    @staticmethod
+    def encrypt_file_with_key(input_path: str, out_path: str, data_key: bytes,
+                              progress_callback: Optional[Callable[[int], None]] = None,
+                              workers: Optional[int] = None) -> bool:
+        """Encrypt with a per-file data key; no KDF runs (see openvault.locker)."""
+        from openvault import locker
+        return locker.encrypt_file_with_key(input_path, out_path, data_key, progress_callback,
+                                            workers or locker.DEFAULT_WORKERS)
+
+    @staticmethod
+    def decrypt_file_with_key(encrypted_path: str, out_path: str, data_key: bytes,
+                              progress_callback: Optional[Callable[[int], None]] = None,
+                              workers: Optional[int] = None) -> bool:
+        from openvault import locker
+        if locker.is_locker_file(encrypted_path):
+            return locker.decrypt_file_with_key(encrypted_path, out_path, data_key, progress_callback,
+                                                workers or locker.DEFAULT_WORKERS)
+        return VaultEncryption._decrypt_legacy_file(encrypted_path, out_path, None, progress_callback, data_key)
+
+    @staticmethod
+    def password_file_key(encrypted_path: str, password: str) -> bytes:
+        """Key of a file encrypted before data keys existed, derived from the password (runs the KDF)."""
+        from openvault import locker
+        if locker.is_locker_file(encrypted_path):
+            return locker.password_file_key(encrypted_path, password)
+        with open(encrypted_path, "rb") as f:
+            salt = f.read(SALT_SIZE)
+        key, _ = VaultEncryption.generate_key(password, salt)
+        return base64.urlsafe_b64decode(key)
+
     @staticmethod
     def encrypt_file(input_path: str, out_path: str, password: str,
-                     progress_callback: Optional[Callable[[int], None]] = None) -> bool:
-        """Read the file in chunks and encrypt in-memory then write salt+encrypted bytes."""
-        try:
-            file_size = os.path.getsize(input_path)
-            read = 0
-            CHUNK = 8 * 1024 * 1024
-            buf = bytearray()
-            with open(input_path, "rb") as f:
-                while True:
-                    chunk = f.read(CHUNK)
-                    if not chunk:
-                        break
-                    buf.extend(chunk)
-                    read += len(chunk)
-                    if progress_callback and file_size:
-                        progress_callback(min(100, int(read / file_size * 100)))
-            key, salt = VaultEncryption.generate_key(password)
-            fernet = Fernet(key)
-            encrypted = fernet.encrypt(bytes(buf))
-            with open(out_path, "wb") as out:
-                out.write(salt)
-                out.write(encrypted)
-            if progress_callback:
-                progress_callback(100)
-            return True
-        except Exception:
-            return False
+                     progress_callback: Optional[Callable[[int], None]] = None,
+                     workers: Optional[int] = None) -> bool:
+        """Stream the file through the chunked locker format (see openvault.locker)."""
+        from openvault import locker
+        return locker.encrypt_file(input_path, out_path, password, progress_callback,
+                                   workers or locker.DEFAULT_WORKERS)
 
     @staticmethod
     def decrypt_file(encrypted_path: str, out_path: str, password: str,
-                     progress_callback: Optional[Callable[[int], None]] = None) -> bool:
+                     progress_callback: Optional[Callable[[int], None]] = None,
+                     workers: Optional[int] = None) -> bool:
+        from openvault import locker
+        if locker.is_locker_file(encrypted_path):
+            return locker.decrypt_file(encrypted_path, out_path, password, progress_callback,
+                                       workers or locker.DEFAULT_WORKERS)
+        return VaultEncryption._decrypt_legacy_file(encrypted_path, out_path, password, progress_callback)
+
+    @staticmethod
+    def _decrypt_legacy_file(encrypted_path: str, out_path: str, password: Optional[str],
+                             progress_callback: Optional[Callable[[int], None]] = None,
+                             data_key: Optional[bytes] = None) -> bool:
+        """Files written before the chunked format: salt followed by one Fernet token."""
         try:
             with open(encrypted_path, "rb") as f:
                 salt = f.read(SALT_SIZE)
                 encrypted = f.read()
-            key, _ = VaultEncryption.generate_key(password, salt)
+            if data_key is not None:
+                key = base64.urlsafe_b64encode(data_key)
+            else:
+                key, _ = VaultEncryption.generate_key(password, salt)
             fernet = Fernet(key)
             decrypted = fernet.decrypt(encrypted)
             with open(out_path, "wb") as out:
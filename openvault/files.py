@@ -3,7 +3,8 @@ import os
 import uuid
 import datetime
 import pyperclip
-from openvault import config, encryption, utils, ui
+from typing import Dict, Optional, Tuple
+from openvault import config, encryption, chunkstore, utils, ui, indexes
 
 def upload_file(vault, ui_module):
     """Upload and encrypt a file to the locker. Try Tkinter dialog first; fallback to manual path."""
@@ -29,8 +30,6 @@ def upload_file(vault, ui_module):
 
     file_name = os.path.basename(path)
     category = ui_module.show_menu(vault.vault_data["categories"], title="Select category")
-    encrypted_file_name = f"{uuid.uuid4().hex}.enc"
-    encrypted_path = os.path.join(config.LOCKER_DIR, encrypted_file_name)
     file_size = os.path.getsize(path)
 
     def progress_cb(percent):
@@ -39,54 +38,101 @@ def upload_file(vault, ui_module):
         except Exception:
             pass
 
-    ok = encryption.VaultEncryption.encrypt_file(path, encrypted_path, vault.master_password, progress_callback=progress_cb)
-    if ok:
+    # chunks already in the locker (earlier versions, copies) are not stored again
+    try:
+        store = chunkstore.ChunkStore.for_vault(vault)
+    except Exception:
+        ui_module.console.print("[red]Failed to open the file locker[/]")
+        return
+    compression = utils.load_config().get("locker_compression", "auto")
+    result = store.put_file(path, progress_callback=progress_cb, compression=compression)
+    if result:
+        manifest, sizes, written = result
         file_id = str(uuid.uuid4())
         ts = datetime.datetime.now().isoformat()
-        vault.vault_data.setdefault("files", {})[file_id] = {
+        info = {
             "name": file_name,
             "size": file_size,
-            "encrypted_name": encrypted_file_name,
+            "chunks": manifest,
+            "chunk_sizes": sizes,
             "category": category,
             "created": ts,
             "modified": ts
         }
-        if vault.save():
-            ui_module.console.print(f"\n[green]File '{file_name}' encrypted and stored ({utils.format_size(file_size)})[/]")
+        if vault.upsert("files", file_id, info):
+            # written now rather than debounced: until the entry is on disk its chunks count as orphans
+            vault.flush()
+            ui_module.console.print(f"\n[green]File '{file_name}' encrypted and stored ({utils.format_size(file_size)}, "
+                                    f"{_stored_label(info)} after compression)[/]")
+            ui_module.console.print(f"[dim]{utils.format_size(written)} new in the locker after deduplication[/]")
     else:
-        if os.path.exists(encrypted_path):
-            try:
-                os.remove(encrypted_path)
-            except Exception:
-                pass
         ui_module.console.print("[red]Failed to encrypt/store file[/]")
 
+def _chunk_sizes(info) -> Dict[bytes, int]:
+    if "chunk_sizes" not in info:
+        return {}
+    return chunkstore.sealed_sizes(info["chunks"], info["chunk_sizes"])
+
+def _stored_size(info) -> Optional[int]:
+    """Bytes the file takes on its own after compression: its distinct sealed chunks, or its .enc file."""
+    if "chunk_sizes" in info:
+        return sum(_chunk_sizes(info).values())
+    try:
+        return os.path.getsize(os.path.join(config.LOCKER_DIR, info["encrypted_name"]))
+    except (KeyError, OSError):
+        return None
+
+def _stored_label(info) -> str:
+    stored = _stored_size(info)
+    if stored is None:
+        return "-"
+    ratio = f" ({stored / info['size']:.0%})" if info["size"] else ""
+    return f"{utils.format_size(stored)}{ratio}"
+
+def _locker_usage(files) -> Tuple[int, int, int]:
+    """Original bytes, bytes stored file by file after compression, and bytes on disk with shared chunks counted once."""
+    original = stored = unchunked = 0
+    chunks: Dict[bytes, int] = {}
+    for info in files.values():
+        original += info["size"]
+        own = _stored_size(info) or 0
+        stored += own
+        if "chunks" in info:
+            chunks.update(_chunk_sizes(info))
+        else:
+            unchunked += own
+    return original, stored, unchunked + sum(chunks.values())
+
 def view_files(vault, ui_module):
     files = vault.vault_data.get("files", {})
     if not files:
         ui_module.console.print("[yellow]No files stored[/]")
         return
-    cat = ui_module.show_menu(["All"] + vault.vault_data["categories"], title="Filter by category")
-    rows = []; mapping = {}
-    for i,(fid,info) in enumerate(files.items(), start=1):
-        if cat != "All" and info["category"] != cat:
-            continue
-        rows.append([str(i), info["name"], utils.format_size(info["size"]), info["category"], utils.format_timestamp(info["created"])])
-        mapping[str(i)] = fid
-    ui_module.show_table("Stored Files", ["#","Name","Size","Category","Created"], rows)
-    sel = ui_module.ask("Enter number to manage (blank to go back)", default="")
-    if not sel:
-        return
-    fid = mapping.get(sel)
-    if not fid:
-        ui_module.console.print("[red]Invalid selection[/]")
-        return
-    _view_file_details(vault, fid, ui_module)
+    original, stored, on_disk = _locker_usage(files)
+    ui_module.console.print(f"[dim]{len(files)} files, {utils.format_size(original)}: {utils.format_size(stored)} after "
+                            f"compression, {utils.format_size(on_disk)} on disk after deduplication[/]")
+    cat, order = indexes.ask_view(vault, "files", ui_module)
+    fid = indexes.browse(vault, "files", cat, order, ui_module, "Stored Files",
+                         ["Name","Size","Stored","Category","Created"],
+                         lambda info: [info["name"], utils.format_size(info["size"]), _stored_label(info), info["category"],
+                                       utils.format_timestamp(info["created"])],
+                         "Enter number to manage")
+    if fid:
+        _view_file_details(vault, fid, ui_module)
 
 def _view_file_details(vault, fid, ui_module):
     info = vault.vault_data["files"][fid]
     ui_module.console.print(f"[bold]{info['name']}[/]")
     ui_module.console.print(f"Size: {utils.format_size(info['size'])}")
+    ui_module.console.print(f"Stored: {_stored_label(info)}")
+    if "chunks" in info:
+        others = set()
+        for other_id, other in vault.vault_data["files"].items():
+            if other_id != fid and "chunks" in other:
+                others.update(chunkstore.decode_manifest(other["chunks"]))
+        shared = sum(size for cid, size in _chunk_sizes(info).items() if cid in others)
+        ui_module.console.print(f"Chunks: {len(chunkstore.decode_manifest(info['chunks']))} "
+                                f"({utils.format_size(shared)} shared with other files)")
     ui_module.console.print(f"Category: {info['category']}")
     ui_module.console.print(f"Created: {utils.format_timestamp(info['created'])}")
     opts = ["Decrypt & Save", "Delete File", "Back"]
@@ -99,13 +145,29 @@ def _view_file_details(vault, fid, ui_module):
                 ui_module.console.print("[red]Cannot create output directory[/]")
                 return
         out_path = os.path.join(out_dir, info["name"])
-        enc_path = os.path.join(config.LOCKER_DIR, info["encrypted_name"])
         def progress_cb(p):
             try:
                 ui_module.console.print(f"[blue]Decrypting: {p}%[/]", end="\r")
             except Exception:
                 pass
-        ok = encryption.VaultEncryption.decrypt_file(enc_path, out_path, vault.master_password, progress_callback=progress_cb)
+        if "chunks" in info:
+            try:
+                store = chunkstore.ChunkStore.for_vault(vault)
+            except Exception:
+                ui_module.console.print("[red]Failed to decrypt[/]")
+                return
+            ok = store.get_file(info["chunks"], out_path, info["size"], progress_callback=progress_cb)
+        else:
+            enc_path = os.path.join(config.LOCKER_DIR, info["encrypted_name"])
+            try:
+                data_key = vault.file_key(info)
+            except Exception:
+                ui_module.console.print("[red]Failed to decrypt[/]")
+                return
+            ok = encryption.VaultEncryption.decrypt_file_with_key(enc_path, out_path, data_key, progress_callback=progress_cb)
+        if ok and "key" not in info and "chunks" not in info:
+            # older upload: keep its key wrapped so the KDF is not needed again
+            vault.upsert("files", fid, dict(info, key=vault.wrap_file_key(data_key, info["encrypted_name"])))
         if ok:
             ui_module.console.print(f"\n[green]Decrypted and saved to {out_path}[/]")
             if ui_module.confirm("Open file now?"):
@@ -124,12 +186,30 @@ def _view_file_details(vault, fid, ui_module):
             ui_module.console.print("[red]Failed to decrypt[/]")
     elif choice == "Delete File":
         if ui_module.confirm(f"Delete '{info['name']}'?"):
+            if "chunks" in info:
+                _delete_chunked(vault, fid, info, ui_module)
+                return
             enc_path = os.path.join(config.LOCKER_DIR, info["encrypted_name"])
             try:
                 if os.path.exists(enc_path):
                     os.remove(enc_path)
             except Exception:
                 pass
-            del vault.vault_data["files"][fid]
-            if vault.save():
+            if vault.delete("files", fid):
                 ui_module.console.print("[green]Deleted[/]")
+
+def _delete_chunked(vault, fid, info, ui_module):
+    """Drop the entry, then the chunks no other file uses; chunks are only removed once the delete is on disk."""
+    if not vault.delete("files", fid):
+        return
+    ui_module.console.print("[green]Deleted[/]")
+    if not vault.flush():
+        return
+    try:
+        store = chunkstore.ChunkStore.for_vault(vault)
+        remaining = (other["chunks"] for other in vault.vault_data.get("files", {}).values() if "chunks" in other)
+        removed, freed = store.release(info["chunks"], remaining)
+    except Exception:
+        return
+    if removed:
+        ui_module.console.print(f"[dim]{removed} unshared chunks removed ({utils.format_size(freed)} freed)[/]")
@@ -0,0 +1,219 @@
+# openvault/fulltext.py
+"""BM25 full-text index over Secure Notes.
+
+Titles and contents are tokenized like password search (title words count
+twice). The inverted index maps term -> {note id: term frequency}; queries
+are ranked with BM25, and "quoted phrases" must appear in order, which is
+verified by re-tokenizing only the candidate notes.
+
+The index is saved encrypted as the vault section INDEX_SECTION with every
+snapshot. Each indexed note carries a CRC of its text; on unlock, notes whose
+CRC differs (journaled edits, or saves made while the index was not loaded)
+are re-indexed, so the stored index never has to be trusted blindly or
+rebuilt in full.
+"""
+import re
+import math
+import zlib
+import base64
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+from rich.markup import escape
+from openvault.search import tokenize
+
+INDEX_SECTION = "notes_index"
+FORMAT_VERSION = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_BOOST = 2
+RESULT_LIMIT = 50
+SNIPPET_CHARS = 120
+_PHRASE_RE = re.compile(r'"([^"]*)"')
+_MAX_TF = 0xFFFF
+
+def _signature(note: Dict[str, Any]) -> int:
+    text = f"{note.get('title', '')}\0{note.get('content', '')}"
+    return zlib.crc32(text.encode("utf-8", "surrogatepass"))
+
+def _term_counts(note: Dict[str, Any]) -> Tuple[Dict[str, int], int]:
+    counts: Dict[str, int] = {}
+    title = tokenize(note.get("title", ""))
+    content = tokenize(note.get("content", ""))
+    for token in title:
+        counts[token] = counts.get(token, 0) + TITLE_BOOST
+    for token in content:
+        counts[token] = counts.get(token, 0) + 1
+    return counts, len(title) * TITLE_BOOST + len(content)
+
+def parse_query(query: str) -> Tuple[List[str], List[List[str]]]:
+    """Split a query into loose terms and "quoted phrases" (each a token list)."""
+    phrases = [tokenize(p) for p in _PHRASE_RE.findall(query)]
+    loose = tokenize(_PHRASE_RE.sub(" ", query))
+    return loose, [p for p in phrases if p]
+
+def _contains_phrase(tokens: List[str], phrase: List[str]) -> bool:
+    n = len(phrase)
+    first = phrase[0]
+    for i, token in enumerate(tokens):
+        if token == first and tokens[i:i + n] == phrase:
+            return True
+    return False
+
+def snippet(note: Dict[str, Any], terms: List[str], width: int = SNIPPET_CHARS) -> str:
+    """Rich-markup excerpt of the note content around the first query hit, hits highlighted."""
+    content = note.get("content", "").replace("\n", " ")
+    if not terms:
+        return escape(content[:width])
+    pattern = re.compile(r"\b(" + "|".join(map(re.escape, sorted(set(terms), key=len, reverse=True))) + r")\b",
+                         re.IGNORECASE)
+    first = pattern.search(content)
+    start = max(0, (first.start() if first else 0) - width // 3)
+    excerpt = content[start:start + width]
+    parts = []
+    last = 0
+    for m in pattern.finditer(excerpt):
+        parts.append(escape(excerpt[last:m.start()]))
+        parts.append(f"[bold yellow]{escape(m.group(0))}[/]")
+        last = m.end()
+    parts.append(escape(excerpt[last:]))
+    prefix = "..." if start else ""
+    suffix = "..." if start + width < len(content) else ""
+    return prefix + "".join(parts) + suffix
+
+class NotesIndex:
+    """Inverted index with BM25 ranking over vault_data["notes"], maintained through Vault.derived()."""
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._docs: Dict[str, Tuple[int, int]] = {}  # note id -> (length, signature)
+        self._terms: Dict[str, List[str]] = {}  # note id -> its distinct terms, for removal
+        self._total_len = 0
+        self._changed = False
+
+    @classmethod
+    def for_vault(cls, vault) -> "NotesIndex":
+        def build(v):
+            index = cls.from_dict(v.vault_data.get(INDEX_SECTION))
+            index.sync(v.vault_data.get("notes", {}))
+            return index
+        return vault.derived("notes-fulltext", build)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, note_id: str, note: Dict[str, Any]):
+        self.remove(note_id)
+        counts, length = _term_counts(note)
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[note_id] = min(tf, _MAX_TF)
+        self._terms[note_id] = list(counts)
+        self._docs[note_id] = (length, _signature(note))
+        self._total_len += length
+        self._changed = True
+
+    def remove(self, note_id: str):
+        doc = self._docs.pop(note_id, None)
+        if doc is None:
+            return
+        self._total_len -= doc[0]
+        for term in self._terms.pop(note_id, ()):
+            postings = self._postings[term]
+            postings.pop(note_id, None)
+            if not postings:
+                del self._postings[term]
+        self._changed = True
+
+    def update(self, section: str, note_id: str, note: Optional[Dict[str, Any]]):
+        if section != "notes":
+            return
+        if note is None:
+            self.remove(note_id)
+        else:
+            self.add(note_id, note)
+
+    def sync(self, notes: Dict[str, Dict[str, Any]]):
+        """Re-index notes whose text changed since the index was stored; drop deleted ones."""
+        for note_id in [n for n in self._docs if n not in notes]:
+            self.remove(note_id)
+        for note_id, note in notes.items():
+            doc = self._docs.get(note_id)
+            if doc is None or doc[1] != _signature(note):
+                self.add(note_id, note)
+
+    def _bm25(self, terms: List[str]) -> Dict[str, float]:
+        count = len(self._docs)
+        avg_len = self._total_len / count if count else 0.0
+        scores: Dict[str, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for note_id, tf in postings.items():
+                length = self._docs[note_id][0]
+                norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / (avg_len or 1)))
+                scores[note_id] = scores.get(note_id, 0.0) + idf * norm
+        return scores
+
+    def search(self, query: str, notes: Dict[str, Dict[str, Any]],
+               limit: int = RESULT_LIMIT) -> List[Tuple[str, float]]:
+        """Best (note id, score) pairs; every phrase must occur, loose terms rank (any may match)."""
+        loose, phrases = parse_query(query)
+        terms = list(dict.fromkeys(loose + [t for p in phrases for t in p]))
+        if not terms:
+            return []
+        scores = self._bm25(terms)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not phrases:
+            return ranked[:limit]
+        # candidates must hold every phrase term; they are re-tokenized best first until the page is full
+        needed = {t for p in phrases for t in p}
+        results = []
+        for note_id, score in ranked:
+            if not all(note_id in self._postings[t] for t in needed if t in self._postings):
+                continue
+            note = notes.get(note_id, {})
+            title, content = tokenize(note.get("title", "")), tokenize(note.get("content", ""))
+            if all(_contains_phrase(title, p) or _contains_phrase(content, p) for p in phrases):
+                results.append((note_id, score))
+                if len(results) >= limit:
+                    break
+        return results
+
+    def to_dict(self) -> Dict[str, Any]:
+        ids = list(self._docs)
+        number = {note_id: i for i, note_id in enumerate(ids)}
+        terms = {}
+        for term, postings in self._postings.items():
+            nums = [number[n] for n in postings]
+            packed = struct.pack(f"<{len(nums)}I{len(nums)}H", *nums, *postings.values())
+            terms[term] = base64.b64encode(packed).decode()
+        return {"version": FORMAT_VERSION, "ids": ids,
+                "lengths": [self._docs[n][0] for n in ids],
+                "signatures": [self._docs[n][1] for n in ids],
+                "terms": terms}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "NotesIndex":
+        index = cls()
+        if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+            return index
+        ids = data["ids"]
+        index._docs = dict(zip(ids, zip(data["lengths"], data["signatures"])))
+        index._total_len = sum(data["lengths"])
+        terms_of: Dict[str, List[str]] = {n: [] for n in ids}
+        for term, packed in data["terms"].items():
+            raw = base64.b64decode(packed)
+            count = len(raw) // 6
+            values = struct.unpack(f"<{count}I{count}H", raw)
+            postings = dict(zip(map(ids.__getitem__, values[:count]), values[count:]))
+            index._postings[term] = postings
+            for note_id in postings:
+                terms_of[note_id].append(term)
+        index._terms = terms_of
+        return index
+
+    def persist(self, vault_data):
+        """Store the index in its vault section if it changed; called by Vault.save()."""
+        if self._changed:
+            vault_data[INDEX_SECTION] = self.to_dict()
+            self._changed = False
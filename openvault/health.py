@@ -0,0 +1,86 @@
+# openvault/health.py
+"""Vault health report for password entries, computed in a single pass.
+
+Passwords are bucketed by a keyed BLAKE2b digest (key derived from the
+session key), so the report never holds or compares plaintext and the
+digests mean nothing outside this unlocked session. A second digest of a
+normalized form (case folded, common character substitutions undone,
+trailing digits and symbols stripped) groups near-duplicates such as
+"Summer2023!" and "summer2024". Old entries are found by comparing ISO
+"modified" strings against a cutoff, without parsing timestamps.
+"""
+import string
+import hashlib
+import datetime
+from typing import Any, Dict, List, Optional
+from openvault import config
+
+DIGEST_SIZE = 16
+CHECKED_FIELDS = ("name", "username", "password", "url")
+# substitutions are undone on the UTF-8 bytes: bytes.translate is ~10x faster than str.translate
+_LEET = bytes.maketrans(b"013457@$!", b"oieastasi")
+_TRAILER = string.digits + string.punctuation
+
+def _normal_form(password: str) -> bytes:
+    text = "".join(password.casefold().split())
+    stripped = text.rstrip(_TRAILER)
+    # a password that is nothing but digits/symbols keeps its own form
+    if not stripped:
+        return text.encode("utf-8", "surrogatepass")
+    return stripped.encode("utf-8", "surrogatepass").translate(_LEET)
+
+def normalize(password: str) -> str:
+    """Form shared by trivially varied passwords: "P@ssw0rd2024!" -> "password"."""
+    return _normal_form(password).decode("utf-8", "surrogatepass")
+
+def build_report(entries: Dict[str, Dict[str, Any]], key: bytes,
+                 max_age_days: Optional[int] = None, now: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+    """Reuse groups, near-duplicate groups, old entries and empty fields, in O(n).
+
+    Groups are lists of entry ids, largest group first. key must be secret
+    (see report_for_vault).
+    """
+    days = config.PASSWORD_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    cutoff = ((now or datetime.datetime.now()) - datetime.timedelta(days=days)).isoformat()
+    exact: Dict[bytes, List[str]] = {}
+    similar: Dict[bytes, Dict[bytes, List[str]]] = {}
+    old: List[str] = []
+    empty: Dict[str, List[str]] = {field: [] for field in CHECKED_FIELDS}
+    blake2b = hashlib.blake2b
+    for eid, entry in entries.items():
+        for field in CHECKED_FIELDS:
+            value = entry.get(field)
+            if not value or (isinstance(value, str) and value.isspace()):
+                empty[field].append(eid)
+        modified = entry.get("modified") or entry.get("created") or ""
+        if modified < cutoff:
+            old.append(eid)
+        password = entry.get("password")
+        if not password:
+            continue
+        digest = blake2b(password.encode("utf-8", "surrogatepass"), key=key, digest_size=DIGEST_SIZE).digest()
+        variants = exact.get(digest)
+        if variants is not None:
+            # same password as an earlier entry: its normalized form is already bucketed
+            variants.append(eid)
+            continue
+        exact[digest] = [eid]
+        form = blake2b(_normal_form(password), key=key, digest_size=DIGEST_SIZE).digest()
+        similar.setdefault(form, {})[digest] = exact[digest]
+    reused = [ids for ids in exact.values() if len(ids) > 1]
+    # near-duplicates: one normalized form shared by more than one distinct password
+    near = [[eid for ids in variants.values() for eid in ids] for variants in similar.values() if len(variants) > 1]
+    reused.sort(key=len, reverse=True)
+    near.sort(key=len, reverse=True)
+    return {
+        "total": len(entries),
+        "reused": reused,
+        "similar": near,
+        "old": old,
+        "empty": {field: ids for field, ids in empty.items() if ids},
+        "max_age_days": days,
+    }
+
+def report_for_vault(vault, max_age_days: Optional[int] = None) -> Dict[str, Any]:
+    return build_report(vault.vault_data.get("passwords", {}), vault.session_key.subkey("password-health"),
+                        max_age_days)
@@ -0,0 +1,131 @@
+# openvault/indexes.py
+"""Secondary indexes for the entry sections: category filtering and sorted listings.
+
+For every sort order a section supports, the index keeps one sorted list of
+(key, id) for the whole section and one per category, so a filtered, sorted
+view reads only the ids it shows. Indexes are built on first use after
+unlock and updated by Vault.upsert/delete (see Vault.derived).
+"""
+import bisect
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SORT_NAME = "name"
+SORT_MODIFIED = "modified"
+SORT_CREATED = "created"
+SORT_SIZE = "size"
+# orders that list the highest key first
+DESCENDING = {SORT_MODIFIED, SORT_CREATED, SORT_SIZE}
+SORT_LABELS = {SORT_NAME: "Name", SORT_MODIFIED: "Recently modified",
+               SORT_CREATED: "Recently created", SORT_SIZE: "Largest first"}
+_ALL = object()  # bucket holding every entry of the section
+
+def _text(field: str) -> Callable[[Dict[str, Any]], str]:
+    return lambda entry: str(entry.get(field) or "").casefold()
+
+def _number(field: str) -> Callable[[Dict[str, Any]], int]:
+    return lambda entry: entry.get(field) or 0
+
+_COMMON = {SORT_MODIFIED: _text("modified"), SORT_CREATED: _text("created")}
+SECTION_ORDERS: Dict[str, Dict[str, Callable[[Dict[str, Any]], Any]]] = {
+    "passwords": dict(name=_text("name"), **_COMMON),
+    "twofa": dict(name=_text("name"), **_COMMON),
+    "notes": dict(name=_text("title"), **_COMMON),
+    "files": dict(name=_text("name"), size=_number("size"), **_COMMON),
+}
+
+class SectionIndex:
+    """Category and sort-order indexes over one section of vault_data."""
+    def __init__(self, section: str, entries: Dict[str, Dict[str, Any]]):
+        self.section = section
+        self._keys = SECTION_ORDERS[section]
+        # order -> category (or _ALL) -> sorted [(key, id)]
+        self._orders: Dict[str, Dict[Any, List[Tuple[Any, str]]]] = {}
+        self._entries: Dict[str, Tuple[Optional[str], Dict[str, Any]]] = {}
+        for order, key in self._keys.items():
+            by_category: Dict[Any, List[Tuple[Any, str]]] = {_ALL: []}
+            for eid, entry in entries.items():
+                item = (key(entry), eid)
+                by_category[_ALL].append(item)
+                by_category.setdefault(entry.get("category"), []).append(item)
+            for items in by_category.values():
+                items.sort()
+            self._orders[order] = by_category
+        for eid, entry in entries.items():
+            self._entries[eid] = (entry.get("category"), {order: key(entry) for order, key in self._keys.items()})
+
+    @classmethod
+    def for_vault(cls, vault, section: str) -> "SectionIndex":
+        return vault.derived(f"index:{section}", lambda v: cls(section, v.vault_data.get(section, {})))
+
+    @property
+    def orders(self) -> List[str]:
+        return list(self._keys)
+
+    def _remove(self, entry_id: str):
+        previous = self._entries.pop(entry_id, None)
+        if previous is None:
+            return
+        category, keys = previous
+        for order, key in keys.items():
+            for bucket in (_ALL, category):
+                items = self._orders[order][bucket]
+                pos = bisect.bisect_left(items, (key, entry_id))
+                if pos < len(items) and items[pos] == (key, entry_id):
+                    del items[pos]
+                if bucket is not _ALL and not items:
+                    del self._orders[order][bucket]
+
+    def update(self, section: str, entry_id: str, entry: Optional[Dict[str, Any]]):
+        if section != self.section:
+            return
+        self._remove(entry_id)
+        if entry is None:
+            return
+        category = entry.get("category")
+        keys = {order: key(entry) for order, key in self._keys.items()}
+        self._entries[entry_id] = (category, keys)
+        for order, key in keys.items():
+            bisect.insort(self._orders[order][_ALL], (key, entry_id))
+            bisect.insort(self._orders[order].setdefault(category, []), (key, entry_id))
+
+    def count(self, category: Optional[str] = None) -> int:
+        return len(self._orders[SORT_NAME].get(_ALL if category is None else category, ()))
+
+    def ids(self, category: Optional[str] = None, order: str = SORT_NAME,
+            offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        """Entry ids in the given category (None for all), sorted; only the requested slice is read."""
+        items = self._orders[order].get(_ALL if category is None else category, [])
+        end = len(items) if limit is None else min(len(items), offset + limit)
+        if order in DESCENDING:
+            picked = items[len(items) - end:len(items) - offset][::-1] if end > offset else []
+        else:
+            picked = items[offset:end]
+        return [eid for _, eid in picked]
+
+def browse(vault, section: str, category: Optional[str], order: str, ui_module, title: str,
+           columns: List[str], row: Callable[[Dict[str, Any]], List[Any]],
+           prompt: str = "Enter number to select") -> Optional[str]:
+    """Paged table of a filtered, sorted section; returns the picked entry id or None.
+
+    Rows are formatted only for the page on screen, straight from the index.
+    """
+    index = SectionIndex.for_vault(vault, section)
+    total = index.count(category)
+    if not total:
+        ui_module.console.print("[yellow]No entries for that category[/]")
+        return None
+    entries = vault.vault_data[section]
+    fetch = lambda offset, limit: [row(entries[eid]) for eid in index.ids(category, order, offset, limit)]
+    pos = ui_module.show_paged_table(title, columns, fetch, total, prompt)
+    if pos is None:
+        return None
+    picked = index.ids(category, order, pos, 1)
+    return picked[0] if picked else None
+
+def ask_view(vault, section: str, ui_module) -> Tuple[Optional[str], str]:
+    """Prompt for category filter and sort order; returns (category or None, order)."""
+    cat = ui_module.show_menu(["All"] + vault.vault_data["categories"], title="Filter by category")
+    orders = list(SECTION_ORDERS[section])
+    label = ui_module.show_menu([SORT_LABELS[o] for o in orders], title="Sort by")
+    order = next(o for o in orders if SORT_LABELS[o] == label)
+    return (None if cat == "All" else cat), order
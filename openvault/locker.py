@@ -0,0 +1,251 @@
+# openvault/locker.py
+"""Chunked, authenticated file format used by the Secure File Locker.
+
+Layout::
+
+    header  = MAGIC | version (1) | salt (16) | chunk size (4) | nonce prefix (7)
+    chunk*  = ciphertext length (4) | AES-256-GCM(plaintext chunk) + tag
+
+Version 2 files are encrypted with a random per-file data key that the vault
+stores wrapped in the file's metadata (the salt field is zero). Version 1
+files derived their key from the master password and the salt; they still
+decrypt, with either the password or that derived key.
+
+Each chunk uses nonce = prefix | counter (4) | final flag (1) and the header as
+associated data, so chunks cannot be reordered, dropped, truncated or moved
+between files. Chunks are sealed and opened on a thread pool (AES-GCM releases
+the GIL) with a bounded window of in-flight chunks, written back in order.
+"""
+import io
+import os
+import base64
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Tuple
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from openvault.encryption import VaultEncryption, SALT_SIZE
+
+MAGIC = b"OVLK"
+VERSION = 2
+PASSWORD_VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+NONCE_PREFIX_SIZE = 7
+TAG_SIZE = 16
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 8)
+_HEADER = struct.Struct(f">4sB{SALT_SIZE}sI{NONCE_PREFIX_SIZE}s")
+_LEN = struct.Struct(">I")
+_NO_SALT = bytes(SALT_SIZE)
+
+class LockerFormatError(Exception):
+    pass
+
+def is_locker_file(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def new_data_key() -> bytes:
+    return AESGCM.generate_key(bit_length=256)
+
+def _file_key(password: str, salt: bytes) -> bytes:
+    key, _ = VaultEncryption.generate_key(password, salt)
+    return base64.urlsafe_b64decode(key)
+
+def _nonce(prefix: bytes, index: int, final: bool) -> bytes:
+    return prefix + struct.pack(">IB", index, 1 if final else 0)
+
+def _ordered_map(fn: Callable, items: Iterable[Tuple], workers: int) -> Iterator:
+    """Apply fn to each item tuple, yielding results in input order.
+
+    At most 2 * workers items are in flight, so memory stays bounded by the
+    window rather than the file size.
+    """
+    if workers <= 1:
+        for item in items:
+            yield fn(*item)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, *item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _read_plain_chunks(src: BinaryIO, chunk_size: int) -> Iterator[Tuple[int, bool, bytes]]:
+    index = 0
+    chunk = src.read(chunk_size)
+    while True:
+        # read one chunk ahead so the last one can be flagged as final
+        nxt = src.read(chunk_size) if chunk else b""
+        final = not nxt
+        yield index, final, chunk
+        if final:
+            return
+        chunk = nxt
+        index += 1
+
+def _read_sealed_chunks(src: BinaryIO, chunk_size: int) -> Iterator[Tuple[int, bool, bytes]]:
+    index = 0
+    raw_len = src.read(_LEN.size)
+    while True:
+        if len(raw_len) != _LEN.size:
+            raise LockerFormatError("Missing final chunk")
+        (length,) = _LEN.unpack(raw_len)
+        if length > chunk_size + TAG_SIZE:
+            raise LockerFormatError("Chunk too large")
+        sealed = src.read(length)
+        if len(sealed) != length:
+            raise LockerFormatError("Truncated chunk")
+        # a chunk only authenticates under the final flag it was written with
+        raw_len = src.read(_LEN.size)
+        final = not raw_len
+        yield index, final, sealed
+        if final:
+            return
+        index += 1
+
+def encrypt_stream(src: BinaryIO, dst: BinaryIO, key: bytes, salt: Optional[bytes],
+                   total_size: int = 0, chunk_size: int = CHUNK_SIZE,
+                   progress_callback: Optional[Callable[[int], None]] = None,
+                   workers: int = DEFAULT_WORKERS):
+    """Without a salt the key is a data key and a version 2 header is written."""
+    prefix = os.urandom(NONCE_PREFIX_SIZE)
+    version = VERSION if salt is None else PASSWORD_VERSION
+    header = _HEADER.pack(MAGIC, version, salt or _NO_SALT, chunk_size, prefix)
+    aead = AESGCM(key)
+    dst.write(header)
+
+    def seal(index, final, chunk):
+        return len(chunk), aead.encrypt(_nonce(prefix, index, final), chunk, header)
+
+    done = 0
+    for plain_len, sealed in _ordered_map(seal, _read_plain_chunks(src, chunk_size), workers):
+        dst.write(_LEN.pack(len(sealed)))
+        dst.write(sealed)
+        done += plain_len
+        if progress_callback and total_size:
+            progress_callback(min(100, int(done / total_size * 100)))
+
+def read_header(src: BinaryIO):
+    raw = src.read(_HEADER.size)
+    if len(raw) != _HEADER.size:
+        raise LockerFormatError("Truncated header")
+    magic, version, salt, chunk_size, prefix = _HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise LockerFormatError("Not a locker file")
+    if version not in (PASSWORD_VERSION, VERSION):
+        raise LockerFormatError(f"Unsupported locker version {version}")
+    return raw, version, salt, chunk_size, prefix
+
+def decrypt_stream(src: BinaryIO, dst: BinaryIO, key: bytes, header: bytes, chunk_size: int,
+                   prefix: bytes, total_size: int = 0,
+                   progress_callback: Optional[Callable[[int], None]] = None,
+                   workers: int = DEFAULT_WORKERS):
+    aead = AESGCM(key)
+
+    def open_chunk(index, final, sealed):
+        return len(sealed), aead.decrypt(_nonce(prefix, index, final), sealed, header)
+
+    done = 0
+    for sealed_len, plain in _ordered_map(open_chunk, _read_sealed_chunks(src, chunk_size), workers):
+        dst.write(plain)
+        done += _LEN.size + sealed_len
+        if progress_callback and total_size:
+            progress_callback(min(100, int(done / total_size * 100)))
+
+def _encrypt(input_path: str, out_path: str, key: bytes, salt: Optional[bytes],
+             progress_callback: Optional[Callable[[int], None]], workers: int) -> bool:
+    try:
+        with open(input_path, "rb") as src, open(out_path, "wb") as dst:
+            encrypt_stream(src, dst, key, salt, os.path.getsize(input_path),
+                           progress_callback=progress_callback, workers=workers)
+        if progress_callback:
+            progress_callback(100)
+        return True
+    except Exception:
+        _remove_quietly(out_path)
+        return False
+
+def _decrypt(encrypted_path: str, out_path: str, key_for: Callable[[int, bytes], bytes],
+             progress_callback: Optional[Callable[[int], None]], workers: int) -> bool:
+    try:
+        total = os.path.getsize(encrypted_path)
+        with open(encrypted_path, "rb") as src:
+            header, version, salt, chunk_size, prefix = read_header(src)
+            key = key_for(version, salt)
+            with open(out_path, "wb") as dst:
+                decrypt_stream(src, dst, key, header, chunk_size, prefix, total, progress_callback, workers)
+        if progress_callback:
+            progress_callback(100)
+        return True
+    except Exception:
+        # never leave a partially authenticated plaintext behind
+        _remove_quietly(out_path)
+        return False
+
+def encrypt_file_with_key(input_path: str, out_path: str, data_key: bytes,
+                          progress_callback: Optional[Callable[[int], None]] = None,
+                          workers: int = DEFAULT_WORKERS) -> bool:
+    return _encrypt(input_path, out_path, data_key, None, progress_callback, workers)
+
+def decrypt_file_with_key(encrypted_path: str, out_path: str, data_key: bytes,
+                          progress_callback: Optional[Callable[[int], None]] = None,
+                          workers: int = DEFAULT_WORKERS) -> bool:
+    return _decrypt(encrypted_path, out_path, lambda version, salt: data_key, progress_callback, workers)
+
+def encrypt_file(input_path: str, out_path: str, password: str,
+                 progress_callback: Optional[Callable[[int], None]] = None,
+                 workers: int = DEFAULT_WORKERS) -> bool:
+    """Version 1 file keyed by the password; the vault itself uses encrypt_file_with_key."""
+    salt = os.urandom(SALT_SIZE)
+    return _encrypt(input_path, out_path, _file_key(password, salt), salt, progress_callback, workers)
+
+def decrypt_file(encrypted_path: str, out_path: str, password: str,
+                 progress_callback: Optional[Callable[[int], None]] = None,
+                 workers: int = DEFAULT_WORKERS) -> bool:
+    def key_for(version, salt):
+        if version != PASSWORD_VERSION:
+            raise LockerFormatError("File is encrypted with a data key")
+        return _file_key(password, salt)
+    return _decrypt(encrypted_path, out_path, key_for, progress_callback, workers)
+
+def password_file_key(encrypted_path: str, password: str) -> bytes:
+    """The key a version 1 file was encrypted with, so it can be wrapped like a data key."""
+    with open(encrypted_path, "rb") as src:
+        _, version, salt, _, _ = read_header(src)
+    if version != PASSWORD_VERSION:
+        raise LockerFormatError("File is encrypted with a data key")
+    return _file_key(password, salt)
+
+def encrypt_bytes(data: bytes, out_path: str, password: str, workers: int = DEFAULT_WORKERS) -> bool:
+    """Version 1 file holding in-memory data, so no plaintext copy is ever written to disk."""
+    salt = os.urandom(SALT_SIZE)
+    try:
+        with open(out_path, "wb") as dst:
+            encrypt_stream(io.BytesIO(data), dst, _file_key(password, salt), salt, len(data), workers=workers)
+        return True
+    except Exception:
+        _remove_quietly(out_path)
+        return False
+
+def decrypt_bytes(encrypted_path: str, password: str, workers: int = DEFAULT_WORKERS) -> bytes:
+    """Plaintext of a version 1 file, in memory; raises on a wrong password or a damaged file."""
+    with open(encrypted_path, "rb") as src:
+        header, version, salt, chunk_size, prefix = read_header(src)
+        if version != PASSWORD_VERSION:
+            raise LockerFormatError("File is encrypted with a data key")
+        out = io.BytesIO()
+        decrypt_stream(src, out, _file_key(password, salt), header, chunk_size, prefix, workers=workers)
+    return out.getvalue()
+
+def _remove_quietly(path: str):
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+    except OSError:
+        pass
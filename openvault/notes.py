@@ -1,7 +1,7 @@
 # openvault/notes.py
 import uuid
 import datetime
-from openvault import ui, utils
+from openvault import ui, utils, indexes, fulltext
 
 def add_note(vault, ui_module):
     title = ui_module.ask("Enter note title")
@@ -19,11 +19,11 @@ def add_note(vault, ui_module):
     category = ui_module.show_menu(vault.vault_data["categories"], title="Select category")
     nid = str(uuid.uuid4())
     ts = datetime.datetime.now().isoformat()
-    vault.vault_data["notes"][nid] = {
+    note = {
         "title": title, "content": content, "category": category,
         "created": ts, "modified": ts
     }
-    if vault.save_vault():
+    if vault.upsert("notes", nid, note):
         ui_module.console.print(f"[green]Note '{title}' saved[/]")
 
 def view_notes(vault, ui_module):
@@ -31,27 +31,36 @@ def view_notes(vault, ui_module):
     if not notes:
         ui_module.console.print("[yellow]No notes stored[/]")
         return
-    cat = ui_module.show_menu(["All"] + vault.vault_data["categories"], title="Filter by category")
-    rows = []
-    mapping = {}
-    for i,(nid, note) in enumerate(notes.items(), start=1):
-        if cat != "All" and note["category"] != cat:
-            continue
+    cat, order = indexes.ask_view(vault, "notes", ui_module)
+    def row(note):
         preview = note["content"].replace("\n"," ")[:40] + ("..." if len(note["content"])>40 else "")
-        rows.append([str(i), note["title"], preview, note["category"], utils.format_timestamp(note["modified"])])
-        mapping[str(i)] = nid
-    if not rows:
-        ui_module.console.print("[yellow]No notes for that category[/]")
+        return [note["title"], preview, note["category"], utils.format_timestamp(note["modified"])]
+    nid = indexes.browse(vault, "notes", cat, order, ui_module, "Notes",
+                         ["Title","Preview","Category","Modified"], row, "Enter number to view")
+    if nid:
+        view_note_details(vault, nid, ui_module)
+
+def search_notes(vault, ui_module):
+    """Full-text search over titles and contents; use "quotes" for phrases."""
+    notes = vault.vault_data.get("notes", {})
+    if not notes:
+        ui_module.console.print("[yellow]No notes stored[/]")
         return
-    ui_module.show_table("Notes", ["#","Title","Preview","Category","Modified"], rows)
-    sel = ui_module.ask("Enter number to view (blank to go back)", default="")
-    if not sel:
+    query = ui_module.ask('Search notes (use "quotes" for phrases, blank to go back)', default="")
+    if not query.strip():
         return
-    nid = mapping.get(sel)
-    if not nid:
-        ui_module.console.print("[red]Invalid selection[/]")
+    results = fulltext.NotesIndex.for_vault(vault).search(query, notes)
+    if not results:
+        ui_module.console.print(f"[yellow]No notes match '{query}'[/]")
         return
-    view_note_details(vault, nid, ui_module)
+    loose, phrases = fulltext.parse_query(query)
+    terms = loose + [t for p in phrases for t in p]
+    rows = ([note["title"], fulltext.snippet(note, terms), note["category"]]
+            for note in (notes[nid] for nid, _ in results))
+    pos = ui_module.show_paged_table("Matching Notes", ["Title", "Excerpt", "Category"], rows,
+                                     len(results), "Enter number to view")
+    if pos is not None:
+        view_note_details(vault, results[pos][0], ui_module)
 
 def view_note_details(vault, note_id, ui_module):
     note = vault.vault_data["notes"][note_id]
@@ -63,8 +72,7 @@ def view_note_details(vault, note_id, ui_module):
         edit_note(vault, note_id, ui_module)
     elif choice == "Delete Note":
         if ui_module.confirm(f"Delete '{note['title']}'?"):
-            del vault.vault_data["notes"][note_id]
-            if vault.save_vault():
+            if vault.delete("notes", note_id):
                 ui_module.console.print("[green]Deleted[/]")
 
 def edit_note(vault, note_id, ui_module):
@@ -84,6 +92,6 @@ def edit_note(vault, note_id, ui_module):
     category = note['category']
     if ui_module.confirm("Change category?"):
         category = ui_module.show_menu(vault.vault_data["categories"], title="Select category")
-    note.update({"title": title, "content": content, "category": category, "modified": datetime.datetime.now().isoformat()})
-    if vault.save_vault():
+    updated = dict(note, title=title, content=content, category=category, modified=datetime.datetime.now().isoformat())
+    if vault.upsert("notes", note_id, updated):
         ui_module.console.print("[green]Note updated[/]")
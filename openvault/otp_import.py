@@ -0,0 +1,262 @@
+# openvault/otp_import.py
+"""Bulk 2FA import from authenticator exports, URI lists and folders of QR images.
+
+Accepted sources, one path at a time:
+
+* text files with one otpauth:// or otpauth-migration:// URI per line,
+* Google Authenticator "Transfer accounts" exports: otpauth-migration://
+  URIs whose data parameter is a base64 protobuf MigrationPayload,
+* QR code images, or folders of them (each may hold either kind of URI),
+* encrypted archives written by 2FA "Bulk Export" (qrexport), password asked.
+
+Migration payloads are decoded with a small protobuf reader (no protobuf
+dependency) and turned into otpauth:// URIs, so every account goes through
+twofa._parse_otpauth_uri. Accounts already in the vault (same issuer,
+account and secret) are skipped, and everything is written with one save.
+"""
+import os
+import uuid
+import base64
+import datetime
+import urllib.parse
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from openvault import twofa, totp, qrdecode, qrexport, locker
+
+MIGRATION_SCHEME = "otpauth-migration://"
+QR_TABLE_ROWS = 20  # per-image decode timings are listed for folders up to this size
+# MigrationPayload.OtpParameters enums
+_ALGORITHMS = {0: "SHA1", 1: "SHA1", 2: "SHA256", 3: "SHA512"}
+_DIGITS = {0: 6, 1: 6, 2: 8}
+# OtpParameters field -> value type its wire type must decode to (secret, name, issuer, algorithm, digits, type)
+_PARAM_TYPES = {1: bytes, 2: bytes, 3: bytes, 4: int, 5: int, 6: int}
+_TYPE_HOTP = 1
+
+def _varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        if pos >= len(buf):
+            raise ValueError("Truncated protobuf varint")
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+        if shift > 63:
+            raise ValueError("Protobuf varint too long")
+
+_FIXED_SIZES = {1: 8, 5: 4}  # wire type -> bytes of a fixed64 / fixed32 field
+
+def _fields(buf: bytes) -> Iterator[Tuple[int, Any]]:
+    """(field number, value) pairs of a protobuf message: ints for varints, bytes for length-delimited."""
+    pos = 0
+    while pos < len(buf):
+        tag, pos = _varint(buf, pos)
+        number, wire = tag >> 3, tag & 7
+        if wire == 0:
+            value, pos = _varint(buf, pos)
+        else:
+            if wire == 2:
+                size, pos = _varint(buf, pos)
+            elif wire in _FIXED_SIZES:
+                size = _FIXED_SIZES[wire]
+            else:
+                raise ValueError(f"Unsupported protobuf wire type {wire}")
+            if pos + size > len(buf):
+                raise ValueError("Truncated protobuf field")
+            value, pos = buf[pos:pos + size], pos + size
+        yield number, value
+
+def migration_uris(uri: str) -> Tuple[List[str], List[str]]:
+    """otpauth:// URIs for the TOTP accounts of one otpauth-migration:// URI, and reasons for skipped ones."""
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(uri).query)
+    if "data" not in query:
+        raise ValueError("Migration URI has no data parameter")
+    data = query["data"][0].replace(" ", "+")
+    payload = base64.b64decode(data + "=" * (-len(data) % 4))
+    uris, skipped = [], []
+    for number, value in _fields(payload):
+        if number != 1:
+            # version / batch_size / batch_index / batch_id
+            continue
+        if not isinstance(value, bytes):
+            raise ValueError("Malformed migration payload: otp_parameters is not a message")
+        params: Dict[int, Any] = dict(_fields(value))
+        for field, kind in _PARAM_TYPES.items():
+            if field in params and not isinstance(params[field], kind):
+                raise ValueError(f"Malformed migration payload: unexpected wire type for field {field}")
+        name = params.get(2, b"").decode("utf-8", "replace")
+        issuer = params.get(3, b"").decode("utf-8", "replace")
+        if params.get(6) == _TYPE_HOTP:
+            skipped.append(f"{issuer or name}: counter-based (HOTP) codes are not supported")
+            continue
+        if params.get(4, 0) not in _ALGORITHMS:
+            skipped.append(f"{issuer or name}: unsupported algorithm")
+            continue
+        if params.get(5, 0) not in _DIGITS:
+            skipped.append(f"{issuer or name}: unsupported number of digits")
+            continue
+        secret = base64.b32encode(params.get(1, b"")).decode().rstrip("=")
+        query_string = urllib.parse.urlencode({"secret": secret, "issuer": issuer,
+                                               "algorithm": _ALGORITHMS[params.get(4, 0)],
+                                               "digits": _DIGITS[params.get(5, 0)], "period": 30})
+        # keep "Issuer:account" labels splittable by _parse_otpauth_uri
+        uris.append(f"otpauth://totp/{urllib.parse.quote(name, safe=':@')}?{query_string}")
+    return uris, skipped
+
+def _uris_in_text(text: str) -> List[str]:
+    return [line.strip() for line in text.splitlines()
+            if line.strip().startswith(("otpauth://", MIGRATION_SCHEME))]
+
+def collect_uris(path: str, ask_password: Optional[Callable[[], str]] = None
+                 ) -> Tuple[List[str], List[str], List[qrdecode.DecodeResult]]:
+    """URIs found at path (text file, export archive, image or folder of images), problems met,
+    and per-image QR results.
+
+    Images are decoded in parallel (qrdecode.decode_many); every QR code in
+    an image counts. Export archives are decrypted in memory with the
+    password returned by ask_password.
+    """
+    uris: List[str] = []
+    problems: List[str] = []
+    if os.path.isfile(path) and locker.is_locker_file(path):
+        if ask_password is None:
+            raise ValueError("Encrypted archive needs a password")
+        return qrexport.read_archive(path, ask_password()), problems, []
+    images = qrdecode.image_paths(path)
+    if not images and not os.path.isdir(path):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            uris.extend(_uris_in_text(f.read()))
+        return uris, problems, []
+    results = qrdecode.decode_many(images)
+    for result in results:
+        name = os.path.basename(result.path)
+        found = [uri for payload in result.payloads for uri in _uris_in_text(payload)]
+        if found:
+            uris.extend(found)
+        elif result.error:
+            problems.append(f"{name}: {result.error}")
+        elif result.payloads:
+            problems.append(f"{name}: QR code does not hold an otpauth URI")
+        else:
+            problems.append(f"{name}: no QR code found")
+    return uris, problems, results
+
+def _identity(issuer: str, account: str, secret: str) -> Tuple[str, str, str]:
+    return issuer.strip().casefold(), account.strip().casefold(), "".join(secret.split()).upper().rstrip("=")
+
+def build_entries(uris: List[str], existing: Dict[str, Dict[str, Any]],
+                  category: Optional[str]) -> Tuple[Dict[str, Dict[str, Any]], int, List[str]]:
+    """New 2FA entries for the URIs, the number of duplicates dropped, and reasons for skipped URIs.
+
+    Migration URIs are expanded first. An account is a duplicate when an
+    existing (or earlier imported) entry has the same issuer, account and secret.
+    """
+    seen = {_identity(e.get("issuer", ""), e.get("account", ""), e.get("secret", "")) for e in existing.values()}
+    entries: Dict[str, Dict[str, Any]] = {}
+    skipped: List[str] = []
+    duplicates = 0
+    expanded: List[str] = []
+    for uri in uris:
+        if uri.startswith(MIGRATION_SCHEME):
+            try:
+                found, dropped = migration_uris(uri)
+            except ValueError as e:
+                skipped.append(f"Migration export: {e}")
+                continue
+            expanded.extend(found)
+            skipped.extend(dropped)
+        else:
+            expanded.append(uri)
+    ts = datetime.datetime.now().isoformat()
+    for uri in expanded:
+        parsed = twofa._parse_otpauth_uri(uri)
+        issuer = parsed.get("issuer") or parsed.get("issuer_from_label") or ""
+        account = parsed.get("account") or ""
+        secret = parsed.get("secret") or ""
+        label = issuer or account or uri[:40]
+        if urllib.parse.urlsplit(uri).netloc.lower() != "totp":
+            skipped.append(f"{label}: only time-based (TOTP) codes are supported")
+            continue
+        try:
+            totp.decode_secret(secret)
+        except ValueError as e:
+            skipped.append(f"{label}: {e}")
+            continue
+        algo = parsed.get("algorithm") or "SHA1"
+        if algo not in totp.DIGESTS:
+            skipped.append(f"{label}: unsupported algorithm {algo}")
+            continue
+        identity = _identity(issuer, account, secret)
+        if identity in seen:
+            duplicates += 1
+            continue
+        seen.add(identity)
+        entries[str(uuid.uuid4())] = {
+            "name": f"{issuer or account or '2FA'}",
+            "secret": secret,
+            "issuer": issuer,
+            "account": account,
+            "algo": algo,
+            "digits": parsed.get("digits") or 6,
+            "period": parsed.get("period") or 30,
+            "category": category,
+            "created": ts,
+            "modified": ts
+        }
+    return entries, duplicates, skipped
+
+def bulk_import(vault, ui_module):
+    """Import many 2FA accounts from files, folders or pasted URIs and save once."""
+    ui_module.console.print("[bold]Bulk 2FA import[/]")
+    ui_module.console.print("[dim]Accepts otpauth:// / otpauth-migration:// URI lists, export archives, QR images and folders of QR images[/]")
+    uris: List[str] = []
+    problems: List[str] = []
+    while True:
+        source = ui_module.ask("Path to a file or folder, or a URI (blank when done)", default="").strip()
+        if not source:
+            break
+        if source.startswith(("otpauth://", MIGRATION_SCHEME)):
+            uris.append(source)
+            continue
+        path = os.path.expanduser(source.strip('"'))
+        if not os.path.exists(path):
+            ui_module.console.print("[red]Path not found[/]")
+            continue
+        try:
+            found, issues, decoded = collect_uris(path, lambda: ui_module.ask_password("Archive password"))
+        except Exception as e:
+            ui_module.console.print(f"[red]Failed to read {path}: {e}[/]")
+            continue
+        if decoded:
+            slowest = max(decoded, key=lambda r: r.seconds)
+            ui_module.console.print(f"[dim]{len(decoded)} images, {sum(r.seconds for r in decoded):.1f} s decode time "
+                                    f"(slowest {os.path.basename(slowest.path)}: {slowest.seconds * 1000:.0f} ms)[/]")
+            if len(decoded) <= QR_TABLE_ROWS:
+                ui_module.show_table("QR images", ["Image", "QR codes", "Time (ms)"],
+                                     [[os.path.basename(r.path), len(r.payloads), f"{r.seconds * 1000:.0f}"] for r in decoded])
+        uris.extend(found)
+        problems.extend(issues)
+        ui_module.console.print(f"[green]{len(found)} URIs found[/]" + (f" [yellow]({len(issues)} problems)[/]" if issues else ""))
+    if not uris:
+        ui_module.console.print("[yellow]Nothing to import[/]")
+        return
+    category = ui_module.show_menu(vault.vault_data["categories"], title="Category for imported entries")
+    entries, duplicates, skipped = build_entries(uris, vault.vault_data.get("twofa", {}), category)
+    problems.extend(skipped)
+    for problem in problems:
+        ui_module.console.print(f"[yellow]Skipped[/] {problem}")
+    if duplicates:
+        ui_module.console.print(f"[dim]{duplicates} accounts already in the vault[/]")
+    if not entries:
+        ui_module.console.print("[yellow]No new accounts to import[/]")
+        return
+    rows = ([e["issuer"] or "-", e["account"] or "-", e["algo"], str(e["digits"]), str(e["period"])] for e in entries.values())
+    ui_module.show_paged_table("Accounts to import", ["Issuer", "Account", "Algorithm", "Digits", "Period"], rows,
+                               len(entries), "Press Enter to continue")
+    if not ui_module.confirm(f"Import {len(entries)} accounts?"):
+        return
+    if vault.upsert_many("twofa", entries):
+        ui_module.console.print(f"[green]{len(entries)} 2FA accounts imported[/]")
+    else:
+        ui_module.console.print("[red]Failed to save the imported accounts[/]")
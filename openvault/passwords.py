@@ -1,53 +1,179 @@
 # openvault/passwords.py
+import time
 import uuid
 import datetime
 import pyperclip
 from typing import Dict
-from openvault import utils
+from openvault import utils, search, indexes, health, breach, strength
 from openvault import ui
 
+def show_strength(password: str, ui_module):
+    score, bits, feedback = strength.estimate(password)
+    ui_module.console.print(f"Strength: {strength.describe(score)} [dim]({bits:.0f} bits)[/]")
+    for line in feedback:
+        ui_module.console.print(f"  [dim]- {line}[/]")
+
 def add_password(vault, ui_module):
     name = ui_module.ask("Enter a name for this password")
     username = ui_module.ask("Enter username/email")
     password = ui_module.ask("Enter password")
+    show_strength(password, ui_module)
     url = ui_module.ask("Enter website URL (optional)", default="")
     notes = ui_module.ask("Enter notes (optional)", default="")
     category = ui_module.show_menu(vault.vault_data["categories"], title="Select category")
     entry_id = str(uuid.uuid4())
     ts = datetime.datetime.now().isoformat()
-    vault.vault_data["passwords"][entry_id] = {
+    entry = {
         "name": name, "username": username, "password": password,
         "url": url, "notes": notes, "category": category,
         "created": ts, "modified": ts
     }
-    if vault.save_vault():
+    if vault.upsert("passwords", entry_id, entry):
         ui_module.console.print(f"[green]Password '{name}' added[/]")
 
 def view_passwords(vault, ui_module):
     if not vault.vault_data["passwords"]:
         ui_module.console.print("[yellow]No passwords saved yet[/]")
         return
-    # Allow category filter
-    cat = ui_module.show_menu(["All"] + vault.vault_data["categories"], title="Filter by category")
-    rows = []
-    mapping = {}
-    for i, (eid, entry) in enumerate(vault.vault_data["passwords"].items(), start=1):
-        if cat != "All" and entry["category"] != cat:
-            continue
-        rows.append([str(i), entry["name"], entry["username"], entry["category"]])
-        mapping[str(i)] = eid
-    if not rows:
-        ui_module.console.print("[yellow]No entries for that category[/]")
+    # Allow category filter and sort order
+    cat, order = indexes.ask_view(vault, "passwords", ui_module)
+    eid = indexes.browse(vault, "passwords", cat, order, ui_module, "Saved Passwords",
+                         ["Name", "Username", "Category"],
+                         lambda entry: [entry["name"], entry["username"], entry["category"]],
+                         "Enter number to view details")
+    if eid:
+        view_password_details(vault, eid, ui_module)
+
+def search_passwords(vault, ui_module):
+    """Ranked search over name, username, URL host and notes (prefix, substring and typo matches)."""
+    query = ui_module.ask("Search for (blank to go back)", default="")
+    if not query.strip():
         return
-    ui_module.show_table("Saved Passwords", ["#", "Name", "Username", "Category"], rows)
-    sel = ui_module.ask("Enter number to view details (or blank to go back)", default="")
-    if not sel:
+    start = time.perf_counter()
+    results = search.PasswordIndex.for_vault(vault).search(query)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if not results:
+        ui_module.console.print(f"[yellow]No matches for '{query}'[/]")
         return
-    eid = mapping.get(sel)
-    if not eid:
-        ui_module.console.print("[red]Invalid selection[/]")
+    entries = vault.vault_data["passwords"]
+    rows = ([entry["name"], entry["username"], search.url_host(entry.get("url", "")) or "-", entry["category"]]
+            for entry in (entries[eid] for eid, _ in results))
+    ui_module.console.print(f"[dim]{len(results)} best matches in {elapsed_ms:.1f} ms[/]")
+    pos = ui_module.show_paged_table("Search Results", ["Name", "Username", "Site", "Category"], rows,
+                                     len(results), "Enter number to view details")
+    if pos is not None:
+        view_password_details(vault, results[pos][0], ui_module)
+
+def _pick_entry(vault, ui_module, title: str, ids):
+    entries = vault.vault_data["passwords"]
+    rows = ([entries[eid]["name"], entries[eid]["username"], entries[eid]["category"],
+             utils.format_timestamp(entries[eid]["modified"])] for eid in ids)
+    pos = ui_module.show_paged_table(title, ["Name", "Username", "Category", "Modified"], rows,
+                                     len(ids), "Enter number to view details")
+    if pos is not None:
+        view_password_details(vault, ids[pos], ui_module)
+
+def health_report(vault, ui_module):
+    """Reused and near-duplicate passwords, old entries and empty fields."""
+    start = time.perf_counter()
+    report = health.report_for_vault(vault)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    reused = sum(len(g) for g in report["reused"])
+    similar = sum(len(g) for g in report["similar"])
+    ui_module.console.print(f"[bold]Vault health[/] [dim]({report['total']} passwords checked in {elapsed_ms:.0f} ms)[/]")
+    ui_module.console.print(f"Reused passwords: [{'red' if reused else 'green'}]{reused} entries in {len(report['reused'])} groups[/]")
+    ui_module.console.print(f"Near-duplicates: [{'yellow' if similar else 'green'}]{similar} entries in {len(report['similar'])} groups[/]")
+    ui_module.console.print(f"Not changed in {report['max_age_days']} days: [{'yellow' if report['old'] else 'green'}]{len(report['old'])}[/]")
+    for field, ids in report["empty"].items():
+        ui_module.console.print(f"Empty {field}: [yellow]{len(ids)}[/]")
+    while True:
+        opts = []
+        if report["reused"]:
+            opts.append("Reused Groups")
+        if report["similar"]:
+            opts.append("Near-duplicate Groups")
+        if report["old"]:
+            opts.append("Old Entries")
+        opts += [f"Empty {field}" for field in report["empty"]]
+        opts.append("Back")
+        choice = ui_module.show_menu(opts, title="Health details")
+        if choice == "Back":
+            return
+        if choice in ("Reused Groups", "Near-duplicate Groups"):
+            groups = report["reused" if choice == "Reused Groups" else "similar"]
+            entries = vault.vault_data["passwords"]
+            rows = ([str(len(g)), ", ".join(entries[eid]["name"] for eid in g[:5]) + (" ..." if len(g) > 5 else "")]
+                    for g in groups)
+            pos = ui_module.show_paged_table(choice, ["Entries", "Names"], rows, len(groups), "Enter number to open group")
+            if pos is not None:
+                _pick_entry(vault, ui_module, f"Group {pos + 1}", groups[pos])
+        elif choice == "Old Entries":
+            _pick_entry(vault, ui_module, "Old Entries", report["old"])
+        else:
+            field = choice[len("Empty "):]
+            _pick_entry(vault, ui_module, choice, report["empty"][field])
+
+def _breach_status(vault, ui_module, quiet: bool = False):
+    """BreachStatus with the configured corpus open, or None if none is configured/usable."""
+    path = utils.load_config().get("breach_corpus_path")
+    if not path:
+        if not quiet:
+            ui_module.console.print("[yellow]No breach corpus configured (Settings > Breach corpus file)[/]")
+        return None
+    status = breach.BreachStatus.for_vault(vault)
+    try:
+        status.use(path)
+    except Exception as e:
+        if not quiet:
+            ui_module.console.print(f"[red]Cannot open breach corpus:[/] {e}")
+        return None
+    return status
+
+def breach_report(vault, ui_module):
+    """Screen every password against the offline breach corpus in one batch."""
+    start = time.perf_counter()
+    status = _breach_status(vault, ui_module)
+    if status is None:
+        return
+    entries = vault.vault_data["passwords"]
+    found = status.screen(entries)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    ui_module.console.print(f"[bold]Breach check[/] [dim]({len(entries)} passwords checked in {elapsed_ms:.0f} ms)[/]")
+    if not found:
+        ui_module.console.print("[green]No passwords found in the breach corpus[/]")
+        return
+    ui_module.console.print(f"Breached passwords: [red]{len(found)} entries[/]")
+    ids = sorted(found, key=lambda eid: (-found[eid], entries[eid]["name"].casefold()))
+    rows = ([entries[eid]["name"], entries[eid]["username"], entries[eid]["category"], f"{found[eid]:,}"]
+            for eid in ids)
+    pos = ui_module.show_paged_table("Breached Passwords", ["Name", "Username", "Category", "Seen"], rows,
+                                     len(ids), "Enter number to view details")
+    if pos is not None:
+        view_password_details(vault, ids[pos], ui_module)
+
+def strength_audit(vault, ui_module):
+    """Weak passwords across the vault, from the background audit started at unlock."""
+    audit = strength.StrengthAudit.for_vault(vault)
+    audit.start()
+    if audit.running:
+        ui_module.console.print(f"[dim]Scoring in the background: {audit.done}/{audit.total} entries checked, "
+                                f"results below are partial[/]")
+    counts = audit.counts()
+    ui_module.console.print(f"[bold]Password strength[/] [dim]({sum(counts)} passwords scored)[/]")
+    for score in reversed(range(len(counts))):
+        ui_module.console.print(f"{strength.describe(score)}: {counts[score]}")
+    weak = audit.weak()
+    if not weak:
+        ui_module.console.print("[green]No weak passwords found[/]")
         return
-    view_password_details(vault, eid, ui_module)
+    entries = vault.vault_data["passwords"]
+    weak = [item for item in weak if item[0] in entries]
+    rows = ([entries[eid]["name"], entries[eid]["username"], strength.describe(score), f"{bits:.0f}"]
+            for eid, score, bits in weak)
+    pos = ui_module.show_paged_table("Weak Passwords", ["Name", "Username", "Strength", "Bits"], rows,
+                                     len(weak), "Enter number to view details")
+    if pos is not None:
+        view_password_details(vault, weak[pos][0], ui_module)
 
 def view_password_details(vault, entry_id, ui_module):
     entry = vault.vault_data["passwords"][entry_id]
@@ -58,6 +184,10 @@ def view_password_details(vault, entry_id, ui_module):
     ui_module.console.print(f"Notes: {entry['notes'] or '-'}")
     ui_module.console.print(f"Created: {utils.format_timestamp(entry['created'])}")
     ui_module.console.print(f"Modified: {utils.format_timestamp(entry['modified'])}")
+    status = _breach_status(vault, ui_module, quiet=True)
+    seen = status.check(entry_id, entry) if status else 0
+    if seen:
+        ui_module.console.print(f"[bold red]This password appears in the breach corpus ({seen:,} times) - change it[/]")
     opts = ["Show Password", "Copy Password", "Copy Username", "Edit Entry", "Delete Entry", "Back"]
     choice = ui_module.show_menu(opts, title="Password options")
     if choice == "Show Password":
@@ -82,6 +212,7 @@ def edit_password(vault, entry_id, ui_module):
     username = ui_module.ask("Username/Email", default=entry['username'])
     if ui_module.confirm("Change password?"):
         password = ui_module.ask("New password")
+        show_strength(password, ui_module)
     else:
         password = entry['password']
     url = ui_module.ask("URL", default=entry['url'])
@@ -90,7 +221,8 @@ def edit_password(vault, entry_id, ui_module):
         category = ui_module.show_menu(vault.vault_data["categories"], title="Select category")
     else:
         category = entry['category']
-    entry.update({
+    updated = dict(entry)
+    updated.update({
         "name": name,
         "username": username,
         "password": password,
@@ -99,12 +231,11 @@ def edit_password(vault, entry_id, ui_module):
         "category": category,
         "modified": datetime.datetime.now().isoformat()
     })
-    if vault.save_vault():
+    if vault.upsert("passwords", entry_id, updated):
         ui_module.console.print("[green]Entry updated[/]")
 
 def delete_password(vault, entry_id, ui_module):
     entry = vault.vault_data["passwords"][entry_id]
     if ui_module.confirm(f"Delete '{entry['name']}'?"):
-        del vault.vault_data["passwords"][entry_id]
-        if vault.save_vault():
+        if vault.delete("passwords", entry_id):
             ui_module.console.print("[green]Deleted[/]")
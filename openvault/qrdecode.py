@@ -0,0 +1,168 @@
+# openvault/qrdecode.py
+"""QR code decoding for single images and batches, with a preprocessing fallback chain.
+
+Each image is tried as-is first, then as a series of variants until one
+decodes: grayscale, downscaled copies for large photos (and an upscaled one
+for tiny crops), and an Otsu-thresholded black/white version of each. pyzbar
+is used when available, OpenCV's QR detector otherwise or in addition. Every
+QR code found in the image is returned, not just the first.
+
+decode_many() spreads a batch of images over a process pool (decoding is
+CPU-bound and the zbar/OpenCV bindings do not all release the GIL) and keeps
+per-image timings.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, NamedTuple, Optional
+
+try:
+    from PIL import Image, ImageOps
+    from pyzbar.pyzbar import decode as pyzbar_decode, ZBarSymbol
+    _HAS_PYZBAR = True
+except Exception:
+    _HAS_PYZBAR = False
+
+try:
+    import cv2
+    _HAS_OPENCV = True
+except Exception:
+    _HAS_OPENCV = False
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp", ".tif", ".tiff"}
+# longest side of the downscaled variants; phone photos decode faster and often better smaller
+SCALE_SIDES = (1600, 1000, 600)
+MIN_SIDE = 300  # smaller images are also tried upscaled 2x
+
+class DecodeResult(NamedTuple):
+    path: str
+    payloads: List[str]
+    seconds: float
+    error: Optional[str] = None
+
+def available() -> bool:
+    return _HAS_PYZBAR or _HAS_OPENCV
+
+def image_paths(path: str) -> List[str]:
+    """Image files in a folder (sorted), or the path itself if it is an image."""
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path)
+                      if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS)
+    return [path] if os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS else []
+
+def _unique(payloads: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(payloads))
+
+def _otsu_level(histogram: List[int]) -> int:
+    """Gray level that best separates dark and light pixels (Otsu's method)."""
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    below = weighted_below = 0
+    best_level, best_spread = 127, -1.0
+    for level, count in enumerate(histogram):
+        below += count
+        if not below or below == total:
+            continue
+        weighted_below += level * count
+        mean_below = weighted_below / below
+        mean_above = (weighted_total - weighted_below) / (total - below)
+        spread = below * (total - below) * (mean_below - mean_above) ** 2
+        if spread > best_spread:
+            best_level, best_spread = level, spread
+    return best_level
+
+def _pil_variants(img) -> Iterable:
+    """The image, then grayscale / rescaled / thresholded variants, cheapest first."""
+    yield img
+    gray = ImageOps.autocontrast(img.convert("L"))
+    scaled = [gray]
+    longest = max(gray.size)
+    for side in SCALE_SIDES:
+        if longest > side * 1.25:
+            ratio = side / longest
+            scaled.append(gray.resize((max(1, int(gray.width * ratio)), max(1, int(gray.height * ratio))),
+                                      Image.LANCZOS))
+    if longest < MIN_SIDE:
+        scaled.append(gray.resize((gray.width * 2, gray.height * 2), Image.NEAREST))
+    for variant in scaled:
+        yield variant
+        level = _otsu_level(variant.histogram())
+        yield variant.point(lambda v, t=level: 255 if v > t else 0)
+
+def _decode_pyzbar(path: str) -> List[str]:
+    with Image.open(path) as img:
+        img.load()
+        for variant in _pil_variants(img):
+            found = pyzbar_decode(variant, symbols=[ZBarSymbol.QRCODE])
+            if found:
+                return _unique(d.data.decode("utf-8", "replace") for d in found)
+    return []
+
+def _cv2_variants(gray) -> Iterable:
+    yield gray
+    longest = max(gray.shape[:2])
+    scaled = [gray]
+    for side in SCALE_SIDES:
+        if longest > side * 1.25:
+            ratio = side / longest
+            scaled.append(cv2.resize(gray, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA))
+    if longest < MIN_SIDE:
+        scaled.append(cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_NEAREST))
+    for variant in scaled:
+        if variant is not gray:
+            yield variant
+        yield cv2.threshold(cv2.GaussianBlur(variant, (3, 3), 0), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+        yield cv2.adaptiveThreshold(variant, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 5)
+
+def _decode_opencv(path: str) -> List[str]:
+    gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError("Unreadable image")
+    detector = cv2.QRCodeDetector()
+    for variant in _cv2_variants(gray):
+        ok, texts, _, _ = detector.detectAndDecodeMulti(variant)
+        found = [t for t in texts if t] if ok else []
+        if not found and _HAS_PYZBAR:
+            found = [d.data.decode("utf-8", "replace") for d in pyzbar_decode(variant, symbols=[ZBarSymbol.QRCODE])]
+        if found:
+            return _unique(found)
+    return []
+
+def decode_image(path: str) -> DecodeResult:
+    """Every QR payload in one image; tries pyzbar, then OpenCV, each over the variant chain."""
+    start = time.perf_counter()
+    payloads: List[str] = []
+    errors = []
+    for decoder, enabled in ((_decode_pyzbar, _HAS_PYZBAR), (_decode_opencv, _HAS_OPENCV)):
+        if not enabled:
+            continue
+        try:
+            payloads = decoder(path)
+        except Exception as e:
+            errors.append(str(e))
+            continue
+        if payloads:
+            break
+    if not available():
+        errors.append("QR decoding requires pyzbar (with Pillow) or opencv-python")
+    error = None if payloads or not errors else "; ".join(errors)
+    return DecodeResult(path, payloads, time.perf_counter() - start, error)
+
+def decode_many(paths: List[str], workers: Optional[int] = None,
+                progress: Optional[Callable[[DecodeResult], None]] = None) -> List[DecodeResult]:
+    """decode_image() over many images in a process pool; results come back in input order."""
+    if len(paths) < 2 or workers == 1 or not available():
+        results = []
+        for path in paths:
+            results.append(decode_image(path))
+            if progress:
+                progress(results[-1])
+        return results
+    workers = min(len(paths), workers or os.cpu_count() or 1)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(decode_image, paths):
+            results.append(result)
+            if progress:
+                progress(result)
+    return results
@@ -0,0 +1,263 @@
+# openvault/qrexport.py
+"""Bulk QR export of 2FA entries as one contact sheet or one encrypted archive.
+
+Every entry is rendered from its full provisioning URI (totp.provisioning_uri,
+algorithm included). Rendered PNGs are cached by QrCache, keyed by a keyed
+BLAKE2b hash of the URI, so an entry is only re-rendered when its content
+changes: in memory while the vault is unlocked, and on disk under
+QR_CACHE_DIR/<vault>/ encrypted with AES-GCM (key derived from the session
+key), so nothing readable is left behind. Misses are rendered in a process
+pool when there are enough of them.
+
+Outputs:
+
+* a multi-page PDF or TIFF contact sheet (COLUMNS x ROWS codes per page,
+  captioned with issuer and account) - plaintext, the user is asked first;
+* an encrypted archive: a zip of one PNG per entry plus uris.txt, built in
+  memory and written as a password-protected locker file (locker.encrypt_bytes).
+  "Bulk Import" reads it back.
+"""
+import io
+import os
+import re
+import time
+import hashlib
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from openvault import config, indexes, locker, totp
+
+try:
+    import qrcode
+    from PIL import Image, ImageDraw, ImageFont
+    _HAS_RENDERER = True
+except Exception:
+    _HAS_RENDERER = False
+
+BOX_SIZE = 8  # pixels per QR module
+BORDER = 4  # quiet zone, in modules
+RENDER_VERSION = 1  # part of the cache key; bump when rendering changes
+POOL_MIN = 16  # fewer misses than this are rendered in-process
+PAGE_SIZE = (1240, 1754)  # A4 at 150 dpi
+PAGE_DPI = 150
+COLUMNS, ROWS = 3, 4
+MARGIN = 60
+CAPTION_HEIGHT = 40
+ARCHIVE_MANIFEST = "uris.txt"
+EXPORT_FORMATS = ["Encrypted archive (.enc)", "PDF contact sheet", "TIFF contact sheet", "Back"]
+_NONCE_SIZE = 12
+
+def available() -> bool:
+    return _HAS_RENDERER
+
+def render_png(uri: str) -> bytes:
+    """PNG of one QR code (top-level so the process pool can pickle it)."""
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=BOX_SIZE, border=BORDER)
+    qr.add_data(uri)
+    qr.make(fit=True)
+    out = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+class QrCache:
+    """Rendered QR PNGs by keyed URI hash, kept through Vault.derived()."""
+    def __init__(self, vault):
+        self._dir = os.path.join(config.QR_CACHE_DIR, vault.vault_name or "default")
+        self._name_key = vault.session_key.subkey("qr-cache-name")
+        self._aead = AESGCM(vault.session_key.subkey("qr-cache"))
+        self._memory: Dict[str, bytes] = {}
+
+    @classmethod
+    def for_vault(cls, vault) -> "QrCache":
+        return vault.derived("qr-render", cls)
+
+    def name(self, uri: str) -> str:
+        data = f"{RENDER_VERSION}:{BOX_SIZE}:{BORDER}:{uri}".encode()
+        return hashlib.blake2b(data, key=self._name_key, digest_size=16).hexdigest()
+
+    def _read(self, name: str) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self._dir, name), "rb") as f:
+                blob = f.read()
+            return self._aead.decrypt(blob[:_NONCE_SIZE], blob[_NONCE_SIZE:], name.encode())
+        except Exception:
+            return None
+
+    def _write(self, name: str, png: bytes):
+        nonce = os.urandom(_NONCE_SIZE)
+        path = os.path.join(self._dir, name)
+        try:
+            os.makedirs(self._dir, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(nonce + self._aead.encrypt(nonce, png, name.encode()))
+            os.replace(path + ".tmp", path)
+        except OSError:
+            # the cache is an optimisation only
+            locker._remove_quietly(path + ".tmp")
+
+    def render_many(self, uris: List[str], workers: Optional[int] = None) -> Tuple[List[bytes], Dict[str, int]]:
+        """PNGs in input order, and how many came from memory, disk or were rendered."""
+        names = [self.name(uri) for uri in uris]
+        stats = {"memory": 0, "disk": 0, "rendered": 0}
+        missing: Dict[str, str] = {}
+        for name, uri in zip(names, uris):
+            if name in self._memory:
+                stats["memory"] += 1
+                continue
+            png = self._read(name)
+            if png is not None:
+                self._memory[name] = png
+                stats["disk"] += 1
+            elif name not in missing:
+                missing[name] = uri
+        if missing:
+            todo = list(missing.items())
+            workers = min(len(todo), workers or os.cpu_count() or 1)
+            if len(todo) < POOL_MIN or workers == 1:
+                rendered = [render_png(uri) for _, uri in todo]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    rendered = list(pool.map(render_png, [uri for _, uri in todo], chunksize=8))
+            for (name, _), png in zip(todo, rendered):
+                self._memory[name] = png
+                self._write(name, png)
+            stats["rendered"] = len(todo)
+        return [self._memory[name] for name in names], stats
+
+    def prune(self, uris: List[str]) -> int:
+        """Delete cached files not belonging to any of uris (every current entry); returns how many."""
+        keep = {self.name(uri) for uri in uris}
+        removed = 0
+        try:
+            names = os.listdir(self._dir)
+        except OSError:
+            return 0
+        for name in names:
+            if name not in keep:
+                locker._remove_quietly(os.path.join(self._dir, name))
+                self._memory.pop(name, None)
+                removed += 1
+        return removed
+
+    def close(self):
+        self._memory.clear()
+
+def caption(entry: Dict) -> Tuple[str, str]:
+    issuer = entry.get("issuer") or entry.get("name") or "2FA"
+    return issuer, entry.get("account") or ""
+
+def _fit(draw, text: str, font, width: int) -> str:
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "...", font=font) > width:
+        text = text[:-1]
+    return text + "..."
+
+def contact_sheet(items: List[Tuple[Tuple[str, str], bytes]]) -> List:
+    """Black and white pages (PIL images) laying out (caption lines, PNG) items COLUMNS x ROWS per page."""
+    font = ImageFont.load_default()
+    cell_w = (PAGE_SIZE[0] - 2 * MARGIN) // COLUMNS
+    cell_h = (PAGE_SIZE[1] - 2 * MARGIN) // ROWS
+    side = min(cell_w, cell_h - CAPTION_HEIGHT) - 10
+    per_page = COLUMNS * ROWS
+    pages = []
+    for start in range(0, len(items), per_page):
+        page = Image.new("1", PAGE_SIZE, 1)
+        draw = ImageDraw.Draw(page)
+        for i, ((title, account), png) in enumerate(items[start:start + per_page]):
+            left = MARGIN + (i % COLUMNS) * cell_w
+            top = MARGIN + (i // COLUMNS) * cell_h
+            with Image.open(io.BytesIO(png)) as img:
+                code = img.convert("1").resize((side, side), Image.NEAREST)
+            page.paste(code, (left + (cell_w - side) // 2, top))
+            for line, text in enumerate((title, account)):
+                text = _fit(draw, text, font, cell_w - 10)
+                x = left + (cell_w - draw.textlength(text, font=font)) / 2
+                draw.text((x, top + side + 4 + line * 16), text, fill=0, font=font)
+        pages.append(page)
+    return pages
+
+def write_sheet(pages: List, path: str, fmt: str):
+    if fmt == "PDF":
+        pages[0].save(path, "PDF", save_all=True, append_images=pages[1:], resolution=PAGE_DPI)
+    else:
+        pages[0].save(path, "TIFF", save_all=True, append_images=pages[1:], compression="group4",
+                      dpi=(PAGE_DPI, PAGE_DPI))
+
+def safe_name(text: str) -> str:
+    """File-name-safe form of an entry label, for exported PNGs."""
+    return re.sub(r"[^\w.@-]+", "_", text).strip("_")[:60] or "2fa"
+
+def build_archive(items: List[Tuple[Tuple[str, str], str, bytes]]) -> bytes:
+    """Zip (in memory) of one PNG per (caption, uri, png) item plus a manifest of the URIs."""
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as zf:
+        for n, ((title, account), _, png) in enumerate(items, start=1):
+            label = f"{title}_{account}" if account else title
+            zf.writestr(f"{n:04d}_{safe_name(label)}.png", png)
+        zf.writestr(ARCHIVE_MANIFEST, "".join(uri + "\n" for _, uri, _ in items))
+    return out.getvalue()
+
+def read_archive(path: str, password: str) -> List[str]:
+    """URIs listed in an encrypted export archive; raises on a wrong password."""
+    try:
+        data = locker.decrypt_bytes(path, password)
+    except InvalidTag:
+        raise ValueError("Wrong password or damaged archive")
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return zf.read(ARCHIVE_MANIFEST).decode("utf-8").split()
+
+def bulk_export(vault, ui_module):
+    """Export every (or one category's) 2FA entry as QR codes in one file."""
+    if not available():
+        ui_module.console.print("[red]QR export requires qrcode and Pillow[/]")
+        return
+    entries = vault.vault_data.get("twofa", {})
+    if not entries:
+        ui_module.console.print("[yellow]No 2FA entries[/]")
+        return
+    category, order = indexes.ask_view(vault, "twofa", ui_module)
+    ids = indexes.SectionIndex.for_vault(vault, "twofa").ids(category, order)
+    if not ids:
+        ui_module.console.print("[yellow]No 2FA entries in this category[/]")
+        return
+    fmt = ui_module.show_menu(EXPORT_FORMATS, title="Export as")
+    if fmt == "Back":
+        return
+    archive = fmt.startswith("Encrypted")
+    if not archive and not ui_module.confirm("Contact sheets are NOT encrypted and reveal every secret. Continue?"):
+        return
+    ext = ".enc" if archive else (".pdf" if fmt.startswith("PDF") else ".tiff")
+    default = os.path.join(os.path.expanduser("~"), f"openvault-2fa{ext}")
+    out_path = os.path.expanduser(ui_module.ask("Save to", default=default).strip().strip('"'))
+    if archive:
+        password = ui_module.ask_password("Archive password")
+        if not password or password != ui_module.ask_password("Repeat archive password"):
+            ui_module.console.print("[red]Passwords are empty or do not match[/]")
+            return
+    start = time.perf_counter()
+    uris = [totp.provisioning_uri(entries[eid]) for eid in ids]
+    cache = QrCache.for_vault(vault)
+    try:
+        pngs, stats = cache.render_many(uris)
+    except Exception as e:
+        ui_module.console.print(f"[red]Failed to render QR codes: {e}[/]")
+        return
+    rendered = time.perf_counter() - start
+    captions = [caption(entries[eid]) for eid in ids]
+    try:
+        if archive:
+            if not locker.encrypt_bytes(build_archive(list(zip(captions, uris, pngs))), out_path, password):
+                raise OSError("could not write the archive")
+        else:
+            write_sheet(contact_sheet(list(zip(captions, pngs))), out_path, "PDF" if ext == ".pdf" else "TIFF")
+    except Exception as e:
+        ui_module.console.print(f"[red]Export failed: {e}[/]")
+        return
+    cache.prune([totp.provisioning_uri(e) for e in entries.values()])
+    cached = stats["memory"] + stats["disk"]
+    ui_module.console.print(f"[green]{len(ids)} QR codes exported to {out_path}[/]")
+    ui_module.console.print(f"[dim]{cached} cached, {stats['rendered']} rendered in {rendered:.2f} s; "
+                            f"total {time.perf_counter() - start:.2f} s[/]")
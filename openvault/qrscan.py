@@ -0,0 +1,261 @@
+# openvault/qrscan.py
+"""Producer/consumer QR scanner for webcams, video files and image sequences.
+
+A capture thread reads frames as fast as the source delivers them and only
+keeps the newest one (LatestFrame), so a slow decode never makes frames back
+up. A small pool of decoder threads takes the newest frame, at most
+max_fps times a second, converts it to grayscale, crops the central region
+where a QR code is usually held and downscales it before decoding; the full
+(downscaled) frame is tried when the crop finds nothing. The preview window
+runs on the calling thread and shows every captured frame.
+
+Sources other than a live camera (a video file, a folder or list of images)
+are read in order without dropping frames, which makes decoding repeatable
+offline (see benchmarks/qrscan_replay.py).
+"""
+import os
+import time
+import threading
+from typing import Any, Callable, List, Optional, Tuple, Union
+from openvault import qrdecode
+
+try:
+    import cv2
+    _HAS_OPENCV = True
+except Exception:
+    _HAS_OPENCV = False
+
+try:
+    from pyzbar.pyzbar import decode as pyzbar_decode, ZBarSymbol
+    _HAS_PYZBAR = True
+except Exception:
+    _HAS_PYZBAR = False
+
+DECODE_WORKERS = 2
+MAX_DECODE_FPS = 12  # decode attempts per second across all workers
+MAX_SIDE = 800  # frames are downscaled to this longest side before decoding
+ROI_FRACTION = 0.6  # side of the central crop tried first, as a fraction of the shorter frame side
+PREVIEW_TITLE = "OpenVault - QR Scanner (press q to stop)"
+
+def available() -> bool:
+    """Scanning needs OpenCV for capture; decoding uses pyzbar when present, else OpenCV's detector."""
+    return _HAS_OPENCV
+
+class LatestFrame:
+    """Single-slot frame buffer: put() replaces the frame, take() waits for one newer than the caller's last."""
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self.taken = 0  # newest sequence number claimed by a decoder
+        self.closed = False
+
+    def put(self, frame) -> int:
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self._cond.notify_all()
+            return self._seq
+
+    def take(self, after: int, timeout: float, claim: bool = True) -> Tuple[int, Any]:
+        """(sequence number, frame) newer than after, or (after, None) on timeout/close.
+
+        A claimed frame goes to one decoder only; claim=False peeks (the
+        preview) without handing the frame out.
+        """
+        with self._cond:
+            newest = lambda: max(after, self.taken) if claim else after
+            self._cond.wait_for(lambda: self._seq > newest() or self.closed, timeout)
+            if self._seq <= newest():
+                return after, None
+            if claim:
+                self.taken = self._seq
+                self._cond.notify_all()
+            return self._seq, self._frame
+
+    def wait_taken(self, seq: int, timeout: float):
+        """Block until frame seq has been claimed (offline sources hand out every frame)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.taken >= seq or self.closed, timeout)
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+class ImageSequence:
+    """cv2.VideoCapture-like reader over image files, in order."""
+    def __init__(self, paths: List[str]):
+        self._paths = list(paths)
+        self._pos = 0
+
+    def isOpened(self) -> bool:
+        return True
+
+    def read(self) -> Tuple[bool, Any]:
+        while self._pos < len(self._paths):
+            frame = cv2.imread(self._paths[self._pos])
+            self._pos += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def release(self):
+        self._pos = len(self._paths)
+
+def open_source(source: Union[int, str, List[str], Any]) -> Tuple[Any, bool]:
+    """(capture object, is_live) for a camera index, video file, image folder or list of image paths.
+
+    Any object with read() and release() is used as is (not live).
+    """
+    if hasattr(source, "read"):
+        return source, False
+    if isinstance(source, int):
+        return cv2.VideoCapture(source), True
+    if isinstance(source, (list, tuple)):
+        return ImageSequence(source), False
+    if os.path.isdir(source):
+        return ImageSequence(qrdecode.image_paths(source)), False
+    return cv2.VideoCapture(source), False
+
+def prepare(frame, roi: bool) -> Any:
+    """Grayscale copy of the frame, optionally cropped to the central region, at most MAX_SIDE wide/high."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    height, width = gray.shape[:2]
+    if roi:
+        side = int(min(height, width) * ROI_FRACTION)
+        top, left = (height - side) // 2, (width - side) // 2
+        gray = gray[top:top + side, left:left + side]
+        height = width = side
+    longest = max(height, width)
+    if longest > MAX_SIDE:
+        ratio = MAX_SIDE / longest
+        gray = cv2.resize(gray, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA)
+    return gray
+
+_local = threading.local()
+
+def decode_frame(frame) -> List[str]:
+    """QR payloads in one BGR or grayscale frame: central crop first, then the whole frame."""
+    for roi in (True, False):
+        gray = prepare(frame, roi)
+        if _HAS_PYZBAR:
+            found = [d.data.decode("utf-8", "replace") for d in pyzbar_decode(gray, symbols=[ZBarSymbol.QRCODE])]
+        else:
+            # QRCodeDetector objects are not thread-safe: one per decoder thread
+            detector = getattr(_local, "detector", None)
+            if detector is None:
+                detector = _local.detector = cv2.QRCodeDetector()
+            ok, texts, _, _ = detector.detectAndDecodeMulti(gray)
+            found = [t for t in texts if t] if ok else []
+        if found:
+            return list(dict.fromkeys(found))
+    return []
+
+class QrScanner:
+    """Scan a source until a QR code decodes, the timeout passes, or the user quits the preview."""
+    def __init__(self, source: Union[int, str, List[str], Any] = 0, timeout: Optional[float] = 20,
+                 workers: int = DECODE_WORKERS, max_fps: float = MAX_DECODE_FPS, preview: bool = True,
+                 decoder: Callable[[Any], List[str]] = decode_frame):
+        self.source = source
+        self.timeout = timeout
+        self.workers = workers
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.preview = preview
+        self.decoder = decoder
+        self.payloads: List[str] = []
+        self.frames_read = 0
+        self.frames_decoded = 0
+        self._slot = LatestFrame()
+        self._stop = threading.Event()
+        self._rate_lock = threading.Lock()
+        self._result_lock = threading.Lock()
+        self._next_decode = 0.0
+
+    def _capture(self, capture, live: bool):
+        try:
+            while not self._stop.is_set():
+                ok, frame = capture.read()
+                if not ok:
+                    if not live:
+                        break
+                    # camera hiccup: retry shortly instead of spinning
+                    self._stop.wait(0.01)
+                    continue
+                self.frames_read += 1
+                seq = self._slot.put(frame)
+                if not live:
+                    # offline sources: hand every frame to a decoder before reading the next
+                    self._slot.wait_taken(seq, None)
+        finally:
+            self._slot.close()
+            # released here, never while read() may still be running on this thread
+            capture.release()
+
+    def _wait_turn(self) -> bool:
+        """Rate limit across workers; False if the scan stopped meanwhile."""
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_decode)
+            self._next_decode = start + self.min_interval
+        return not self._stop.wait(start - now) if start > now else not self._stop.is_set()
+
+    def _decode_loop(self):
+        seen = 0
+        while not self._stop.is_set():
+            if not self._wait_turn():
+                return
+            seq, frame = self._slot.take(seen, 0.5)
+            if frame is None:
+                if self._slot.closed:
+                    return
+                continue
+            seen = seq
+            try:
+                found = self.decoder(frame)
+            except Exception:
+                found = []
+            with self._result_lock:
+                self.frames_decoded += 1
+                if found and not self.payloads:
+                    self.payloads = found
+                    self._stop.set()
+                    self._slot.close()
+
+    def run(self) -> List[str]:
+        """Every QR payload of the first frame that decodes ([] if none did)."""
+        capture, live = open_source(self.source)
+        if not capture.isOpened():
+            return []
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        threads = [threading.Thread(target=self._capture, args=(capture, live), name="qr-capture", daemon=True)]
+        threads += [threading.Thread(target=self._decode_loop, name=f"qr-decode-{i}", daemon=True)
+                    for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        decoders = threads[1:]
+        seq = 0
+        try:
+            # until a decoder succeeds, every decoder is done (offline source used up) or time runs out
+            while not self._stop.is_set() and any(t.is_alive() for t in decoders):
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                if not self.preview:
+                    self._stop.wait(0.05)
+                    continue
+                seq, frame = self._slot.take(seq, 0.05, claim=False)
+                if frame is not None:
+                    cv2.imshow(PREVIEW_TITLE, frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+        finally:
+            self._stop.set()
+            self._slot.close()
+            for thread in threads:
+                thread.join(timeout=2)
+            if self.preview:
+                try:
+                    cv2.destroyAllWindows()
+                except Exception:
+                    pass
+        return self.payloads
@@ -0,0 +1,245 @@
+# openvault/search.py
+"""In-memory search index over password entries.
+
+Entries are split into lowercase word tokens from the name, username, URL
+host and notes. A query term matches a token exactly, as a prefix (bisect
+over the sorted token list), as a substring (token trigrams) or within a
+small edit distance (typo tolerance). Typo candidates come from deletion
+neighbourhoods, as in SymSpell: two words within d edits (an adjacent swap
+counting as one) become equal after deleting at most d letters from each, and
+so do their first FUZZY_PREFIX letters. Every string left after deleting up to
+d of a token's first FUZZY_PREFIX letters is a key for it, and a term looks up
+its own such strings. That index is built on the first typo lookup.
+Every query term must match; entries are ranked by match quality weighted by
+field. The index is built once per unlock and updated by Vault.upsert/delete.
+"""
+import re
+import heapq
+import bisect
+import urllib.parse
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+RESULT_LIMIT = 50
+# field weights: a hit in the name counts more than one in the notes
+FIELD_WEIGHTS = {"name": 3.0, "host": 2.0, "username": 2.0, "notes": 1.0}
+MATCH_EXACT = 1.0
+MATCH_PREFIX = 0.7
+MATCH_SUBSTRING = 0.5
+MATCH_FUZZY = 0.4
+FUZZY_PREFIX = 7  # letters of a token whose deletions are indexed for typo lookup
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+def url_host(url: str) -> str:
+    if not url:
+        return ""
+    try:
+        return urllib.parse.urlsplit(url if "//" in url else f"//{url}").hostname or ""
+    except ValueError:
+        return ""
+
+def _trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+def max_typos(term: str) -> int:
+    if len(term) < 4:
+        return 0
+    return 1 if len(term) < 8 else 2
+
+def _reach(token: str) -> int:
+    """Most typos allowed to a term that could match token: max_typos() of terms up to that many letters longer or shorter."""
+    if len(token) >= 6:
+        return 2
+    return 1 if len(token) >= 3 else 0
+
+def _deletions(word: str, depth: int) -> Set[str]:
+    """word and every string left after deleting up to depth of its letters."""
+    found = {word}
+    layer = {word}
+    for _ in range(depth):
+        layer = {w[:i] + w[i + 1:] for w in layer for i in range(len(w))}
+        found |= layer
+    return found
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Edit distance counting a swap of adjacent letters as one typo, capped at limit + 1."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if before and i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit and (before is None or min(previous) > limit):
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+class TokenIndex:
+    """Token -> {entry id: best field weight}, with prefix, substring and fuzzy token lookup."""
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_tokens: Dict[str, Dict[str, float]] = {}
+        self._sorted: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+        # deletion key -> tokens, built on the first typo lookup (see _near)
+        self._deletes: Optional[Dict[str, Set[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
+
+    def bulk_load(self, docs: Iterable[Tuple[str, Dict[str, float]]]):
+        """Fill an empty index in one pass (cheaper than repeated add())."""
+        for doc_id, tokens in docs:
+            self._doc_tokens[doc_id] = tokens
+            for token, weight in tokens.items():
+                self._postings.setdefault(token, {})[doc_id] = weight
+        self._sorted = sorted(self._postings)
+        for token in self._sorted:
+            for gram in _trigrams(token):
+                self._trigrams[gram].add(token)
+
+    def add(self, doc_id: str, tokens: Dict[str, float]):
+        self.remove(doc_id)
+        self._doc_tokens[doc_id] = tokens
+        for token, weight in tokens.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._sorted, token)
+                for gram in _trigrams(token):
+                    self._trigrams[gram].add(token)
+                if self._deletes is not None:
+                    self._index_deletes(token)
+            postings[doc_id] = weight
+
+    def remove(self, doc_id: str):
+        for token in self._doc_tokens.pop(doc_id, {}):
+            postings = self._postings[token]
+            postings.pop(doc_id, None)
+            if postings:
+                continue
+            del self._postings[token]
+            del self._sorted[bisect.bisect_left(self._sorted, token)]
+            for gram in _trigrams(token):
+                grams = self._trigrams[gram]
+                grams.discard(token)
+                if not grams:
+                    del self._trigrams[gram]
+            if self._deletes is not None:
+                for key in _deletions(token[:FUZZY_PREFIX], _reach(token)):
+                    tokens = self._deletes[key]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._deletes[key]
+
+    def _index_deletes(self, token: str):
+        for key in _deletions(token[:FUZZY_PREFIX], _reach(token)):
+            self._deletes.setdefault(key, set()).add(token)
+
+    def _with_prefix(self, term: str) -> Iterable[str]:
+        tokens = self._sorted
+        for i in range(bisect.bisect_left(tokens, term), len(tokens)):
+            if not tokens[i].startswith(term):
+                break
+            yield tokens[i]
+
+    def _with_substring(self, term: str) -> Set[str]:
+        grams = sorted(_trigrams(term), key=lambda g: len(self._trigrams.get(g, ())))
+        if not grams:
+            return set()
+        candidates = set(self._trigrams.get(grams[0], ()))
+        for gram in grams[1:]:
+            candidates &= self._trigrams.get(gram, set())
+            if not candidates:
+                break
+        return {token for token in candidates if term in token}
+
+    def _near(self, term: str) -> Dict[str, int]:
+        limit = max_typos(term)
+        if not limit:
+            return {}
+        if self._deletes is None:
+            self._deletes = {}
+            for token in self._sorted:
+                self._index_deletes(token)
+        candidates: Set[str] = set()
+        for key in _deletions(term[:FUZZY_PREFIX], limit):
+            candidates.update(self._deletes.get(key, ()))
+        near = {}
+        for token in candidates:
+            distance = edit_distance(term, token, limit)
+            if distance <= limit:
+                near[token] = distance
+        return near
+
+    def match(self, term: str) -> Dict[str, float]:
+        """Entry id -> score for one query term (best match kind and field)."""
+        kinds: Dict[str, float] = {}
+        for token in self._with_prefix(term):
+            kinds[token] = MATCH_EXACT if token == term else MATCH_PREFIX
+        if len(term) >= 3:
+            for token in self._with_substring(term):
+                kinds.setdefault(token, MATCH_SUBSTRING)
+        if not kinds:
+            # typos are only considered when nothing matches as typed
+            for token, distance in self._near(term).items():
+                kinds[token] = MATCH_FUZZY / distance
+        scores: Dict[str, float] = {}
+        for token, kind in kinds.items():
+            for doc_id, weight in self._postings[token].items():
+                score = kind * weight
+                if score > scores.get(doc_id, 0.0):
+                    scores[doc_id] = score
+        return scores
+
+    def search(self, query: str, limit: int = RESULT_LIMIT) -> List[Tuple[str, float]]:
+        """Best (entry id, score) pairs for entries matching every term of the query."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        per_term = sorted((self.match(term) for term in terms), key=len)
+        totals = dict(per_term[0])
+        for scores in per_term[1:]:
+            totals = {doc_id: total + scores[doc_id] for doc_id, total in totals.items() if doc_id in scores}
+            if not totals:
+                return []
+        return heapq.nlargest(limit, totals.items(), key=lambda item: item[1])
+
+def password_tokens(entry: Dict[str, Any]) -> Dict[str, float]:
+    tokens: Dict[str, float] = {}
+    fields = (("name", entry.get("name", "")), ("username", entry.get("username", "")),
+              ("host", url_host(entry.get("url", ""))), ("notes", entry.get("notes", "")))
+    for field, text in fields:
+        weight = FIELD_WEIGHTS[field]
+        for token in tokenize(text):
+            if weight > tokens.get(token, 0.0):
+                tokens[token] = weight
+    return tokens
+
+class PasswordIndex:
+    """Search index over vault_data["passwords"], kept current through Vault.derived()."""
+    def __init__(self, entries: Dict[str, Dict[str, Any]]):
+        self.tokens = TokenIndex()
+        self.tokens.bulk_load((eid, password_tokens(entry)) for eid, entry in entries.items())
+
+    @classmethod
+    def for_vault(cls, vault) -> "PasswordIndex":
+        return vault.derived("password-search", lambda v: cls(v.vault_data.get("passwords", {})))
+
+    def update(self, section: str, entry_id: str, entry: Optional[Dict[str, Any]]):
+        if section != "passwords":
+            return
+        if entry is None:
+            self.tokens.remove(entry_id)
+        else:
+            self.tokens.add(entry_id, password_tokens(entry))
+
+    def search(self, query: str, limit: int = RESULT_LIMIT) -> List[Tuple[str, float]]:
+        return self.tokens.search(query, limit)
@@ -0,0 +1,264 @@
+# openvault/sections.py
+"""Vault container with one separately encrypted segment per top-level section.
+
+Layout (version 2)::
+
+    MAGIC | version (1) | cipher id (1) | KDF id (1) | KDF param count (1) | KDF params (4 each)
+          | salt length (1) | salt | count (2) | (name length (1) | name | segment length (4))*
+    segments...
+    HMAC-SHA256 over everything above
+
+Version 2 segments are nonce | AES-256-GCM(codec.encode(section)) with the
+section name as associated data. Version 1 (MAGIC | 1 | salt | count | directory)
+used Fernet tokens of JSON; such vaults are rewritten as version 2 on first save.
+
+The HMAC (keyed from the session key) covers the whole file, so segments cannot
+be swapped, dropped or rolled back individually; it also rejects a wrong password.
+"""
+import os
+import hmac
+import time
+import struct
+import hashlib
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from openvault import codec, config
+from openvault.encryption import VaultEncryption, SessionKey, SALT_SIZE, DEFAULT_KDF
+
+MAGIC = b"OVLT"
+VERSION = 2
+MAC_SIZE = 32
+NONCE_SIZE = 12
+CIPHER_FERNET = 1
+CIPHER_AES_GCM = 2
+# KDF name -> (id stored in the header, ordered integer params)
+KDFS = {"pbkdf2-sha256": (1, ("iterations",)), "scrypt": (2, ("n", "r", "p"))}
+_V1_PREFIX = struct.Struct(f">4sB{SALT_SIZE}sH")
+_V2_PREFIX = struct.Struct(">4sBBBB")
+_PARAM = struct.Struct(">I")
+_COUNT = struct.Struct(">H")
+_SEGMENT_LEN = struct.Struct(">I")
+
+class ContainerError(Exception):
+    pass
+
+def is_container(blob: bytes) -> bool:
+    return blob[:len(MAGIC)] == MAGIC
+
+def _mac(session_key: SessionKey, data: bytes) -> bytes:
+    return hmac.new(session_key.subkey("container-mac"), data, hashlib.sha256).digest()
+
+def _parse_header(blob: bytes) -> Tuple[int, int, bytes, dict, int]:
+    """Return (version, cipher, salt, kdf params, offset of the section count)."""
+    if len(blob) < _V1_PREFIX.size + MAC_SIZE:
+        raise ContainerError("Truncated vault")
+    magic, version = blob[:4], blob[4]
+    if magic != MAGIC:
+        raise ContainerError("Not a vault container")
+    if version == 1:
+        salt = _V1_PREFIX.unpack_from(blob)[2]
+        return 1, CIPHER_FERNET, salt, dict(DEFAULT_KDF), _V1_PREFIX.size - _COUNT.size
+    if version != VERSION:
+        raise ContainerError(f"Unsupported vault format {version}")
+    _, _, cipher, kdf_id, param_count = _V2_PREFIX.unpack_from(blob)
+    offset = _V2_PREFIX.size
+    names = [name for name, (ident, _) in KDFS.items() if ident == kdf_id]
+    if not names or len(KDFS[names[0]][1]) != param_count:
+        raise ContainerError(f"Unknown KDF {kdf_id}")
+    kdf = {"name": names[0]}
+    for field in KDFS[names[0]][1]:
+        kdf[field] = _PARAM.unpack_from(blob, offset)[0]
+        offset += _PARAM.size
+    salt_len = blob[offset]
+    salt = blob[offset + 1:offset + 1 + salt_len]
+    return version, cipher, salt, kdf, offset + 1 + salt_len
+
+def read_params(blob: bytes) -> Tuple[bytes, dict]:
+    """Salt and KDF parameters needed to derive the key for this file."""
+    _, _, salt, kdf, _ = _parse_header(blob)
+    return salt, kdf
+
+def pack(session_key: SessionKey, segments: Dict[str, bytes]) -> bytes:
+    kdf_id, fields = KDFS[session_key.kdf["name"]]
+    parts = [_V2_PREFIX.pack(MAGIC, VERSION, CIPHER_AES_GCM, kdf_id, len(fields))]
+    parts.extend(_PARAM.pack(session_key.kdf[field]) for field in fields)
+    parts.append(bytes([len(session_key.salt)]) + session_key.salt + _COUNT.pack(len(segments)))
+    for name, segment in segments.items():
+        raw = name.encode()
+        parts.append(bytes([len(raw)]) + raw + _SEGMENT_LEN.pack(len(segment)))
+    parts.extend(segments.values())
+    body = b"".join(parts)
+    return body + _mac(session_key, body)
+
+def unpack(blob: bytes, session_key: SessionKey) -> Tuple[int, Dict[str, bytes]]:
+    """Verify the file and return (format version, name -> sealed segment)."""
+    version, _, _, _, offset = _parse_header(blob)
+    body, mac = blob[:-MAC_SIZE], blob[-MAC_SIZE:]
+    if not hmac.compare_digest(_mac(session_key, body), mac):
+        raise ContainerError("Wrong password or corrupted vault")
+    (count,) = _COUNT.unpack_from(body, offset)
+    offset += _COUNT.size
+    directory = []
+    for _ in range(count):
+        name_len = body[offset]
+        name = body[offset + 1:offset + 1 + name_len].decode()
+        offset += 1 + name_len
+        (length,) = _SEGMENT_LEN.unpack_from(body, offset)
+        offset += _SEGMENT_LEN.size
+        directory.append((name, length))
+    segments = {}
+    for name, length in directory:
+        segments[name] = body[offset:offset + length]
+        offset += length
+    return version, segments
+
+def seal_segment(aead: AESGCM, name: str, value: Any) -> bytes:
+    nonce = os.urandom(NONCE_SIZE)
+    return nonce + aead.encrypt(nonce, codec.encode(value), name.encode())
+
+def open_segment(aead: AESGCM, name: str, segment: bytes) -> Any:
+    return codec.decode(aead.decrypt(segment[:NONCE_SIZE], segment[NONCE_SIZE:], name.encode()))
+
+class LazySections(MutableMapping):
+    """vault_data mapping that decrypts a section on first access.
+
+    Clean sections are dropped again after config.SECTION_IDLE_SECONDS without
+    use. Mutations must go through Vault.upsert/delete (or mark_dirty) so that
+    seal() knows which segments to re-encrypt.
+    """
+    def __init__(self, session_key: Optional[SessionKey], segments: Optional[Dict[str, bytes]] = None,
+                 plain: Optional[Dict[str, Any]] = None, version: int = VERSION):
+        self._key = session_key
+        self._aead: Optional[AESGCM] = None
+        self._version = version
+        self._segments: Dict[str, bytes] = dict(segments or {})
+        self._plain: Dict[str, Any] = {}
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._last_used: Dict[str, float] = {}
+        self._dirty = set()
+        self._lock = threading.RLock()
+        for name, value in (plain or {}).items():
+            self[name] = value
+
+    @property
+    def session_key(self) -> Optional[SessionKey]:
+        return self._key
+
+    def _names(self) -> List[str]:
+        return list(self._segments) + [n for n in self._plain if n not in self._segments]
+
+    def _cipher(self) -> AESGCM:
+        if self._aead is None:
+            self._aead = AESGCM(self._key.subkey("section-aead"))
+        return self._aead
+
+    def _open(self, name: str) -> Any:
+        if self._version == 1:
+            value = VaultEncryption.decrypt_data_with_key(self._segments[name], self._key)
+            if value is None:
+                raise ContainerError(f"Cannot decrypt section {name}")
+        else:
+            value = open_segment(self._cipher(), name, self._segments[name])
+        self._plain[name] = value
+        for record in self._pending.pop(name, []):
+            _apply(value, record)
+            self._dirty.add(name)
+        return value
+
+    def _evict_idle(self, now: float):
+        for name in list(self._plain):
+            if (name not in self._dirty and name in self._segments
+                    and now - self._last_used.get(name, now) > config.SECTION_IDLE_SECONDS):
+                del self._plain[name]
+
+    def __getitem__(self, name: str) -> Any:
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+            if name in self._plain:
+                value = self._plain[name]
+            elif name in self._segments:
+                value = self._open(name)
+            else:
+                raise KeyError(name)
+            self._last_used[name] = now
+            return value
+
+    def __setitem__(self, name: str, value: Any):
+        with self._lock:
+            self._plain[name] = value
+            self._pending.pop(name, None)
+            self._last_used[name] = time.monotonic()
+            self._dirty.add(name)
+
+    def __delitem__(self, name: str):
+        with self._lock:
+            if name not in self:
+                raise KeyError(name)
+            for store in (self._segments, self._plain, self._pending, self._last_used):
+                store.pop(name, None)
+            self._dirty.discard(name)
+
+    def __contains__(self, name) -> bool:
+        return name in self._segments or name in self._plain
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names())
+
+    def __len__(self) -> int:
+        return len(self._names())
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._plain
+
+    def mark_dirty(self, name: str):
+        with self._lock:
+            self._dirty.add(name)
+
+    def apply_record(self, record: Dict[str, Any]):
+        """Apply a journal record now if its section is open, otherwise on first access."""
+        with self._lock:
+            name = record["section"]
+            if name in self._plain or name not in self._segments:
+                _apply(self.setdefault(name, {}), record)
+                self._dirty.add(name)
+            else:
+                self._pending.setdefault(name, []).append(record)
+
+    def _open_all(self):
+        for name in self._names():
+            self[name]
+            # dirty sections are never evicted, so each stays decrypted until re-sealed
+            self._dirty.add(name)
+
+    def rebind(self, session_key: SessionKey):
+        """Switch to a new key; every section is decrypted with the old one and re-sealed on save."""
+        with self._lock:
+            if session_key is self._key:
+                return
+            self._open_all()
+            self._key = session_key
+            self._aead = None
+
+    def seal(self) -> Dict[str, bytes]:
+        """Re-encrypt dirty sections (and fold in pending journal records); return every segment."""
+        with self._lock:
+            if self._version != VERSION:
+                # never mix segment formats within one file
+                self._open_all()
+                self._version = VERSION
+            for name in self._names():
+                if name in self._pending:
+                    self[name]
+                if name in self._dirty:
+                    self._segments[name] = seal_segment(self._cipher(), name, self[name])
+            self._dirty.clear()
+            return {name: self._segments[name] for name in self._names()}
+
+def _apply(section: Dict[str, Any], record: Dict[str, Any]):
+    if record["op"] == "upsert":
+        section[record["id"]] = record["value"]
+    elif record["op"] == "delete":
+        section.pop(record["id"], None)
@@ -1,10 +1,45 @@
 # openvault/settings.py
 from openvault import utils, ui
-from openvault import config
+from openvault import config, encryption, chunkstore
 from typing import Dict
 import os
+import shutil
 
-def open_settings_menu(cfg: Dict):
+def calibrated_kdf(cfg: Dict) -> Dict:
+    """KDF parameters for this machine from the configured algorithm and unlock target."""
+    ui.console.print("[dim]Calibrating key derivation for this machine...[/]")
+    return encryption.VaultEncryption.calibrate_kdf(cfg.get("kdf_algorithm", "scrypt"),
+                                                    cfg.get("kdf_target_ms", config.DEFAULT_KDF_TARGET_MS))
+
+def retune_kdf(cfg: Dict, vault):
+    ui.console.print(f"Current KDF: {encryption.VaultEncryption.describe_kdf(vault.kdf)}")
+    ui.console.print(f"Current unlock time: {encryption.VaultEncryption.time_kdf(vault.kdf) * 1000:.0f} ms")
+    kdf = calibrated_kdf(cfg)
+    ui.console.print(f"Proposed KDF: {encryption.VaultEncryption.describe_kdf(kdf)}")
+    ui.console.print(f"Proposed unlock time: {encryption.VaultEncryption.time_kdf(kdf) * 1000:.0f} ms")
+    if not ui.confirm("Re-wrap the vault with these parameters?"):
+        return
+    if vault.retune_kdf(kdf):
+        ui.console.print("[green]Vault re-wrapped[/]")
+    else:
+        ui.console.print("[red]Failed to re-wrap vault[/]")
+
+def change_master_password(vault):
+    current = ui.ask_password("Current master password")
+    new = ui.ask_password("New master password")
+    if not new:
+        ui.console.print("[red]Password required[/]")
+        return
+    if ui.ask_password("Repeat new master password") != new:
+        ui.console.print("[red]Passwords do not match[/]")
+        return
+    if vault.change_master_password(current, new):
+        ui.console.print("[green]Master password changed[/]")
+    else:
+        ui.console.print("[red]Failed to change master password (check the current password)[/]")
+
+def open_settings_menu(cfg: Dict, vault=None):
+    """Application settings; vault-specific actions are offered when an unlocked vault is given."""
     ui.console.print("[bold]Settings[/]")
     while True:
         opts = [
@@ -12,9 +47,14 @@ def open_settings_menu(cfg: Dict):
             f"Auto-lock timeout (seconds): {cfg.get('auto_lock_timeout', config.DEFAULT_TIMEOUT)}",
             f"Clipboard clear time (seconds): {cfg.get('clipboard_clear_time', config.DEFAULT_CLIP_CLEAR)}",
             f"Default backup path: {cfg.get('default_backup_path','(not set)')}",
-            "Manage Vaults",
-            "Back"
+            f"KDF algorithm: {cfg.get('kdf_algorithm', 'scrypt')}",
+            f"KDF target unlock time (ms): {cfg.get('kdf_target_ms', config.DEFAULT_KDF_TARGET_MS)}",
+            f"Breach corpus file: {cfg.get('breach_corpus_path') or '(not set)'}",
+            f"Locker compression: {cfg.get('locker_compression', 'auto')}",
         ]
+        if vault is not None and not vault.is_locked:
+            opts += ["Change Master Password", "Re-tune Vault KDF"]
+        opts += ["Manage Vaults", "Back"]
         choice = ui.show_menu(opts, title="Settings")
         if choice.startswith("Auto-update"):
             new = ui.confirm("Enable auto-update on startup?")
@@ -42,6 +82,35 @@ def open_settings_menu(cfg: Dict):
             cfg['default_backup_path'] = path
             utils.save_config(cfg)
             ui.console.print("[green]Updated[/]")
+        elif choice.startswith("KDF algorithm"):
+            cfg['kdf_algorithm'] = ui.show_menu(encryption.KDF_NAMES, title="KDF algorithm")
+            utils.save_config(cfg)
+            ui.console.print("[green]Updated (applies to new vaults and re-tuning)[/]")
+        elif choice.startswith("KDF target"):
+            val = ui.ask("Enter target unlock time in milliseconds", default=str(cfg.get('kdf_target_ms', config.DEFAULT_KDF_TARGET_MS)))
+            try:
+                cfg['kdf_target_ms'] = max(1, int(val))
+                utils.save_config(cfg)
+                ui.console.print("[green]Updated[/]")
+            except Exception:
+                ui.console.print("[red]Invalid value[/]")
+        elif choice.startswith("Breach corpus"):
+            path = ui.ask("Enter path of the sorted SHA-1 hash file (leave blank to unset)", default=str(cfg.get('breach_corpus_path', '')))
+            path = os.path.expanduser(path.strip()) if path.strip() else ""
+            if path and not os.path.isfile(path):
+                ui.console.print("[red]File not found[/]")
+                continue
+            cfg['breach_corpus_path'] = path
+            utils.save_config(cfg)
+            ui.console.print("[green]Updated[/]")
+        elif choice.startswith("Locker compression"):
+            cfg['locker_compression'] = ui.show_menu(chunkstore.COMPRESSION_MODES, title="Locker compression")
+            utils.save_config(cfg)
+            ui.console.print("[green]Updated (applies to new uploads)[/]")
+        elif choice == "Change Master Password":
+            change_master_password(vault)
+        elif choice == "Re-tune Vault KDF":
+            retune_kdf(cfg, vault)
         elif choice == "Manage Vaults":
             manage_vaults(cfg)
         elif choice == "Back":
@@ -65,7 +134,7 @@ def manage_vaults(cfg):
                 continue
             from openvault.vault import Vault
             v = Vault(name)
-            created = v.create_new(password)
+            created = v.create_new(password, calibrated_kdf(cfg))
             if created:
                 cfg.setdefault("vaults", {})[name] = {"display_name": display, "path": v.path}
                 cfg["active_vault"] = name
@@ -100,10 +169,14 @@ def manage_vaults(cfg):
             idx = options.index(sel)
             chosen = names[idx]
             if ui.confirm(f"Delete vault '{vaults[chosen]['display_name']}' permanently? This will remove the vault file."):
-                try:
-                    os.remove(vaults[chosen]['path'])
-                except Exception:
-                    pass
+                for path in (vaults[chosen]['path'], vaults[chosen]['path'] + ".journal"):
+                    try:
+                        os.remove(path)
+                    except Exception:
+                        pass
+                # the vault's locker chunks and rendered QR codes
+                for folder in (config.CHUNKS_DIR, config.QR_CACHE_DIR):
+                    shutil.rmtree(os.path.join(folder, chosen), ignore_errors=True)
                 del cfg['vaults'][chosen]
                 if cfg.get('active_vault') == chosen:
                     cfg['active_vault'] = None
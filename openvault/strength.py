@@ -0,0 +1,280 @@
+# openvault/strength.py
+"""Password strength estimation and a background vault-wide strength audit.
+
+estimate() splits a password into the cheapest-to-guess spans it can find
+(common passwords and words, also with leet substitutions undone, keyboard
+runs, sequences, repeats, years) and counts brute-force entropy for the
+rest, in the spirit of zxcvbn. It is cheap enough to run on every add/edit.
+
+StrengthAudit scores the whole password section on a daemon thread. Results
+are cached per entry together with a keyed BLAKE2b digest of the password
+(key derived from the session key), so an entry is only rescored when its
+password changes. The cache is the vault section CACHE_SECTION, one
+{"digest", "score", "bits"} row per entry id: new scores reach the journal
+with the next flush (see journal()) and the whole section is rewritten with
+every snapshot, so it survives locking and re-unlocking.
+"""
+import math
+import string
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+CACHE_SECTION = "strength_cache"
+LEGACY_VERSION = 1  # {"version": 1, "entries": {id: [digest, score, bits]}}
+DIGEST_SIZE = 16
+BATCH_SIZE = 512  # entries scored between cancellation checks and cache publishes
+# score thresholds in bits of entropy: below 28 very weak, below 36 weak, ...
+SCORE_BITS = (28, 36, 60, 80)
+SCORE_LABELS = ("Very weak", "Weak", "Fair", "Strong", "Very strong")
+SCORE_COLORS = ("red", "red", "yellow", "green", "bold green")
+WEAK_SCORE = 1  # the audit lists entries scoring at or below this
+
+COMMON_PASSWORDS = (
+    "password", "123456", "12345678", "qwerty", "abc123", "123456789", "111111", "1234567", "iloveyou",
+    "adobe123", "123123", "admin", "1234567890", "letmein", "photoshop", "1234", "monkey", "shadow",
+    "sunshine", "12345", "password1", "princess", "azerty", "trustno1", "000000", "football", "baseball",
+    "welcome", "dragon", "master", "hello", "freedom", "whatever", "qazwsx", "login", "starwars",
+    "passw0rd", "solo", "mustang", "michael", "superman", "batman", "access", "charlie", "donald",
+    "secret", "summer", "winter", "spring", "autumn", "ninja", "zaq1zaq1", "flower", "hottie",
+    "loveme", "lovely", "jordan", "jennifer", "hunter", "ranger", "buster", "soccer", "hockey",
+    "killer", "george", "andrew", "thomas", "robert", "daniel", "harley", "pepper", "ginger",
+    "cookie", "cheese", "computer", "internet", "samsung", "google", "apple", "changeme", "default",
+    "guest", "root", "test", "demo", "pass", "qwertyuiop", "asdfgh", "zxcvbnm", "1q2w3e4r",
+    "1qaz2wsx", "q1w2e3r4", "abcdef", "abcd1234", "aa123456", "666666", "654321", "121212",
+)
+COMMON_WORDS = (
+    "love", "baby", "angel", "happy", "money", "lucky", "magic", "tiger", "eagle", "dog", "cat",
+    "blue", "red", "green", "black", "white", "orange", "purple", "silver", "golden", "star", "moon",
+    "sun", "fire", "water", "house", "family", "friend", "secure", "office", "work", "home", "school",
+    "london", "paris", "berlin", "america", "canada", "mother", "father", "sister", "brother", "girl",
+    "boy", "king", "queen", "prince", "god", "jesus", "heaven", "hell", "crazy", "rock", "music",
+    "game", "games", "player", "gamer", "user", "email", "mail", "bank", "account", "key", "open",
+)
+_RANK = {word: rank for rank, word in enumerate(COMMON_PASSWORDS + COMMON_WORDS, start=1)}
+_MAX_WORD = max(map(len, _RANK))
+_UNLEET = str.maketrans("013457@$!", "oieastasi")
+_KEYBOARD_ROWS = ("`1234567890-=", "qwertyuiop[]\\", "asdfghjkl;'", "zxcvbnm,./")
+_KEY_NEXT = {(a, b) for row in _KEYBOARD_ROWS for a, b in zip(row, row[1:])}
+_CHARSETS = ((string.ascii_lowercase, 26), (string.ascii_uppercase, 26), (string.digits, 10),
+             (string.punctuation + " ", 33))
+
+def _charset_size(password: str) -> int:
+    size = sum(n for chars, n in _CHARSETS if any(c in chars for c in password))
+    if any(ord(c) > 127 for c in password):
+        size += 100
+    return size or 1
+
+def _run_length(lowered: str, i: int, step) -> int:
+    """Length of the run starting at i where each next char satisfies step(prev, cur)."""
+    j = i + 1
+    while j < len(lowered) and step(lowered[j - 1], lowered[j]):
+        j += 1
+    return j - i
+
+def _patterns(password: str) -> List[Tuple[int, int, float, str]]:
+    """(start, end, bits, kind) for every pattern span worth more than its brute-force cost."""
+    lowered = password.lower()
+    unleet = lowered.translate(_UNLEET)
+    found = []
+    n = len(lowered)
+    for i in range(n):
+        # dictionary: longest common word/password starting here (leet substitutions undone)
+        for j in range(min(n, i + _MAX_WORD), i + 2, -1):
+            word = lowered[i:j]
+            rank = _RANK.get(word) or _RANK.get(unleet[i:j])
+            if rank:
+                # a capital or substitution beyond the obvious ones adds a bit
+                caps = 1.0 if password[i:j] not in (word, word.capitalize()) else 0.0
+                found.append((i, j, math.log2(rank + 1) + caps, "dictionary"))
+                break
+        repeat = _run_length(lowered, i, lambda a, b: a == b)
+        if repeat >= 3:
+            found.append((i, i + repeat, math.log2(_charset_size(lowered[i])) + math.log2(repeat), "repeat"))
+        for delta in (1, -1):
+            seq = _run_length(lowered, i, lambda a, b, d=delta: ord(b) - ord(a) == d)
+            if seq >= 3:
+                found.append((i, i + seq, math.log2(26) + math.log2(seq), "sequence"))
+        keys = _run_length(lowered, i, lambda a, b: (a, b) in _KEY_NEXT or (b, a) in _KEY_NEXT)
+        if keys >= 4:
+            found.append((i, i + keys, math.log2(47) + math.log2(keys), "keyboard"))
+        if lowered[i:i + 4].isdigit() and 1900 <= int(lowered[i:i + 4]) <= 2039:
+            found.append((i, i + 4, math.log2(140), "year"))
+    return found
+
+def estimate(password: str) -> Tuple[int, float, List[str]]:
+    """(score 0-4, estimated entropy in bits, feedback lines) for one password."""
+    if not password:
+        return 0, 0.0, ["Password is empty"]
+    n = len(password)
+    per_char = math.log2(_charset_size(password))
+    patterns = _patterns(password)
+    # cheapest cover of the password: brute force per char, or a pattern span at its cost
+    best = [0.0] + [math.inf] * n
+    starts: Dict[int, List[Tuple[int, float]]] = {}
+    for start, end, bits, _ in patterns:
+        starts.setdefault(start, []).append((end, bits))
+    for i in range(n):
+        best[i + 1] = min(best[i + 1], best[i] + per_char)
+        for end, bits in starts.get(i, ()):
+            best[end] = min(best[end], best[i] + bits)
+    bits = best[n]
+    score = sum(bits >= t for t in SCORE_BITS)
+    kinds = {kind for _, _, _, kind in patterns}
+    feedback = []
+    if "dictionary" in kinds:
+        feedback.append("Contains a common password or word")
+    if kinds & {"sequence", "keyboard"}:
+        feedback.append("Avoid sequences and keyboard runs like 'abc' or 'qwerty'")
+    if "repeat" in kinds:
+        feedback.append("Avoid repeated characters")
+    if "year" in kinds:
+        feedback.append("Avoid years and dates")
+    if n < 12 and score < 3:
+        feedback.append("Use at least 12 characters")
+    if per_char < 5 and score < 3:
+        feedback.append("Mix upper and lower case, digits and symbols")
+    return score, round(bits, 1), feedback
+
+def describe(score: int) -> str:
+    return f"[{SCORE_COLORS[score]}]{SCORE_LABELS[score]}[/]"
+
+class StrengthAudit:
+    """Cached strength scores for vault_data["passwords"], computed on a background thread.
+
+    results maps entry id -> (digest, score, bits). Kept through Vault.derived():
+    edited entries are rescored on the spot, and lock/reload stops the worker via close().
+    """
+    def __init__(self, vault):
+        self._vault = vault
+        self._key = vault.session_key.subkey("password-strength")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._changed = False
+        self._unjournaled = set()  # entry ids scored or dropped since the last flush or snapshot
+        self.results: Dict[str, Tuple[bytes, int, float]] = self._load(vault.vault_data.get(CACHE_SECTION))
+        self.done = 0
+        self.total = 0
+
+    @classmethod
+    def for_vault(cls, vault) -> "StrengthAudit":
+        return vault.derived("strength", cls)
+
+    def _digest(self, password: str) -> bytes:
+        return hashlib.blake2b(password.encode("utf-8", "surrogatepass"), key=self._key,
+                               digest_size=DIGEST_SIZE).digest()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Score entries with no current result on a daemon thread; no-op if already running."""
+        if self.running:
+            return
+        entries = list(self._vault.vault_data.get("passwords", {}).items())
+        self._stop.clear()
+        self.done, self.total = 0, len(entries)
+        self._thread = threading.Thread(target=self._run, args=(entries,), name="strength-audit", daemon=True)
+        self._thread.start()
+
+    def _run(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        by_digest: Dict[bytes, Tuple[int, float]] = {}
+        for offset in range(0, len(entries), BATCH_SIZE):
+            if self._stop.is_set():
+                return
+            batch = {}
+            chunk = entries[offset:offset + BATCH_SIZE]
+            for eid, entry in chunk:
+                digest = self._digest(entry.get("password") or "")
+                cached = self.results.get(eid)
+                if cached and cached[0] == digest:
+                    continue
+                scored = by_digest.get(digest)
+                if scored is None:
+                    scored = by_digest[digest] = estimate(entry.get("password") or "")[:2]
+                batch[eid] = (digest,) + scored
+            with self._lock:
+                # entries edited meanwhile were already rescored by update()
+                current = self._vault.vault_data.get("passwords", {})
+                for eid, entry in chunk:
+                    if eid in batch and current.get(eid, {}).get("password") == entry.get("password"):
+                        self.results[eid] = batch[eid]
+                        self._unjournaled.add(eid)
+                        self._changed = True
+                self.done = min(self.total, offset + BATCH_SIZE)
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def update(self, section: str, entry_id: str, entry: Optional[Dict[str, Any]]):
+        if section != "passwords":
+            return
+        scored = None
+        if entry is not None:
+            password = entry.get("password") or ""
+            scored = (self._digest(password),) + estimate(password)[:2]
+        with self._lock:
+            if scored is None:
+                self.results.pop(entry_id, None)
+            else:
+                self.results[entry_id] = scored
+            self._unjournaled.add(entry_id)
+            self._changed = True
+
+    def weak(self, max_score: int = WEAK_SCORE) -> List[Tuple[str, int, float]]:
+        """(entry id, score, bits) of scored entries at or below max_score, weakest first."""
+        with self._lock:
+            items = [(eid, score, bits) for eid, (_, score, bits) in self.results.items() if score <= max_score]
+        return sorted(items, key=lambda item: item[2])
+
+    def counts(self) -> List[int]:
+        """Number of scored entries per score 0-4."""
+        counts = [0] * len(SCORE_LABELS)
+        with self._lock:
+            for _, score, _ in self.results.values():
+                counts[score] += 1
+        return counts
+
+    @staticmethod
+    def _load(data: Optional[Dict[str, Any]]) -> Dict[str, Tuple[bytes, int, float]]:
+        if not isinstance(data, dict):
+            return {}
+        results = {}
+        if data.get("version") == LEGACY_VERSION and isinstance(data.get("entries"), dict):
+            # saved before per-entry rows; journal records replayed on top are rows
+            results = {eid: (bytes.fromhex(digest), score, bits)
+                       for eid, (digest, score, bits) in data["entries"].items()}
+        for eid, row in data.items():
+            if isinstance(row, dict) and "digest" in row:
+                results[eid] = (bytes.fromhex(row["digest"]), row["score"], row["bits"])
+        return results
+
+    def journal(self) -> List[Dict[str, Any]]:
+        """Journal records for scores changed since the last flush; called by Vault.flush()."""
+        with self._lock:
+            records = []
+            for eid in self._unjournaled:
+                scored = self.results.get(eid)
+                if scored is None:
+                    records.append({"op": "delete", "section": CACHE_SECTION, "id": eid})
+                else:
+                    digest, score, bits = scored
+                    records.append({"op": "upsert", "section": CACHE_SECTION, "id": eid,
+                                    "value": {"digest": digest.hex(), "score": score, "bits": bits}})
+            self._unjournaled.clear()
+            return records
+
+    def persist(self, vault_data):
+        """Store the score cache in its vault section if it changed; called by Vault.save()."""
+        with self._lock:
+            if not self._changed:
+                return
+            entries = self._vault.vault_data.get("passwords", {})
+            vault_data[CACHE_SECTION] = {eid: {"digest": digest.hex(), "score": score, "bits": bits}
+                                         for eid, (digest, score, bits) in self.results.items() if eid in entries}
+            self._changed = False
+            self._unjournaled.clear()
@@ -0,0 +1,139 @@
+# openvault/totp.py
+"""Batch TOTP engine for the 2FA section.
+
+Secrets are base32-decoded once, when the engine is built after unlock, and
+entries are grouped by (period, digits, algorithm). All codes of a group
+share one time step, so the counter is packed once and every code is a
+single one-shot HMAC (hmac.digest) plus RFC 4226 truncation. Each group's
+codes are cached until its period rolls over; asking for one code computes
+the whole group, and the rest are then free until the next boundary.
+"""
+import time
+import hmac
+import base64
+import struct
+import binascii
+import urllib.parse
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_PERIOD = 30
+DEFAULT_DIGITS = 6
+DEFAULT_ALGO = "SHA1"
+DIGESTS = {"SHA1": "sha1", "SHA256": "sha256", "SHA512": "sha512"}
+_COUNTER = struct.Struct(">Q")
+_WORD = struct.Struct(">I")
+
+def decode_secret(secret: str) -> bytes:
+    """Raw key of a base32 secret as written by users and otpauth URIs (case, spaces and padding optional)."""
+    cleaned = "".join(secret.split()).upper().rstrip("=")
+    if not cleaned:
+        raise ValueError("Secret is empty")
+    try:
+        return base64.b32decode(cleaned + "=" * (-len(cleaned) % 8))
+    except binascii.Error as e:
+        raise ValueError(f"Secret is not valid base32: {e}")
+
+def provisioning_uri(entry: Dict[str, Any]) -> str:
+    """otpauth://totp/ URI carrying the secret, issuer, algorithm, digits and period of a 2FA entry."""
+    issuer = entry.get("issuer") or ""
+    account = entry.get("account") or ""
+    label = f"{issuer}:{account}" if issuer and account else (account or entry.get("name") or issuer or "2FA")
+    period, digits, algo = _group_of(entry)
+    query = {"secret": "".join((entry.get("secret") or "").split()).upper().rstrip("=")}
+    if issuer:
+        query["issuer"] = issuer
+    query.update({"algorithm": algo, "digits": digits, "period": period})
+    return f"otpauth://totp/{urllib.parse.quote(label, safe=':@')}?{urllib.parse.urlencode(query)}"
+
+def _group_of(entry: Dict[str, Any]) -> Tuple[int, int, str]:
+    algo = str(entry.get("algo") or DEFAULT_ALGO).upper()
+    return (int(entry.get("period") or DEFAULT_PERIOD), int(entry.get("digits") or DEFAULT_DIGITS),
+            algo if algo in DIGESTS else DEFAULT_ALGO)
+
+class TotpEngine:
+    """Current codes for vault_data["twofa"], kept through Vault.derived().
+
+    Entries whose secret does not decode are listed in errors and get no code.
+    """
+    def __init__(self, entries: Dict[str, Dict[str, Any]]):
+        self._groups: Dict[Tuple[int, int, str], Dict[str, bytes]] = {}
+        self._group_of: Dict[str, Tuple[int, int, str]] = {}
+        # group -> (time step, {entry id: code}) for the step last computed
+        self._cache: Dict[Tuple[int, int, str], Tuple[int, Dict[str, str]]] = {}
+        self.errors: Dict[str, str] = {}
+        for eid, entry in entries.items():
+            self._add(eid, entry)
+
+    @classmethod
+    def for_vault(cls, vault) -> "TotpEngine":
+        return vault.derived("totp", lambda v: cls(v.vault_data.get("twofa", {})))
+
+    def _add(self, eid: str, entry: Dict[str, Any]):
+        try:
+            key = decode_secret(entry.get("secret") or "")
+            group = _group_of(entry)
+        except (ValueError, TypeError) as e:
+            self.errors[eid] = str(e)
+            return
+        self._groups.setdefault(group, {})[eid] = key
+        self._group_of[eid] = group
+        self._cache.pop(group, None)
+
+    def _remove(self, eid: str):
+        self.errors.pop(eid, None)
+        group = self._group_of.pop(eid, None)
+        if group is None:
+            return
+        keys = self._groups[group]
+        del keys[eid]
+        if not keys:
+            del self._groups[group]
+        self._cache.pop(group, None)
+
+    def update(self, section: str, entry_id: str, entry: Optional[Dict[str, Any]]):
+        if section != "twofa":
+            return
+        self._remove(entry_id)
+        if entry is not None:
+            self._add(entry_id, entry)
+
+    def _group_codes(self, group: Tuple[int, int, str], now: float) -> Dict[str, str]:
+        period, digits, algo = group
+        step = int(now) // period
+        cached = self._cache.get(group)
+        if cached is not None and cached[0] == step:
+            return cached[1]
+        # one batch per group: the counter is packed once, then one HMAC per key
+        counter = _COUNTER.pack(step)
+        name = DIGESTS[algo]
+        modulo = 10 ** digits
+        digest = hmac.digest
+        unpack = _WORD.unpack_from
+        codes = {}
+        for eid, key in self._groups[group].items():
+            mac = digest(key, counter, name)
+            codes[eid] = str((unpack(mac, mac[-1] & 0x0F)[0] & 0x7FFFFFFF) % modulo).zfill(digits)
+        self._cache[group] = (step, codes)
+        return codes
+
+    def code(self, entry_id: str, now: Optional[float] = None) -> Optional[Tuple[str, int]]:
+        """(current code, seconds until it expires), or None if the entry has no usable secret."""
+        group = self._group_of.get(entry_id)
+        if group is None:
+            return None
+        now = time.time() if now is None else now
+        return self._group_codes(group, now)[entry_id], group[0] - int(now) % group[0]
+
+    def codes(self, now: Optional[float] = None) -> Dict[str, Tuple[str, int]]:
+        """entry id -> (current code, seconds left) for every usable entry."""
+        now = time.time() if now is None else now
+        result = {}
+        for group in self._groups:
+            remaining = group[0] - int(now) % group[0]
+            for eid, code in self._group_codes(group, now).items():
+                result[eid] = (code, remaining)
+        return result
+
+    def period(self, entry_id: str) -> Optional[int]:
+        group = self._group_of.get(entry_id)
+        return group[0] if group else None
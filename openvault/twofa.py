@@ -1,30 +1,19 @@
 # openvault/twofa.py
 import uuid
+import time
 import datetime
-import pyotp
 import pyperclip
 import urllib.parse
 import os
 import io
-from openvault import utils, ui, config
-import qrcode
+from openvault import utils, ui, config, indexes, totp, qrdecode, qrscan, qrexport
 import openvault
+from rich import box
+from rich.live import Live
+from rich.table import Table
+from rich.markup import escape
 
 
-try:
-    import cv2
-    from pyzbar.pyzbar import decode as zbar_decode
-    _HAS_OPENCV = True
-except Exception:
-    _HAS_OPENCV = False
-
-try:
-    from pyzbar.pyzbar import decode as pyzbar_decode
-    from PIL import Image
-    _HAS_PYZBAR = True
-except Exception:
-    _HAS_PYZBAR = False
-
 def _parse_otpauth_uri(uri: str) -> dict:
     """Parse otpauth:// URI into fields."""
     res = {}
@@ -60,54 +49,16 @@ def _parse_otpauth_uri(uri: str) -> dict:
 
 def _decode_qr_from_image(path: str) -> str:
     """Attempt to decode QR content from image file. Returns payload or None."""
-    
-    try:
-        if _HAS_PYZBAR:
-            img = Image.open(path)
-            decoded = pyzbar_decode(img)
-            if decoded:
-                return decoded[0].data.decode("utf-8")
-    except Exception:
-        pass
-    
-    try:
-        if _HAS_OPENCV:
-            import cv2
-            img = cv2.imread(path)
-            decoded = zbar_decode(img)
-            if decoded:
-                return decoded[0].data.decode("utf-8")
-    except Exception:
-        pass
-    return None
+    result = qrdecode.decode_image(path)
+    return result.payloads[0] if result.payloads else None
 
 def _scan_qr_from_webcam(timeout_seconds: int = 20) -> str:
     """Open webcam and scan QR codes; returns payload or None."""
-    if not _HAS_OPENCV:
-        return None
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
+    if not qrscan.available():
         return None
-    start = datetime.datetime.now()
     ui.console.print("[yellow]Scanning webcam for QR code. Press 'q' to quit early.[/]")
-    payload = None
-    while (datetime.datetime.now() - start).seconds < timeout_seconds:
-        ret, frame = cap.read()
-        if not ret:
-            continue
-        decoded = zbar_decode(frame)
-        if decoded:
-            payload = decoded[0].data.decode("utf-8")
-            break
-        cv2.imshow("OpenVault - QR Scanner (press q to stop)", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-    cap.release()
-    try:
-        cv2.destroyAllWindows()
-    except Exception:
-        pass
-    return payload
+    payloads = qrscan.QrScanner(0, timeout=timeout_seconds).run()
+    return payloads[0] if payloads else None
 
 def add_twofa(vault: "openvault.vault.Vault", ui_module):
     ui_module.console.print("[bold]Add new 2FA entry[/]")
@@ -151,8 +102,8 @@ def add_twofa(vault: "openvault.vault.Vault", ui_module):
         else:
             secret = data.strip()
     elif method == "Scan QR with webcam (optional)":
-        if not _HAS_OPENCV:
-            ui_module.console.print("[red]Webcam scanning requires opencv + pyzbar[/]")
+        if not qrscan.available():
+            ui_module.console.print("[red]Webcam scanning requires opencv[/]")
             return
         data = _scan_qr_from_webcam()
         if not data:
@@ -180,7 +131,7 @@ def add_twofa(vault: "openvault.vault.Vault", ui_module):
     category = ui_module.show_menu(vault.vault_data["categories"], title="Select category")
     entry_id = str(uuid.uuid4())
     ts = datetime.datetime.now().isoformat()
-    vault.vault_data["twofa"][entry_id] = {
+    entry = {
         "name": f"{issuer or account or '2FA'}",
         "secret": secret,
         "issuer": issuer,
@@ -192,60 +143,127 @@ def add_twofa(vault: "openvault.vault.Vault", ui_module):
         "created": ts,
         "modified": ts
     }
-    if vault.save():
+    if vault.upsert("twofa", entry_id, entry):
         ui_module.console.print(f"[green]2FA '{issuer or account}' saved[/]")
-        try:
-            digest = utils.ALGO_MAP.get(algo)
-            totp = pyotp.TOTP(secret, digits=digits, interval=period, digest=digest)
-            code = totp.now()
-            remaining = period - (int(datetime.datetime.now().timestamp()) % period)
-            ui_module.console.print(f"[bold]Current code:[/] [green]{code}[/] (expires in {remaining}s)")
-        except Exception:
-            pass
+        current = totp.TotpEngine.for_vault(vault).code(entry_id)
+        if current:
+            ui_module.console.print(f"[bold]Current code:[/] [green]{current[0]}[/] (expires in {current[1]}s)")
 
 def view_twofa(vault, ui_module):
     entries = vault.vault_data.get("twofa", {})
     if not entries:
         ui_module.console.print("[yellow]No 2FA entries[/]")
         return
-    cat = ui_module.show_menu(["All"] + vault.vault_data["categories"], title="Filter by category")
-    rows = []; mapping = {}
-    for i,(eid,entry) in enumerate(entries.items(), start=1):
-        if cat != "All" and entry["category"] != cat:
-            continue
-        rows.append([str(i), entry.get("name","-"), entry.get("issuer","-"), entry.get("account","-"), entry.get("category","-")])
-        mapping[str(i)] = eid
-    ui_module.show_table("Saved 2FA", ["#","Name","Issuer","Account","Category"], rows)
-    sel = ui_module.ask("Enter number to manage (blank to go back)", default="")
-    if not sel:
+    cat, order = indexes.ask_view(vault, "twofa", ui_module)
+    eid = indexes.browse(vault, "twofa", cat, order, ui_module, "Saved 2FA",
+                         ["Name","Issuer","Account","Category"],
+                         lambda entry: [entry.get("name","-"), entry.get("issuer","-"), entry.get("account","-"), entry.get("category","-")],
+                         "Enter number to manage")
+    if eid:
+        _view_twofa_details(vault, eid, ui_module)
+
+# one key per dashboard row; n/p page, l is skipped (reads like 1) and q quits
+DASHBOARD_KEYS = "123456789abcdefghijkmorstuvwxyz"
+_QUIT_KEYS = ("q", "Q", "\x1b", "\x03", "\x04")
+
+def _countdown(remaining: int, period: int, width: int = 10) -> str:
+    color = "green" if remaining > period*0.6 else ("yellow" if remaining > period*0.3 else "red")
+    filled = round(width * remaining / period)
+    return f"[{color}]{'█' * filled}{'░' * (width - filled)} {remaining:>2}s[/]"
+
+def live_dashboard(vault, ui_module):
+    """Every (filtered) code with its countdown, redrawn once a second; a row's key copies its code.
+
+    Only the visible page is rendered. The code cells of a page are recomputed
+    when an entry's period rolls over; other ticks only redraw the countdowns.
+    """
+    if not vault.vault_data.get("twofa"):
+        ui_module.console.print("[yellow]No 2FA entries[/]")
         return
-    eid = mapping.get(sel)
-    if not eid:
-        ui_module.console.print("[red]Invalid selection[/]")
+    cat, order = indexes.ask_view(vault, "twofa", ui_module)
+    ids = indexes.SectionIndex.for_vault(vault, "twofa").ids(cat, order)
+    if not ids:
+        ui_module.console.print("[yellow]No entries for that category[/]")
         return
-    _view_twofa_details(vault, eid, ui_module)
+    engine = totp.TotpEngine.for_vault(vault)
+    entries = vault.vault_data["twofa"]
+    size = min(ui_module.page_size(), len(DASHBOARD_KEYS))
+    pages = -(-len(ids) // size)
+    idle_limit = utils.load_config().get("auto_lock_timeout", config.DEFAULT_TIMEOUT)
+    page, status = 0, ""
+    cells, cell_steps = [], None
+    last_key = time.monotonic()
+    try:
+        with ui_module.key_input(), Live(console=ui_module.console, auto_refresh=False, transient=True) as live:
+            while True:
+                now = time.time()
+                visible = ids[page * size:(page + 1) * size]
+                steps = [int(now) // (engine.period(eid) or 1) for eid in visible]
+                if steps != cell_steps:
+                    # a period rolled over (or the page changed): refresh the static cells
+                    cells = []
+                    for eid in visible:
+                        current = engine.code(eid, now)
+                        code = f"[bold]{current[0]}[/]" if current else "[red]invalid secret[/]"
+                        cells.append((escape(entries[eid].get("name", "-")), escape(entries[eid].get("account", "-")), code))
+                    cell_steps = steps
+                table = Table(title="2FA Codes", box=box.ROUNDED,
+                              caption=f"Page {page + 1}/{pages} - key copies code, n/p page, q quits"
+                                      + (f"\n{status}" if status else ""))
+                for col in ("Key", "Name", "Account", "Code", "Expires"):
+                    table.add_column(col)
+                for key, eid, (name, account, code) in zip(DASHBOARD_KEYS, visible, cells):
+                    period = engine.period(eid)
+                    table.add_row(f"[bold green]{key}[/]", name, account, code,
+                                  _countdown(period - int(now) % period, period) if period else "-")
+                live.update(table, refresh=True)
+                # wake on the next whole second, or earlier for a key press
+                key = ui_module.read_key(1 - now % 1)
+                if key is None:
+                    if idle_limit and time.monotonic() - last_key > idle_limit:
+                        break
+                    continue
+                last_key = time.monotonic()
+                if key in _QUIT_KEYS:
+                    break
+                if key == "n" and page + 1 < pages:
+                    page += 1
+                elif key == "p" and page:
+                    page -= 1
+                elif key in DASHBOARD_KEYS[:len(visible)]:
+                    eid = visible[DASHBOARD_KEYS.index(key)]
+                    current = engine.code(eid)
+                    if current:
+                        try:
+                            pyperclip.copy(current[0])
+                            ui_module.schedule_clipboard_clear()
+                            status = f"[green]Copied code for {escape(entries[eid].get('name', '-'))}[/]"
+                        except Exception:
+                            status = "[red]Failed to copy[/]"
+    except KeyboardInterrupt:
+        pass
 
 def _view_twofa_details(vault, eid, ui_module):
     entry = vault.vault_data["twofa"][eid]
-    secret = entry["secret"]; algo = entry.get("algo","SHA1"); digits = entry.get("digits",6); period = entry.get("period",30)
+    secret = entry["secret"]; period = entry.get("period",30)
     ui_module.console.print(f"[bold]{entry.get('name','')}[/]")
     ui_module.console.print(f"Issuer: {entry.get('issuer','-')}")
     ui_module.console.print(f"Account: {entry.get('account','-')}")
     ui_module.console.print(f"Category: {entry.get('category','-')}")
-    try:
-        digest = utils.ALGO_MAP.get(algo)
-        totp = pyotp.TOTP(secret, digits=digits, interval=period, digest=digest)
-        code = totp.now()
-        remaining = period - (int(datetime.datetime.now().timestamp()) % period)
+    engine = totp.TotpEngine.for_vault(vault)
+    current = engine.code(eid)
+    if current:
+        code, remaining = current
         color = "green" if remaining > period*0.6 else ("yellow" if remaining > period*0.3 else "red")
         ui_module.console.print(f"[bold]Code:[/] [{color}]{code}[/{color}] (expires in {remaining}s)")
-    except Exception as e:
-        ui_module.console.print(f"[red]Error generating code: {e}[/]")
+    else:
+        ui_module.console.print(f"[red]Error generating code: {engine.errors.get(eid, 'unknown error')}[/]")
     opts = ["Copy Code", "Show Secret", "Export as QR", "Edit", "Delete", "Back"]
     choice = ui_module.show_menu(opts, title="2FA options")
     if choice == "Copy Code":
         try:
-            pyperclip.copy(code)
+            # the menu may have been open across a period boundary
+            pyperclip.copy(engine.code(eid)[0])
             ui_module.console.print("[green]Code copied[/]")
             ui_module.schedule_clipboard_clear()
         except Exception:
@@ -253,24 +271,22 @@ def _view_twofa_details(vault, eid, ui_module):
     elif choice == "Show Secret":
         ui_module.console.print(f"[yellow]{secret}[/]")
     elif choice == "Export as QR":
-        _export_qr(entry, ui_module)
+        _export_qr(vault, entry, ui_module)
     elif choice == "Edit":
         _edit_entry(vault, eid, ui_module)
     elif choice == "Delete":
         if ui_module.confirm(f"Delete '{entry.get('name')}'?"):
-            del vault.vault_data["twofa"][eid]
-            vault.save()
-            ui_module.console.print("[green]Deleted[/]")
+            if vault.delete("twofa", eid):
+                ui_module.console.print("[green]Deleted[/]")
 
-def _export_qr(entry, ui_module):
+def _export_qr(vault, entry, ui_module):
     try:
-        label = f"{entry.get('issuer','')}:{entry.get('account','')}" if entry.get('issuer') and entry.get('account') else entry.get('name')
-        uri = pyotp.TOTP(entry['secret'], digits=entry['digits'], interval=entry['period']).provisioning_uri(name=label, issuer_name=entry.get('issuer',''))
-        img = qrcode.make(uri)
-        os.makedirs(config.TEMP_DIR, exist_ok=True)
-        path = os.path.join(config.TEMP_DIR, f"otp_{entry['name']}.png")
-        img.save(path)
-        ui_module.console.print(f"[green]QR exported to {path} (temporary)[/]")
+        png = qrexport.QrCache.for_vault(vault).render_many([totp.provisioning_uri(entry)])[0][0]
+        default = os.path.join(os.path.expanduser("~"), f"otp_{qrexport.safe_name(entry.get('name') or '2fa')}.png")
+        path = os.path.expanduser(ui_module.ask("Save QR image to", default=default).strip().strip('"'))
+        with open(path, "wb") as f:
+            f.write(png)
+        ui_module.console.print(f"[green]QR exported to {path}[/] [yellow](holds the secret - delete it after use)[/]")
     except Exception as e:
         ui_module.console.print(f"[red]Failed to export QR: {e}[/]")
 
@@ -293,11 +309,12 @@ def _edit_entry(vault, eid, ui_module):
     category = entry.get("category")
     if ui_module.confirm("Change category?"):
         category = ui_module.show_menu(vault.vault_data["categories"], title="Select category")
-    entry.update({
+    updated = dict(entry)
+    updated.update({
         "name": name, "issuer": issuer, "account": account,
         "secret": secret, "algo": algo, "digits": int(digits),
         "period": int(period), "category": category,
         "modified": datetime.datetime.now().isoformat()
     })
-    if vault.save():
+    if vault.upsert("twofa", eid, updated):
         ui_module.console.print("[green]2FA entry updated[/]")
@@ -7,9 +7,22 @@ from rich.align import Align
 from rich.text import Text
 from rich import box
 from rich.prompt import Prompt, Confirm
-from typing import List, Union, Optional
+from typing import Any, Callable, Iterable, List, Union, Optional
+from itertools import islice
 from .utils import ClipboardManager
+import os
+import sys
+import time
 import shutil
+import contextlib
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+    import select
+    import termios
+    import tty
 
 console = Console()
 
@@ -91,6 +104,122 @@ def show_table(title: str, columns: List[str], rows: List[List[str]]):
         table.add_row(*[str(x) for x in row])
     console.print(table)
 
+def page_size() -> int:
+    """Rows that fit on screen below the table title, header and paging prompt."""
+    try:
+        height = console.size.height
+    except Exception:
+        height = 24
+    return max(5, height - 10)
+
+def _iter_fetch(rows: Iterable[List[Any]]) -> Callable[[int, int], List[List[Any]]]:
+    """fetch(offset, limit) over an iterator, consuming it only as far as pages are viewed."""
+    it = iter(rows)
+    seen: List[List[Any]] = []
+    def fetch(offset: int, limit: int) -> List[List[Any]]:
+        missing = offset + limit - len(seen)
+        if missing > 0:
+            seen.extend(islice(it, missing))
+        return seen[offset:offset + limit]
+    return fetch
+
+def show_paged_table(title: str, columns: List[str],
+                     rows: Union[Callable[[int, int], List[List[Any]]], Iterable[List[Any]]],
+                     total: Optional[int] = None, prompt: str = "Enter number to select") -> Optional[int]:
+    """Show rows one screen at a time and return the 0-based position picked, or None.
+
+    rows is either fetch(offset, limit) returning that slice of rows, or any
+    iterable (consumed lazily). Only the visible page is ever formatted and
+    rendered. A "#" column with the absolute row number is added in front.
+    Commands: n / p next and previous page, g <page> jump, f / l first and
+    last page, a number selects that row, blank goes back.
+    """
+    fetch = rows if callable(rows) else _iter_fetch(rows)
+    size = page_size()
+    page = 0
+    while True:
+        # one extra row tells whether another page exists when the total is unknown
+        batch = fetch(page * size, size + 1)
+        if not batch and page:
+            page -= 1
+            continue
+        visible = batch[:size]
+        has_next = len(batch) > size
+        pages = f"{page + 1}/{max(1, -(-total // size))}" if total is not None else f"{page + 1}{'+' if has_next else ''}"
+        table = Table(title=title, box=box.ROUNDED, show_lines=False, caption=f"Page {pages}")
+        table.add_column("#", justify="right", style="bold green")
+        for col in columns:
+            table.add_column(col, overflow="fold")
+        for i, row in enumerate(visible, start=page * size + 1):
+            table.add_row(str(i), *[str(x) for x in row])
+        console.print(table)
+        nav = "n/p next/prev, g <page> jump, f/l first/last, " if has_next or page else ""
+        choice = Prompt.ask(f"[cyan]{prompt}[/] [dim]({nav}blank to go back)[/]", default="",
+                            show_default=False).strip().lower()
+        if not choice:
+            return None
+        if choice == "n" and has_next:
+            page += 1
+        elif choice == "p" and page:
+            page -= 1
+        elif choice == "f":
+            page = 0
+        elif choice == "l":
+            if total is not None:
+                page = max(0, (total - 1) // size)
+            else:
+                while len(fetch((page + 1) * size, 1)) == 1:
+                    page += 1
+        elif choice.startswith("g") and choice[1:].strip().isdigit():
+            target = max(0, int(choice[1:].strip()) - 1)
+            page = min(target, max(0, (total - 1) // size)) if total is not None else target
+        elif choice.isdigit():
+            pos = int(choice) - 1
+            # only rows already fetched (or within the known total) can be picked
+            if 0 <= pos and (pos < total if total is not None else len(fetch(pos, 1)) == 1):
+                return pos
+            console.print("[red]Invalid selection[/]")
+        else:
+            console.print("[red]Unknown command[/]")
+
+@contextlib.contextmanager
+def key_input():
+    """Put the terminal in cbreak mode (single keys, no echo) so read_key() sees each key press."""
+    if msvcrt is not None or not sys.stdin.isatty():
+        yield
+        return
+    fd = sys.stdin.fileno()
+    saved = termios.tcgetattr(fd)
+    try:
+        tty.setcbreak(fd)
+        yield
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+
+def read_key(timeout: Optional[float] = None) -> Optional[str]:
+    """Next key press, waiting at most timeout seconds (None waits forever); None if none came.
+
+    Use inside key_input(). Escape sequences (arrow keys etc.) come back whole,
+    so a lone "\x1b" is the Esc key.
+    """
+    if msvcrt is not None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not msvcrt.kbhit():
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(0.02)
+        key = msvcrt.getwch()
+        if key in ("\x00", "\xe0"):
+            # function/arrow key: the second code names it
+            return key + msvcrt.getwch()
+        return key
+    ready, _, _ = select.select([sys.stdin], [], [], timeout)
+    if not ready:
+        return None
+    data = os.read(sys.stdin.fileno(), 32)
+    # end of input reads as Ctrl-D so callers stop instead of spinning
+    return data.decode("utf-8", "replace") if data else "\x04"
+
 def about_panel(app_name: str, version: str, author: str = "Unknown", repo: str = None):
     lines = [
         f"[bold cyan]{app_name} v{version}[/]",
@@ -1,4 +1,5 @@
 # openvault/utils.py
+import time
 import datetime
 import hashlib
 import threading
@@ -52,6 +53,60 @@ class ClipboardManager:
         except Exception:
             pass
 
+class SaveScheduler:
+    """Debounce: run `callback` once calls to schedule() have been quiet for `delay` seconds.
+
+    A steady stream of calls cannot postpone the callback beyond `max_delay`.
+    """
+    def __init__(self, callback: Callable, delay: float, max_delay: float):
+        self._timer: Optional[threading.Timer] = None
+        self._first_request: Optional[float] = None
+        self._lock = threading.Lock()
+        self.callback = callback
+        self.delay = delay
+        self.max_delay = max_delay
+
+    def schedule(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._first_request is None:
+                self._first_request = now
+            elif self._timer and now - self._first_request >= self.max_delay:
+                return
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._timer = None
+            self._first_request = None
+
+    def _run(self):
+        with self._lock:
+            self._timer = None
+            self._first_request = None
+        self.callback()
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Replace `path` with `data` so readers see either the old or the new file, never a torn one."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
 def load_config() -> Dict[str, Any]:
     os.makedirs(config.CONFIG_DIR, exist_ok=True)
     if not os.path.exists(config.CONFIG_FILE):
@@ -1,10 +1,29 @@
 # openvault/vault.py
 import os
+import hmac
 import json
 import uuid
+import atexit
+import struct
+import hashlib
 import datetime
-from typing import Optional, Dict, Any
-from openvault import config, encryption, utils
+import threading
+from typing import Callable, Optional, Dict, Any, List, Tuple
+from cryptography.fernet import InvalidToken
+from openvault import config, encryption, sections, utils, chunkstore
+
+# Journal file: MAGIC | snapshot id (16) followed by (length (4) | Fernet token) records.
+# The snapshot id ties a journal to the exact snapshot it extends; a journal left
+# over from an older snapshot (restore, crash during compaction) is ignored. Each
+# record also carries the snapshot id and its position ("seq", 0, 1, 2, ...) inside
+# the encrypted token, so records dropped, reordered, duplicated or copied from
+# another journal stop the replay there.
+JOURNAL_MAGIC = b"OVJ1"
+SNAPSHOT_ID_SIZE = 16
+_RECORD_LEN = struct.Struct(">I")
+
+def _snapshot_id(blob: bytes) -> bytes:
+    return hashlib.sha256(blob).digest()[:SNAPSHOT_ID_SIZE]
 
 class Vault:
     """Represents a single vault file and operations on it."""
@@ -19,7 +38,101 @@ class Vault:
         self.path = config.VAULT_FILE_TEMPLATE.format(name=vault_name) if vault_name else None
         self.master_password: Optional[str] = None
         self.salt: Optional[bytes] = None
-        self.vault_data: Optional[Dict[str, Any]] = None
+        self.kdf: Dict[str, Any] = dict(encryption.DEFAULT_KDF)
+        self.session_key: Optional[encryption.SessionKey] = None
+        self.vault_data: Optional[sections.LazySections] = None
+        self._lock = threading.RLock()
+        self._journal_end = 0
+        self._journal_records = 0
+        self._journal_snapshot = b""
+        # (section, id) -> latest journal record not yet on disk
+        self._pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.save_error: Optional[str] = None
+        # name -> object derived from the unlocked data (search indexes, ...), see derived()
+        self._derived: Dict[str, Any] = {}
+        self._scheduler = utils.SaveScheduler(self.flush, config.SAVE_DEBOUNCE_SECONDS,
+                                              config.SAVE_MAX_DELAY_SECONDS)
+
+    @property
+    def journal_path(self) -> Optional[str]:
+        return f"{self.path}.journal" if self.path else None
+
+    @property
+    def is_locked(self) -> bool:
+        return self.vault_data is None
+
+    def _wipe_session_key(self):
+        if self.session_key:
+            self.session_key.wipe()
+        self.session_key = None
+
+    def _get_session_key(self) -> encryption.SessionKey:
+        """Return the cached key, deriving it only if the password or salt changed."""
+        if (self.session_key is None or self.session_key.kdf != self.kdf
+                or not self.session_key.matches(self.salt, self.master_password)):
+            session_key = encryption.VaultEncryption.derive_session_key(self.master_password, self.salt, self.kdf)
+            if self.vault_data is not None:
+                # sections sealed under the old key are opened before it is wiped
+                self.vault_data.rebind(session_key)
+            self._wipe_session_key()
+            self.session_key = session_key
+        return self.session_key
+
+    def lock(self) -> bool:
+        """Flush queued changes, then forget the password, derived key and decrypted data.
+
+        Returns False if queued changes could not be written (they are lost).
+        """
+        flushed = self.flush()
+        self._forget()
+        return flushed
+
+    def _forget(self):
+        atexit.unregister(self.flush)
+        self._drop_derived()
+        self.vault_data = None
+        self.master_password = None
+        self._wipe_session_key()
+
+    def _unlocked(self):
+        # queued changes are flushed at exit only while unlocked; lock() unregisters again
+        atexit.unregister(self.flush)
+        atexit.register(self.flush)
+
+    def derived(self, name: str, factory: Callable[["Vault"], Any]) -> Any:
+        """Object computed from the unlocked data, built by factory(vault) on first use.
+
+        It is kept until the vault is locked or reloaded; if it has an
+        update(section, entry_id, entry) method, every upsert/delete calls it
+        (entry is None for deletes) so it never has to be rebuilt. A
+        persist(vault_data) method is called before every snapshot is written,
+        a journal() method before every flush (it returns upsert/delete records
+        for state the object keeps in its own section), and a close() method
+        when the object is dropped.
+        """
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = factory(self)
+            return self._derived[name]
+
+    def _drop_derived(self):
+        with self._lock:
+            dropped = list(self._derived.values())
+            self._derived.clear()
+        for obj in dropped:
+            close = getattr(obj, "close", None)
+            if close:
+                close()
+
+    def _notify(self, section: str, entry_id: str, entry: Optional[Dict[str, Any]]):
+        for obj in self._derived.values():
+            update = getattr(obj, "update", None)
+            if update:
+                update(section, entry_id, entry)
+
+    def mark_dirty(self, section: str):
+        """Flag a section changed in place so the next save re-encrypts it."""
+        self.vault_data.mark_dirty(section)
 
     @staticmethod
     def new_structure() -> Dict[str, Any]:
@@ -31,42 +144,278 @@ class Vault:
             "categories": ["Personal", "Work", "Financial", "Social"]
         }
 
-    def create_new(self, master_password: str):
-        """Initialize a new vault file for this vault_name."""
+    def create_new(self, master_password: str, kdf: Optional[Dict[str, Any]] = None):
+        """Initialize a new vault file for this vault_name.
+
+        Without explicit KDF parameters, scrypt is calibrated for this machine.
+        """
         if not self.vault_name:
             raise ValueError("Vault name must be set to create a file.")
         self.path = config.VAULT_FILE_TEMPLATE.format(name=self.vault_name)
         self.master_password = master_password
+        self.kdf = kdf or encryption.VaultEncryption.calibrate_kdf(target_ms=config.DEFAULT_KDF_TARGET_MS)
         self.salt = os.urandom(encryption.SALT_SIZE)
-        self.vault_data = Vault.new_structure()
+        self.vault_data = sections.LazySections(None, plain=Vault.new_structure())
+        self._unlocked()
         return self.save()
 
     def save(self) -> bool:
+        """Write a full snapshot atomically and start an empty journal on top of it."""
         if not self.master_password or not self.path:
             return False
+        with self._lock:
+            try:
+                session_key = self._get_session_key()
+                for obj in list(self._derived.values()):
+                    persist = getattr(obj, "persist", None)
+                    if persist:
+                        persist(self.vault_data)
+                blob = sections.pack(session_key, self.vault_data.seal())
+                utils.atomic_write(self.path, blob)
+                # the snapshot holds every in-memory change, queued ones included
+                self._pending.clear()
+                self._reset_journal(_snapshot_id(blob))
+                return True
+            except Exception:
+                return False
+
+    def wrap_file_key(self, data_key: bytes, encrypted_name: str) -> str:
+        """Wrapped form of a locker file's data key, stored as the file entry's "key"."""
+        return encryption.VaultEncryption.wrap_key(data_key, self._get_session_key(), encrypted_name)
+
+    def file_key(self, info: Dict[str, Any]) -> bytes:
+        """Data key of a locker file; files stored before data keys existed run the KDF once."""
+        if "key" in info:
+            return encryption.VaultEncryption.unwrap_key(info["key"], self._get_session_key(), info["encrypted_name"])
+        path = os.path.join(config.LOCKER_DIR, info["encrypted_name"])
+        return encryption.VaultEncryption.password_file_key(path, self.master_password)
+
+    def _rekey(self, password: str, kdf: Dict[str, Any]) -> bool:
+        """Re-wrap the unlocked vault under a new password/KDF and a fresh salt.
+
+        Locker files are not touched: only their wrapped data keys in the files
+        section (and the chunk store key) are re-wrapped, so the cost does not
+        depend on the locker size.
+        """
+        with self._lock:
+            if not self.flush():
+                return False
+            files = self.vault_data.get("files", {})
+            originals = dict(files)
+            data_keys = {}
+            for fid, info in originals.items():
+                if "chunks" in info:
+                    # deduplicated upload: its chunks use the store key below
+                    continue
+                try:
+                    data_keys[fid] = self.file_key(info)
+                except Exception:
+                    # missing or unreadable locker file: keep the entry as it is
+                    continue
+            store = self.vault_data.get(chunkstore.STORE_SECTION)
+            if store is not None:
+                context = chunkstore.key_context(store["id"])
+                store_key = encryption.VaultEncryption.unwrap_key(store["key"], self._get_session_key(), context)
+            old = (self.master_password, self.kdf, self.salt)
+            self.master_password = password
+            self.kdf = dict(kdf)
+            self.salt = os.urandom(encryption.SALT_SIZE)
+            try:
+                for fid, data_key in data_keys.items():
+                    files[fid] = dict(originals[fid], key=self.wrap_file_key(data_key, originals[fid]["encrypted_name"]))
+                if data_keys:
+                    self.vault_data.mark_dirty("files")
+                if store is not None:
+                    self.vault_data[chunkstore.STORE_SECTION] = dict(store, key=self.wrap_file_key(store_key, context))
+                if self.save():
+                    return True
+            except Exception:
+                pass
+            self.master_password, self.kdf, self.salt = old
+            files.update(originals)
+            if store is not None:
+                self.vault_data[chunkstore.STORE_SECTION] = store
+            return False
+
+    def retune_kdf(self, kdf: Dict[str, Any]) -> bool:
+        """Re-wrap the unlocked vault under new KDF parameters and a fresh salt."""
+        return self._rekey(self.master_password, kdf)
+
+    def change_master_password(self, current_password: str, new_password: str) -> bool:
+        """Change the master password; locker files keep their data keys and are not rewritten."""
+        if not new_password or self.is_locked or not hmac.compare_digest(
+                current_password.encode(), (self.master_password or "").encode()):
+            return False
+        return self._rekey(new_password, self.kdf)
+
+    def upsert(self, section: str, entry_id: str, entry: Dict[str, Any]) -> bool:
+        """Insert or replace one entry; it is journaled by the save scheduler shortly after."""
+        with self._lock:
+            self.vault_data.setdefault(section, {})[entry_id] = entry
+            self.vault_data.mark_dirty(section)
+            self._notify(section, entry_id, entry)
+            return self._queue({"op": "upsert", "section": section, "id": entry_id, "value": entry})
+
+    def upsert_many(self, section: str, entries: Dict[str, Dict[str, Any]]) -> bool:
+        """Insert or replace many entries and write them with one snapshot instead of a journal record each."""
+        with self._lock:
+            target = self.vault_data.setdefault(section, {})
+            target.update(entries)
+            self.vault_data.mark_dirty(section)
+            for entry_id, entry in entries.items():
+                self._notify(section, entry_id, entry)
+            return self.save()
+
+    def delete(self, section: str, entry_id: str) -> bool:
+        with self._lock:
+            self.vault_data.setdefault(section, {}).pop(entry_id, None)
+            self.vault_data.mark_dirty(section)
+            self._notify(section, entry_id, None)
+            return self._queue({"op": "delete", "section": section, "id": entry_id})
+
+    def _queue(self, record: Dict[str, Any]) -> bool:
+        if not self.master_password or not self.path:
+            return False
+        # only the latest change to an entry within a burst needs to reach the journal
+        key = (record["section"], record["id"])
+        self._pending.pop(key, None)
+        self._pending[key] = record
+        self._scheduler.schedule()
+        return True
+
+    def flush(self) -> bool:
+        """Write queued changes now. Runs on the scheduler thread, and directly on lock and exit.
+
+        On failure the changes stay queued for the next attempt and save_error is set.
+        """
+        self._scheduler.cancel()
+        with self._lock:
+            for obj in list(self._derived.values()):
+                journal = getattr(obj, "journal", None)
+                if journal:
+                    for record in journal():
+                        key = (record["section"], record["id"])
+                        self._pending.pop(key, None)
+                        self._pending[key] = record
+            if not self._pending:
+                return True
+            ok = self._append_journal(list(self._pending.values()))
+            if ok:
+                self._pending.clear()
+            self.save_error = None if ok else "Failed to write vault changes"
+            return ok
+
+    def _reset_journal(self, snapshot_id: bytes):
+        utils.atomic_write(self.journal_path, JOURNAL_MAGIC + snapshot_id)
+        self._journal_end = len(JOURNAL_MAGIC) + SNAPSHOT_ID_SIZE
+        self._journal_records = 0
+        self._journal_snapshot = snapshot_id
+
+    def _append_journal(self, records: List[Dict[str, Any]]) -> bool:
+        """Append records with a single fsync; compact into a snapshot past the size limits."""
+        if not self._journal_end:
+            return self.save()
         try:
-            encrypted, salt = encryption.VaultEncryption.encrypt_data(self.vault_data, self.master_password, self.salt)
-            with open(self.path, "wb") as f:
-                f.write(salt)
-                f.write(encrypted)
-            return True
+            session_key = self._get_session_key()
+            snapshot = self._journal_snapshot.hex()
+            tokens = [encryption.VaultEncryption.encrypt_data_with_key(
+                          dict(r, seq=self._journal_records + i, snapshot=snapshot), session_key)
+                      for i, r in enumerate(records)]
+            frames = b"".join(_RECORD_LEN.pack(len(t)) + t for t in tokens)
+            with open(self.journal_path, "r+b") as f:
+                # drop any torn record left by a crash before appending after the last good one
+                f.seek(self._journal_end)
+                f.truncate()
+                f.write(frames)
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_end += len(frames)
+            self._journal_records += len(tokens)
         except Exception:
-            return False
+            return self.save()
+        if self._journal_records >= config.JOURNAL_MAX_RECORDS or self._journal_end >= config.JOURNAL_MAX_BYTES:
+            # already off the UI thread when called by the scheduler
+            self.save()
+        return True
+
+    def _replay_journal(self, data: sections.LazySections, snapshot_id: bytes, session_key: encryption.SessionKey):
+        """Apply journal records written on top of this snapshot, stopping at the first bad one."""
+        self._journal_end = 0
+        self._journal_records = 0
+        self._journal_snapshot = snapshot_id
+        path = self.journal_path
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            if f.read(len(JOURNAL_MAGIC) + SNAPSHOT_ID_SIZE) != JOURNAL_MAGIC + snapshot_id:
+                return
+            end = f.tell()
+            count = 0
+            while True:
+                raw_len = f.read(_RECORD_LEN.size)
+                if len(raw_len) != _RECORD_LEN.size:
+                    break
+                (length,) = _RECORD_LEN.unpack(raw_len)
+                token = f.read(length)
+                if len(token) != length:
+                    break
+                try:
+                    record = json.loads(session_key.fernet.decrypt(token).decode())
+                except (InvalidToken, ValueError):
+                    break
+                if record.get("seq") != count or record.get("snapshot") != snapshot_id.hex():
+                    # dropped, reordered, repeated or foreign record: nothing after it is trusted
+                    break
+                data.apply_record(record)
+                end = f.tell()
+                count += 1
+        self._journal_end = end
+        self._journal_records = count
+
+    @staticmethod
+    def _open_snapshot(blob: bytes, password: str) -> Optional[sections.LazySections]:
+        """Verify the snapshot; sections of the container format stay sealed until used."""
+        if sections.is_container(blob):
+            salt, kdf = sections.read_params(blob)
+            session_key = encryption.VaultEncryption.derive_session_key(password, salt, kdf)
+            try:
+                version, segments = sections.unpack(blob, session_key)
+                return sections.LazySections(session_key, segments, version=version)
+            except sections.ContainerError:
+                session_key.wipe()
+                return None
+        # pre-container vault: salt followed by one Fernet token; rewritten as a container on next save
+        salt = blob[:encryption.SALT_SIZE]
+        session_key = encryption.VaultEncryption.derive_session_key(password, salt)
+        data = encryption.VaultEncryption.decrypt_data_with_key(blob[encryption.SALT_SIZE:], session_key)
+        if data is None:
+            session_key.wipe()
+            return None
+        return sections.LazySections(session_key, plain=data)
 
     def load(self, password: str) -> bool:
-        """Load vault from file using password."""
+        """Load vault from file using password, replaying any journal on top of the snapshot."""
         if not self.path or not os.path.exists(self.path):
             return False
         try:
             with open(self.path, "rb") as f:
-                salt = f.read(encryption.SALT_SIZE)
-                encrypted = f.read()
-            data = encryption.VaultEncryption.decrypt_data(encrypted, password, salt)
+                blob = f.read()
+            data = self._open_snapshot(blob, password)
             if data is None:
                 return False
+            session_key = data.session_key
+            snapshot_id = _snapshot_id(blob)
+            self._replay_journal(data, snapshot_id, session_key)
+            self._wipe_session_key()
+            self._drop_derived()
             self.master_password = password
-            self.salt = salt
+            self.salt = session_key.salt
+            self.kdf = dict(session_key.kdf)
+            self.session_key = session_key
             self.vault_data = data
+            if not self._journal_end:
+                self._reset_journal(snapshot_id)
+            self._unlocked()
             return True
         except Exception:
             return False
@@ -75,6 +424,9 @@ class Vault:
         """Save a full encrypted backup file (copy of vault file + metadata)."""
         if not self.path or not os.path.exists(self.path):
             return False
+        # fold the journal into the snapshot so the single copied file is complete
+        if not self.is_locked and not self.save():
+            return False
         try:
             import shutil
             os.makedirs(os.path.dirname(dest_path), exist_ok=True)
@@ -84,15 +436,32 @@ class Vault:
             return False
 
     def restore_from(self, backup_path: str) -> bool:
-        """Replace current vault file with a backup file (user must supply password on load)."""
+        """Replace current vault file with a backup file.
+
+        An unlocked vault drops its queued changes and in-memory data and is
+        reloaded from the backup with the current password; if the backup uses
+        another password it is left locked.
+        """
         if not self.path:
             return False
-        try:
-            import shutil
-            shutil.copy2(backup_path, self.path)
+        with self._lock:
+            password = self.master_password
+            try:
+                import shutil
+                shutil.copy2(backup_path, self.path)
+                # journal records belong to the replaced snapshot
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+            except Exception:
+                return False
+            # queued changes and the loaded data belong to the replaced vault too
+            self._scheduler.cancel()
+            self._pending.clear()
+            self._journal_end = 0
+            self._forget()
+            if password:
+                self.load(password)
             return True
-        except Exception:
-            return False
 
 
     def get_password_entry(self, entry_id: str):
@@ -0,0 +1,21 @@
+# tests/conftest.py
+import os
+import pytest
+from openvault import config
+
+FAST_KDF = {"name": "pbkdf2-sha256", "iterations": 1000}
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """Point every OpenVault path at a scratch directory."""
+    root = str(tmp_path)
+    monkeypatch.setattr(config, "CONFIG_DIR", root)
+    monkeypatch.setattr(config, "VAULTS_DIR", os.path.join(root, "vaults"))
+    monkeypatch.setattr(config, "VAULT_FILE_TEMPLATE", os.path.join(root, "vaults", "{name}.enc"))
+    monkeypatch.setattr(config, "CONFIG_FILE", os.path.join(root, "config.json"))
+    monkeypatch.setattr(config, "LOCKER_DIR", os.path.join(root, "locker"))
+    monkeypatch.setattr(config, "CHUNKS_DIR", os.path.join(root, "locker", "chunks"))
+    monkeypatch.setattr(config, "TEMP_DIR", os.path.join(root, "temp"))
+    monkeypatch.setattr(config, "BACKUPS_DIR", os.path.join(root, "backups"))
+    monkeypatch.setattr(config, "QR_CACHE_DIR", os.path.join(root, "qr_cache"))
+    return root
@@ -0,0 +1,83 @@
+# tests/test_breach.py
+import os
+import pytest
+from openvault import breach
+
+PASSWORDS = ["password", "123456", "letmein", "hunter2", "correct horse"] + [f"pw{i}" for i in range(500)]
+
+def _text_corpus(path, passwords, upper=True, newline="\n"):
+    lines = sorted(f"{breach.sha1(p).hex()}:{i + 1}" for i, p in enumerate(passwords))
+    with open(path, "w", newline="") as f:
+        f.write(newline.join(line.upper() if upper else line for line in lines) + newline)
+
+def _binary_corpus(path, passwords):
+    with open(path, "wb") as f:
+        f.write(b"".join(sorted(map(breach.sha1, passwords))))
+
+@pytest.mark.parametrize("upper, newline", [(True, "\n"), (False, "\n"), (True, "\r\n")])
+def test_text_corpus_lookup(tmp_path, upper, newline):
+    path = str(tmp_path / "pwned.txt")
+    _text_corpus(path, PASSWORDS, upper, newline)
+    with breach.BreachCorpus(path) as corpus:
+        assert corpus.layout == breach.LAYOUT_TEXT
+        for i, password in enumerate(PASSWORDS):
+            assert corpus.lookup(breach.sha1(password)) == i + 1
+        assert corpus.lookup(breach.sha1("not in the corpus")) == 0
+        found = corpus.lookup_many(map(breach.sha1, ["letmein", "nope", "pw7"]))
+        assert found == {breach.sha1("letmein"): 3, breach.sha1("pw7"): 13}
+
+def test_binary_corpus_lookup(tmp_path):
+    path = str(tmp_path / "pwned.bin")
+    _binary_corpus(path, PASSWORDS)
+    with breach.BreachCorpus(path) as corpus:
+        assert corpus.layout == breach.LAYOUT_BINARY
+        assert all(corpus.lookup(breach.sha1(p)) == 1 for p in PASSWORDS)
+        assert corpus.lookup(breach.sha1("not in the corpus")) == 0
+
+def test_index_is_cached_and_rebuilt_when_stale(tmp_path, monkeypatch):
+    path = str(tmp_path / "pwned.txt")
+    _text_corpus(path, PASSWORDS[:3])
+    breach.BreachCorpus(path).close()
+    index = path + breach.INDEX_SUFFIX
+    assert os.path.exists(index)
+
+    builds = []
+    build = breach.BreachCorpus._build_index
+    monkeypatch.setattr(breach.BreachCorpus, "_build_index", lambda self: builds.append(1) or build(self))
+    with breach.BreachCorpus(path) as corpus:
+        assert corpus.lookup(breach.sha1("letmein")) == 3
+    assert builds == []
+
+    # a corpus replaced by a newer download must not be searched with the old offsets
+    _text_corpus(path, PASSWORDS)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    with breach.BreachCorpus(path) as corpus:
+        assert all(corpus.lookup(breach.sha1(p)) == i + 1 for i, p in enumerate(PASSWORDS))
+    assert builds == [1]
+
+    with open(index, "r+b") as f:
+        f.truncate(100)
+    with breach.BreachCorpus(path) as corpus:
+        assert corpus.lookup(breach.sha1("pw499")) == 505
+    assert builds == [1, 1]
+
+def test_unrecognized_corpus(tmp_path):
+    path = tmp_path / "bad.txt"
+    path.write_bytes(b"not a corpus")
+    with pytest.raises(breach.CorpusError):
+        breach.BreachCorpus(str(path))
+    path.write_bytes(b"")
+    with pytest.raises(breach.CorpusError):
+        breach.BreachCorpus(str(path))
+
+def test_status_screens_and_rechecks_edits(tmp_path):
+    path = str(tmp_path / "pwned.txt")
+    _text_corpus(path, PASSWORDS)
+    status = breach.BreachStatus()
+    status.use(path)
+    entries = {"a": {"password": "letmein"}, "b": {"password": "unique!"}, "c": {}}
+    assert status.screen(entries) == {"a": 3}
+    status.update("passwords", "b", {"password": "hunter2"})
+    assert status.check("b", {"password": "hunter2"}) == 4
+    status.close()
@@ -0,0 +1,87 @@
+# tests/test_chunkstore.py
+import os
+import pytest
+from openvault import chunkstore, config, files
+from openvault.vault import Vault
+from tests.conftest import FAST_KDF
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+def _chunk_files(root):
+    return sorted(name for _, _, names in os.walk(root) for name in names)
+
+def test_roundtrip_and_dedup(home, tmp_path):
+    store = chunkstore.ChunkStore(os.path.join(home, "store"), os.urandom(32))
+    data = os.urandom(300_000)
+    src = _write(tmp_path / "a.bin", data)
+    manifest, sizes, written = store.put_file(str(src))
+    again, again_sizes, again_written = store.put_file(str(src))
+    assert again == manifest and again_written == 0
+    # a duplicate still reports the sealed size of every chunk it uses
+    assert again_sizes == sizes
+    assert sum(chunkstore.sealed_sizes(manifest, sizes).values()) == written
+    assert store.get_file(manifest, str(tmp_path / "out.bin"))
+    assert (tmp_path / "out.bin").read_bytes() == data
+
+def test_interrupted_upload_is_swept_on_next_open(home, tmp_path):
+    v = Vault("t")
+    assert v.create_new("pw", FAST_KDF)
+    store = chunkstore.ChunkStore.for_vault(v)
+    assert store.root.startswith(os.path.join(config.CHUNKS_DIR, "t"))
+    kept, _, _ = store.put_file(str(_write(tmp_path / "kept.bin", os.urandom(100_000))))
+    v.upsert("files", "kept", {"name": "kept.bin", "chunks": kept})
+    v.flush()
+    # chunks written, but the app died before the files entry was saved
+    store.put_file(str(_write(tmp_path / "lost.bin", os.urandom(100_000))))
+    before = _chunk_files(store.root)
+    v.lock()
+
+    assert v.load("pw")
+    store = chunkstore.ChunkStore.for_vault(v)
+    after = _chunk_files(store.root)
+    assert after == sorted(cid.hex() for cid in set(chunkstore.decode_manifest(kept)))
+    assert len(after) < len(before)
+
+def test_stored_size_is_the_files_own_compressed_size(home, tmp_path):
+    store = chunkstore.ChunkStore(os.path.join(home, "store"), os.urandom(32))
+    src = _write(tmp_path / "log.txt", b"2024-01-01 INFO request served in 12 ms\n" * 20_000)
+    manifest, sizes, written = store.put_file(str(src))
+    again, again_sizes, _ = store.put_file(str(src))
+    original = {"size": os.path.getsize(src), "chunks": manifest, "chunk_sizes": sizes}
+    duplicate = {"size": os.path.getsize(src), "chunks": again, "chunk_sizes": again_sizes}
+    assert files._stored_size(duplicate) == files._stored_size(original) == written
+    assert written < original["size"] // 4
+    assert files._locker_usage({"a": original, "b": duplicate}) == (2 * original["size"], 2 * written, written)
+
+_TEXT = b"".join(b"2024-01-01 12:%02d:%02d INFO request %d served in %d ms\n" % (i // 60 % 60, i % 60, i, i % 97)
+                 for i in range(30_000))
+
+@pytest.mark.parametrize("mode, data, codecs", [
+    ("auto", _TEXT, {chunkstore.CODEC_ZLIB, chunkstore.CODEC_BZ2}),
+    ("zlib", _TEXT, {chunkstore.CODEC_ZLIB}),
+    ("bz2", _TEXT, {chunkstore.CODEC_BZ2}),
+    ("lzma", _TEXT, {chunkstore.CODEC_LZMA}),
+    ("off", _TEXT, {chunkstore.CODEC_RAW}),
+    # incompressible chunks are stored raw whatever the mode
+    ("auto", os.urandom(400_000), {chunkstore.CODEC_RAW}),
+    ("zlib", os.urandom(400_000), {chunkstore.CODEC_RAW}),
+])
+def test_each_codec_round_trips(home, tmp_path, mode, data, codecs):
+    store = chunkstore.ChunkStore(os.path.join(home, "store"), os.urandom(32))
+    manifest, sizes, written = store.put_file(str(_write(tmp_path / "in.bin", data)), compression=mode)
+    assert store.get_file(manifest, str(tmp_path / "out.bin"))
+    assert (tmp_path / "out.bin").read_bytes() == data
+
+    on_disk = {}
+    for cid in set(chunkstore.decode_manifest(manifest)):
+        with open(store._path(cid), "rb") as f:
+            header = f.read(len(chunkstore.CHUNK_MAGIC) + 1)
+        assert header[:-1] == chunkstore.CHUNK_MAGIC and header[-1] in codecs
+        on_disk[cid] = os.path.getsize(store._path(cid))
+    assert chunkstore.sealed_sizes(manifest, sizes) == on_disk
+    assert written == sum(on_disk.values())
+    if codecs != {chunkstore.CODEC_RAW}:
+        assert written < len(data) // 2
@@ -0,0 +1,51 @@
+# tests/test_codec.py
+import uuid
+import pytest
+from openvault import codec
+
+def _id():
+    return str(uuid.uuid4())
+
+def test_table_round_trip():
+    section = {
+        _id(): {"name": "Mail", "category": "Personal", "created": "2021-02-21T10:55:27.596853", "n": 3},
+        _id(): {"name": "Bank", "category": "Personal", "created": "2022-04-07T11:02:44", "extra": [1, "x"]},
+        _id(): {"name": "Ünïcode \ud83d", "category": "Work", "created": "2023-01-01T00:00:00", "n": -1},
+        _id(): {"name": "", "category": "Personal", "created": "2023-01-01T00:00:00.000001", "n": 1 << 62},
+    }
+    data = codec.encode(section)
+    assert data[0] == codec.FORMAT_TABLE
+    assert codec.decode(data) == section
+
+@pytest.mark.parametrize("column", [
+    ["2021-02-21T10:55:27.000000", "2021-02-21T10:55:27"],  # non-canonical timestamp text
+    ["a"] * 8 + ["b"],                                        # interned strings
+    [1 << 63, 1],                                             # beyond int64
+    [True, False],
+    [None, "x"],
+])
+def test_columns_round_trip(column):
+    section = {_id(): {"v": value} for value in column}
+    assert codec.decode(codec.encode(section)) == section
+
+def test_keys_joining_into_uuids_are_not_a_table():
+    u1, u2 = _id(), _id()
+    section = {u1 + u2: {"name": "a"}, "": {"name": "b"}}
+    data = codec.encode(section)
+    assert data[0] == codec.FORMAT_JSON
+    assert codec.decode(data) == section
+
+@pytest.mark.parametrize("value", [
+    {_id().upper(): {"a": 1}},      # not the canonical lowercase form
+    {_id(): {"a": 1}, _id(): 5},
+    ["Personal", "Work"],
+    {},
+])
+def test_other_values_fall_back_to_json(value):
+    data = codec.encode(value)
+    assert data[0] == codec.FORMAT_JSON
+    assert codec.decode(data) == value
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        codec.decode(b"\x07{}")
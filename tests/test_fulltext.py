@@ -0,0 +1,77 @@
+# tests/test_fulltext.py
+from openvault import fulltext
+from openvault.vault import Vault
+from tests.conftest import FAST_KDF
+
+NOTES = {
+    "recipe": {"title": "Pancake recipe", "content": "Flour, milk, eggs. Whisk the batter and rest it."},
+    "wifi": {"title": "Home wifi", "content": "Router admin password is on the sticker. Guest wifi: cafe."},
+    "travel": {"title": "Travel", "content": "Passport renewal due in March. Book the wifi router for the cabin."},
+    "keys": {"title": "Spare keys", "content": "The spare keys are with the neighbour, not the router."},
+}
+
+def _index(notes):
+    index = fulltext.NotesIndex()
+    index.sync(notes)
+    return index
+
+def test_bm25_ranks_title_and_rare_terms_first():
+    index = _index(NOTES)
+    ranked = index.search("wifi", NOTES)
+    assert [n for n, _ in ranked] == ["wifi", "travel"]
+    assert ranked[0][1] > ranked[1][1] > 0
+    # "passport" is in one note only, so it outweighs the common "router"
+    assert index.search("router passport", NOTES)[0][0] == "travel"
+    assert index.search("nothing here", NOTES) == []
+    assert index.search("", NOTES) == []
+    assert len(index.search("the", NOTES, limit=2)) == 2
+
+def test_phrases_must_occur_in_order():
+    index = _index(NOTES)
+    assert [n for n, _ in index.search('"spare keys"', NOTES)] == ["keys"]
+    assert index.search('"keys spare"', NOTES) == []
+    assert [n for n, _ in index.search('"wifi router"', NOTES)] == ["travel"]
+    assert [n for n, _ in index.search('"home wifi" sticker', NOTES)] == ["wifi"]
+    assert fulltext.parse_query('admin "guest wifi"') == (["admin"], [["guest", "wifi"]])
+
+def test_updates_and_removals():
+    notes = dict(NOTES)
+    index = _index(notes)
+    notes["wifi"] = {"title": "Office", "content": "Printer codes"}
+    index.update("notes", "wifi", notes["wifi"])
+    assert [n for n, _ in index.search("wifi", notes)] == ["travel"]
+    del notes["travel"]
+    index.update("notes", "travel", None)
+    assert index.search("wifi", notes) == []
+    assert len(index) == 3
+    index.update("passwords", "x", {"title": "wifi"})
+    assert len(index) == 3
+
+def test_dict_round_trip_keeps_scores():
+    index = _index(NOTES)
+    copy = fulltext.NotesIndex.from_dict(index.to_dict())
+    for query in ("wifi", "router keys", '"spare keys"'):
+        assert copy.search(query, NOTES) == index.search(query, NOTES)
+    assert len(fulltext.NotesIndex.from_dict({"version": 0})) == 0
+
+def test_persisted_section_survives_reload_and_resyncs(home):
+    v = Vault("t")
+    assert v.create_new("pw", FAST_KDF)
+    index = fulltext.NotesIndex.for_vault(v)
+    for note_id, note in NOTES.items():
+        v.upsert("notes", note_id, note)
+    assert v.save()
+    assert fulltext.INDEX_SECTION in v.vault_data
+    stored = v.vault_data[fulltext.INDEX_SECTION]
+    # journaled after the snapshot: the stored index is stale for this note
+    v.upsert("notes", "keys", {"title": "Spare keys", "content": "Gone to the locksmith."})
+    expected = index.search("locksmith neighbour", v.vault_data["notes"])
+    assert v.lock()
+
+    reloaded = Vault("t")
+    assert reloaded.load("pw")
+    assert reloaded.vault_data[fulltext.INDEX_SECTION] == stored
+    restored = fulltext.NotesIndex.for_vault(reloaded)
+    notes = reloaded.vault_data["notes"]
+    assert restored.search("locksmith neighbour", notes) == expected
+    assert [n for n, _ in restored.search("neighbour", notes)] == []
@@ -0,0 +1,47 @@
+# tests/test_indexes.py
+import random
+from openvault import indexes
+
+def _entry(name, category, created, size=0):
+    return {"name": name, "category": category, "created": created, "modified": created, "size": size}
+
+def _expected(entries, category, order):
+    key = indexes.SECTION_ORDERS["files"][order]
+    picked = [(key(e), eid) for eid, e in entries.items() if category is None or e.get("category") == category]
+    picked.sort(reverse=order in indexes.DESCENDING)
+    return [eid for _, eid in picked]
+
+def _check(index, entries):
+    for order in index.orders:
+        for category in (None, "Work", "Personal", "Empty"):
+            assert index.ids(category, order) == _expected(entries, category, order)
+            assert index.ids(category, order, offset=1, limit=2) == _expected(entries, category, order)[1:3]
+        assert index.count() == len(entries)
+
+def test_updates_keep_every_order_sorted():
+    rng = random.Random(7)
+    entries = {f"id{i}": _entry(f"File {rng.randint(0, 50)}", rng.choice(["Work", "Personal"]),
+                                f"2024-01-{rng.randint(10, 28)}T00:00:00", rng.randint(0, 1000))
+               for i in range(40)}
+    index = indexes.SectionIndex("files", entries)
+    _check(index, entries)
+    for step in range(200):
+        eid = f"id{rng.randint(0, 60)}"
+        if rng.random() < 0.3:
+            entries.pop(eid, None)
+            index.update("files", eid, None)
+        else:
+            entries[eid] = _entry(f"file {rng.randint(0, 50)}", rng.choice(["Work", "Personal"]),
+                                  f"2024-02-{rng.randint(10, 28)}T00:00:00", rng.randint(0, 1000))
+            index.update("files", eid, entries[eid])
+        if step % 20 == 0:
+            _check(index, entries)
+    _check(index, entries)
+
+def test_emptied_category_is_dropped():
+    index = indexes.SectionIndex("files", {"a": _entry("a", "Work", "2024-01-01T00:00:00")})
+    index.update("files", "a", dict(_entry("a", "Personal", "2024-01-01T00:00:00")))
+    assert index.ids("Work") == [] and index.count("Work") == 0
+    assert index.ids("Personal") == ["a"]
+    index.update("passwords", "a", None)
+    assert index.ids() == ["a"]
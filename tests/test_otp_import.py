@@ -0,0 +1,53 @@
+# tests/test_otp_import.py
+import base64
+import urllib.parse
+import pytest
+from openvault.otp_import import _fields, migration_uris
+
+def test_fields_reads_every_wire_type():
+    buf = bytes([0x08, 0x96, 0x01]) + bytes([0x12, 2]) + b"hi" + bytes([0x19]) + b"12345678" + bytes([0x25]) + b"abcd"
+    assert list(_fields(buf)) == [(1, 150), (2, b"hi"), (3, b"12345678"), (4, b"abcd")]
+
+@pytest.mark.parametrize("buf", [
+    bytes([0x12, 5]) + b"hi",         # length-delimited
+    bytes([0x19]) + b"1234",          # fixed64
+    bytes([0x25]) + b"ab",            # fixed32
+])
+def test_truncated_fields_raise(buf):
+    with pytest.raises(ValueError, match="Truncated"):
+        list(_fields(buf))
+
+def _migration(payload):
+    return "otpauth-migration://offline?data=" + urllib.parse.quote(base64.b64encode(payload).decode())
+
+def _params(*fields):
+    body = b"".join(bytes([tag, len(value)]) + value if isinstance(value, bytes) else bytes([tag, value])
+                    for tag, value in fields)
+    return bytes([0x0A, len(body)]) + body
+
+def test_migration_payload_to_uris():
+    payload = _params((0x0A, b"12345678901234567890"), (0x12, b"Example:alice"), (0x1A, b"Example"),
+                      (0x20, 2), (0x28, 2), (0x30, 2)) + bytes([0x10, 1])
+    uris, skipped = migration_uris(_migration(payload))
+    assert skipped == []
+    assert uris == ["otpauth://totp/Example:alice?secret=GEZDGNBVGY3TQOJQGEZDGNBVGY3TQOJQ&issuer=Example"
+                    "&algorithm=SHA256&digits=8&period=30"]
+
+@pytest.mark.parametrize("payload", [
+    bytes([0x08, 0x05]),                  # otp_parameters as a varint
+    bytes([0x0A, 0x02, 0x10, 0x05]),      # name as a varint
+    _params((0x08, 5)),                   # secret as a varint
+    _params((0x22, b"x")),                # algorithm as bytes
+    _params((0x32, b"x")),                # type as bytes
+])
+def test_wrong_wire_types_raise(payload):
+    with pytest.raises(ValueError, match="Malformed"):
+        migration_uris(_migration(payload))
+
+def test_unknown_enums_are_skipped():
+    payload = (_params((0x0A, b"k"), (0x1A, b"Digits"), (0x28, 9)) + _params((0x0A, b"k"), (0x1A, b"Algo"), (0x20, 7))
+               + _params((0x0A, b"k"), (0x1A, b"Counter"), (0x30, 1)))
+    uris, skipped = migration_uris(_migration(payload))
+    assert uris == []
+    assert skipped == ["Digits: unsupported number of digits", "Algo: unsupported algorithm",
+                       "Counter: counter-based (HOTP) codes are not supported"]
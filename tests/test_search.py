@@ -0,0 +1,41 @@
+# tests/test_search.py
+import pytest
+from openvault.search import PasswordIndex, edit_distance
+
+ENTRIES = {
+    "g": {"name": "Gmail", "username": "me@gmail.com", "url": "https://mail.google.com"},
+    "a": {"name": "Amazon", "username": "shopper", "url": "amazon.com"},
+    "b": {"name": "Bank", "username": "jdoe", "url": "https://online.bank.example", "notes": "savings account"},
+}
+
+@pytest.mark.parametrize("query, expected", [
+    ("gmial", "g"),      # adjacent swap
+    ("gmxil", "g"),      # substitution in the middle
+    ("amzaon", "a"),     # adjacent swap
+    ("amazn", "a"),      # deletion
+    ("savigns", "b"),    # swap in a notes word
+    ("acount", "b"),
+    ("accuont", "b"),
+])
+def test_one_typo_short_terms(query, expected):
+    index = PasswordIndex(ENTRIES)
+    assert [eid for eid, _ in index.search(query)] == [expected]
+
+def test_two_typos_long_terms():
+    index = PasswordIndex({"x": {"name": "Kubernetes dashboard"}})
+    assert index.search("kuberntees")
+    assert index.search("dashbaord")
+    assert not index.search("kbrnts")
+
+def test_typo_index_follows_updates():
+    index = PasswordIndex(ENTRIES)
+    assert index.search("gmial")
+    index.update("passwords", "g", None)
+    assert not index.search("gmial")
+    index.update("passwords", "n", {"name": "Netflix"})
+    assert [eid for eid, _ in index.search("netlfix")] == ["n"]
+
+def test_prefix_and_exact_beat_typos():
+    index = PasswordIndex(ENTRIES)
+    assert [eid for eid, _ in index.search("ama")] == ["a"]
+    assert edit_distance("gmial", "gmail", 1) == 1
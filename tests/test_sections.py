@@ -0,0 +1,118 @@
+# tests/test_sections.py
+import os
+import uuid
+import pytest
+from cryptography.exceptions import InvalidTag
+from openvault import config, sections
+from openvault.encryption import VaultEncryption, DEFAULT_KDF
+from openvault.vault import Vault
+from tests.conftest import FAST_KDF
+
+def _key(password="pw", salt=None, kdf=FAST_KDF):
+    return VaultEncryption.derive_session_key(password, salt or os.urandom(16), kdf)
+
+def _data():
+    return {"passwords": {str(uuid.uuid4()): {"name": "Mail", "password": "x"}},
+            "notes": {str(uuid.uuid4()): {"title": "t", "content": "c"}},
+            "categories": ["Personal", "Work"]}
+
+def _sealed(key, data):
+    return sections.pack(key, sections.LazySections(key, plain=data).seal())
+
+def test_sections_open_lazily(home):
+    key, data = _key(), _data()
+    version, segments = sections.unpack(_sealed(key, data), key)
+    lazy = sections.LazySections(key, segments, version=version)
+    assert version == sections.VERSION
+    assert not any(lazy.is_loaded(name) for name in data)
+    assert lazy["notes"] == data["notes"]
+    assert lazy.is_loaded("notes") and not lazy.is_loaded("passwords")
+    assert dict(lazy) == data
+
+def test_idle_clean_sections_are_evicted_dirty_ones_kept(home, monkeypatch):
+    key, data = _key(), _data()
+    lazy = sections.LazySections(key, sections.unpack(_sealed(key, data), key)[1])
+    lazy["notes"], lazy["passwords"]
+    lazy.mark_dirty("passwords")
+    monkeypatch.setattr(config, "SECTION_IDLE_SECONDS", -1)
+    lazy["categories"]
+    assert not lazy.is_loaded("notes")
+    assert lazy.is_loaded("passwords")
+    assert lazy["notes"] == data["notes"]
+
+def test_seal_reencrypts_only_dirty_sections(home):
+    key, data = _key(), _data()
+    _, segments = sections.unpack(_sealed(key, data), key)
+    lazy = sections.LazySections(key, segments)
+    entry_id = next(iter(lazy["notes"]))
+    lazy["notes"][entry_id]["title"] = "changed"
+    lazy.mark_dirty("notes")
+    resealed = lazy.seal()
+    assert resealed["passwords"] == segments["passwords"]
+    assert resealed["categories"] == segments["categories"]
+    assert resealed["notes"] != segments["notes"]
+    reopened = sections.LazySections(key, sections.unpack(sections.pack(key, resealed), key)[1])
+    assert reopened["notes"][entry_id]["title"] == "changed"
+
+def test_journal_records_wait_for_a_sealed_section(home):
+    key, data = _key(), _data()
+    lazy = sections.LazySections(key, sections.unpack(_sealed(key, data), key)[1])
+    lazy.apply_record({"op": "upsert", "section": "notes", "id": "n", "value": {"title": "new"}})
+    assert not lazy.is_loaded("notes")
+    assert lazy["notes"]["n"] == {"title": "new"}
+
+@pytest.mark.parametrize("offset", [6, -40, -1])
+def test_tampered_file_is_rejected(home, offset):
+    key = _key()
+    blob = bytearray(_sealed(key, _data()))
+    blob[offset] ^= 1
+    with pytest.raises(sections.ContainerError):
+        sections.unpack(bytes(blob), key)
+
+def test_wrong_password_is_rejected(home):
+    key = _key()
+    blob = _sealed(key, _data())
+    salt, kdf = sections.read_params(blob)
+    with pytest.raises(sections.ContainerError):
+        sections.unpack(blob, _key("other", salt, kdf))
+
+def test_swapped_segments_do_not_decrypt(home):
+    key = _key()
+    _, segments = sections.unpack(_sealed(key, _data()), key)
+    # a segment only opens under its own name, even inside a file with a valid MAC
+    swapped = dict(segments, notes=segments["passwords"], passwords=segments["notes"])
+    lazy = sections.LazySections(key, sections.unpack(sections.pack(key, swapped), key)[1])
+    with pytest.raises(InvalidTag):
+        lazy["notes"]
+
+def test_header_records_kdf(home):
+    blob = _sealed(_key(kdf={"name": "scrypt", "n": 1 << 10, "r": 8, "p": 1}), _data())
+    assert sections.read_params(blob)[1] == {"name": "scrypt", "n": 1 << 10, "r": 8, "p": 1}
+
+def _v1_container(password, data):
+    key = VaultEncryption.derive_session_key(password, os.urandom(16), DEFAULT_KDF)
+    tokens = {name: VaultEncryption.encrypt_data_with_key(value, key) for name, value in data.items()}
+    parts = [sections._V1_PREFIX.pack(sections.MAGIC, 1, key.salt, len(tokens))]
+    for name, token in tokens.items():
+        parts.append(bytes([len(name)]) + name.encode() + sections._SEGMENT_LEN.pack(len(token)))
+    body = b"".join(parts) + b"".join(tokens.values())
+    return body + sections._mac(key, body)
+
+def test_v1_and_pre_container_vaults_migrate_on_save(home):
+    data = _data()
+    salt = os.urandom(16)
+    legacy = salt + VaultEncryption.encrypt_data_with_key(data, VaultEncryption.derive_session_key("pw", salt))
+    for blob in (_v1_container("pw", data), legacy):
+        v = Vault("t")
+        os.makedirs(os.path.dirname(v.path), exist_ok=True)
+        with open(v.path, "wb") as f:
+            f.write(blob)
+        assert v.load("pw")
+        assert dict(v.vault_data) == data
+        assert v.save()
+        v.lock()
+        with open(v.path, "rb") as f:
+            assert f.read()[4] == sections.VERSION
+        assert v.load("pw")
+        assert dict(v.vault_data) == data
+        v.lock()
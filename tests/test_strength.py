@@ -0,0 +1,68 @@
+# tests/test_strength.py
+import pytest
+from openvault import strength
+from openvault.vault import Vault
+from tests.conftest import FAST_KDF
+
+@pytest.mark.parametrize("password, most", [("password", 0), ("qwerty123", 1), ("aaaaaaaa", 1), ("abcdef1990", 1)])
+def test_patterns_score_low(password, most):
+    score, _, feedback = strength.estimate(password)
+    assert score <= most and feedback
+
+def test_random_passwords_score_high():
+    score, bits, feedback = strength.estimate("vT7#qLp2!xZr9@Wm")
+    assert score == 4 and bits >= 80 and feedback == []
+    assert strength.estimate("") == (0, 0.0, ["Password is empty"])
+
+def _vault_with_passwords(passwords):
+    v = Vault("t")
+    assert v.create_new("pw", FAST_KDF)
+    for eid, password in passwords.items():
+        v.upsert("passwords", eid, {"name": eid, "username": "u", "password": password})
+    assert v.save()
+    return v
+
+def _audited(v):
+    audit = strength.StrengthAudit.for_vault(v)
+    audit.start()
+    audit._thread.join()
+    return audit
+
+def test_background_scores_reach_disk_on_lock(home):
+    v = _vault_with_passwords({"weak": "letmein", "strong": "vT7#qLp2!xZr9@Wm"})
+    audit = _audited(v)
+    scores = dict(audit.results)
+    assert [eid for eid, _, _ in audit.weak()] == ["weak"]
+    # no snapshot after the audit: the scores travel in the journal
+    assert v.lock()
+
+    reloaded = Vault("t")
+    assert reloaded.load("pw")
+    restored = strength.StrengthAudit.for_vault(reloaded)
+    assert restored.results == scores
+    restored.start()
+    assert restored.total == 2 and not restored.results.keys() - scores.keys()
+
+def test_edits_and_deletes_are_journaled(home):
+    v = _vault_with_passwords({"a": "letmein", "b": "hunter"})
+    audit = _audited(v)
+    v.upsert("passwords", "a", {"name": "a", "username": "u", "password": "vT7#qLp2!xZr9@Wm"})
+    v.delete("passwords", "b")
+    assert audit.weak() == []
+    assert v.flush()
+    assert v.lock()
+
+    reloaded = Vault("t")
+    assert reloaded.load("pw")
+    restored = strength.StrengthAudit.for_vault(reloaded)
+    assert set(restored.results) == {"a"} and restored.counts()[4] == 1
+    # a snapshot folds the journaled rows back into one section
+    assert reloaded.save()
+    assert set(reloaded.vault_data[strength.CACHE_SECTION]) == {"a"}
+
+def test_legacy_cache_section_is_read():
+    digest = bytes(range(strength.DIGEST_SIZE))
+    legacy = {"version": 1, "entries": {"a": [digest.hex(), 1, 30.0], "b": [digest.hex(), 4, 90.0]},
+              "b": {"digest": digest.hex(), "score": 0, "bits": 5.0}}
+    assert strength.StrengthAudit._load(legacy) == {"a": (digest, 1, 30.0), "b": (digest, 0, 5.0)}
+    assert strength.StrengthAudit._load(None) == {}
@@ -0,0 +1,49 @@
+# tests/test_totp.py
+import base64
+import pytest
+from openvault import totp
+
+# RFC 6238 appendix B: 8-digit codes, 30 s period
+SEEDS = {"SHA1": b"12345678901234567890", "SHA256": b"12345678901234567890123456789012",
+         "SHA512": b"1234567890123456789012345678901234567890123456789012345678901234"}
+VECTORS = [
+    (59, "94287082", "46119246", "90693936"),
+    (1111111109, "07081804", "68084774", "25091201"),
+    (1111111111, "14050471", "67062674", "99943326"),
+    (1234567890, "89005924", "91819424", "93441116"),
+    (2000000000, "69279037", "90698825", "38618901"),
+    (20000000000, "65353130", "77737706", "47863826"),
+]
+
+def _engine():
+    return totp.TotpEngine({algo: {"secret": base64.b32encode(seed).decode(), "algo": algo, "digits": 8}
+                            for algo, seed in SEEDS.items()})
+
+@pytest.mark.parametrize("now, sha1, sha256, sha512", VECTORS)
+def test_rfc6238_vectors(now, sha1, sha256, sha512):
+    engine = _engine()
+    assert engine.codes(now) == {"SHA1": (sha1, 30 - now % 30), "SHA256": (sha256, 30 - now % 30),
+                                 "SHA512": (sha512, 30 - now % 30)}
+    assert engine.code("SHA256", now)[0] == sha256
+
+def test_cached_codes_follow_the_time_step():
+    engine = _engine()
+    # one cached batch per group is reused within a step and recomputed after it
+    assert engine.code("SHA1", 1111111109)[0] == "07081804"
+    assert engine.code("SHA1", 1111111111)[0] == "14050471"
+    assert engine.code("SHA1", 59)[0] == "94287082"
+
+def test_updates_and_bad_secrets():
+    engine = totp.TotpEngine({"bad": {"secret": "not base32!"}})
+    assert "bad" in engine.errors and engine.code("bad", 59) is None
+    seed = base64.b32encode(SEEDS["SHA1"]).decode().lower()
+    engine.update("twofa", "bad", {"secret": " ".join([seed[:8], seed[8:]]), "digits": 8})
+    assert engine.errors == {} and engine.code("bad", 59) == ("94287082", 1)
+    engine.update("twofa", "bad", None)
+    assert engine.codes(59) == {}
+    engine.update("notes", "x", {"secret": seed})
+    assert engine.codes(59) == {}
+
+def test_six_digit_default():
+    engine = totp.TotpEngine({"a": {"secret": base64.b32encode(SEEDS["SHA1"]).decode()}})
+    assert engine.code("a", 59)[0] == "287082"
@@ -0,0 +1,186 @@
+# tests/test_vault.py
+import os
+import atexit
+import struct
+from openvault import chunkstore, config, locker
+from openvault.vault import JOURNAL_MAGIC, SNAPSHOT_ID_SIZE, Vault, _snapshot_id
+from tests.conftest import FAST_KDF
+
+def test_restore_while_unlocked_survives_flush(home):
+    v = Vault("t")
+    assert v.create_new("pw", FAST_KDF)
+    v.upsert("notes", "kept", {"title": "in backup"})
+    backup = os.path.join(home, "backups", "t.enc")
+    assert v.backup_to(backup)
+    v.upsert("notes", "later", {"title": "after backup"})
+
+    assert v.restore_from(backup)
+    assert not v.is_locked
+    assert set(v.vault_data.get("notes")) == {"kept"}
+    assert v.flush()
+
+    reloaded = Vault("t")
+    assert reloaded.load("pw")
+    assert set(reloaded.vault_data.get("notes")) == {"kept"}
+
+def test_restore_with_other_password_leaves_vault_locked(home):
+    other = Vault("other")
+    assert other.create_new("other-pw", FAST_KDF)
+    v = Vault("t")
+    assert v.create_new("pw", FAST_KDF)
+    assert v.restore_from(other.path)
+    assert v.is_locked
+    assert v.load("other-pw")
+
+def test_exit_flush_registered_only_while_unlocked(home, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    monkeypatch.setattr(atexit, "unregister", lambda fn: registered.remove(fn) if fn in registered else None)
+    v = Vault("t")
+    assert registered == []
+    assert v.create_new("pw", FAST_KDF)
+    assert registered == [v.flush]
+    v.lock()
+    assert registered == []
+    assert v.load("pw") and v.load("pw")
+    assert registered == [v.flush]
+
+def _frames(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    header, pos, frames = raw[:len(JOURNAL_MAGIC) + SNAPSHOT_ID_SIZE], len(JOURNAL_MAGIC) + SNAPSHOT_ID_SIZE, []
+    while pos < len(raw):
+        (length,) = struct.unpack(">I", raw[pos:pos + 4])
+        frames.append(raw[pos:pos + 4 + length])
+        pos += 4 + length
+    return header, frames
+
+def _write_frames(path, header, frames):
+    with open(path, "wb") as f:
+        f.write(header + b"".join(frames))
+
+def _journaled_vault(*edits):
+    v = Vault("t")
+    assert v.create_new("pw", FAST_KDF)
+    for op, entry_id in edits:
+        if op == "upsert":
+            v.upsert("notes", entry_id, {"title": entry_id})
+        else:
+            v.delete("notes", entry_id)
+        # one journal record per edit
+        assert v.flush()
+    v.lock()
+    return v
+
+def _notes_after_load():
+    v = Vault("t")
+    assert v.load("pw")
+    return set(v.vault_data.get("notes"))
+
+def test_journal_replays_every_record(home):
+    _journaled_vault(("upsert", "a"), ("upsert", "b"), ("delete", "a"))
+    assert _notes_after_load() == {"b"}
+
+def test_torn_journal_tail_is_dropped(home):
+    v = _journaled_vault(("upsert", "a"), ("upsert", "b"))
+    header, frames = _frames(v.journal_path)
+    _write_frames(v.journal_path, header, frames[:1] + [frames[1][:-5]])
+    assert _notes_after_load() == {"a"}
+    # the next edit is appended after the last good record
+    v = Vault("t")
+    assert v.load("pw")
+    v.upsert("notes", "c", {"title": "c"})
+    assert v.flush()
+    assert _notes_after_load() == {"a", "c"}
+
+def test_reordered_journal_stops_at_first_gap(home):
+    v = _journaled_vault(("upsert", "a"), ("delete", "a"), ("upsert", "b"))
+    header, frames = _frames(v.journal_path)
+    # replay the upsert after its delete to bring the entry back
+    _write_frames(v.journal_path, header, [frames[1], frames[0], frames[2]])
+    assert _notes_after_load() == set()
+
+def test_duplicated_or_dropped_records_are_rejected(home):
+    v = _journaled_vault(("upsert", "a"), ("delete", "a"), ("upsert", "b"))
+    header, frames = _frames(v.journal_path)
+    _write_frames(v.journal_path, header, frames[:2] + [frames[0]])
+    assert _notes_after_load() == set()
+    _write_frames(v.journal_path, header, [frames[0], frames[2]])
+    assert _notes_after_load() == {"a"}
+
+def test_records_from_another_snapshot_are_rejected(home):
+    v = _journaled_vault(("upsert", "a"))
+    _, old_frames = _frames(v.journal_path)
+    assert v.load("pw")
+    v.delete("notes", "a")
+    assert v.save()
+    v.lock()
+    header, _ = _frames(v.journal_path)
+    _write_frames(v.journal_path, header, old_frames)
+    assert _notes_after_load() == set()
+
+def test_journal_is_compacted_into_a_snapshot(home, monkeypatch):
+    monkeypatch.setattr(config, "JOURNAL_MAX_RECORDS", 3)
+    v = _journaled_vault(("upsert", "a"), ("upsert", "b"))
+    assert len(_frames(v.journal_path)[1]) == 2
+    assert v.load("pw")
+    v.upsert("notes", "c", {"title": "c"})
+    assert v.flush()
+    header, frames = _frames(v.journal_path)
+    assert frames == []
+    with open(v.path, "rb") as f:
+        assert header[len(JOURNAL_MAGIC):] == _snapshot_id(f.read())
+    v.lock()
+    assert _notes_after_load() == {"a", "b", "c"}
+
+def _locker_vault(tmp_path):
+    """Vault holding one envelope-encrypted locker file and one chunk-store upload."""
+    v = Vault("t")
+    assert v.create_new("pw", FAST_KDF)
+    plain = tmp_path / "plain.bin"
+    plain.write_bytes(os.urandom(200_000))
+    data_key = locker.new_data_key()
+    assert locker.encrypt_file_with_key(str(plain), os.path.join(config.LOCKER_DIR, "f.enc"), data_key)
+    v.upsert("files", "enveloped", {"name": "plain.bin", "encrypted_name": "f.enc",
+                                    "key": v.wrap_file_key(data_key, "f.enc")})
+    manifest, sizes, _ = chunkstore.ChunkStore.for_vault(v).put_file(str(plain))
+    v.upsert("files", "chunked", {"name": "plain.bin", "chunks": manifest, "chunk_sizes": sizes})
+    assert v.flush()
+    return v, plain.read_bytes()
+
+def _assert_files_open(v, expected, tmp_path):
+    files = v.vault_data["files"]
+    out = str(tmp_path / "out.bin")
+    assert locker.decrypt_file_with_key(os.path.join(config.LOCKER_DIR, "f.enc"), out,
+                                        v.file_key(files["enveloped"]))
+    with open(out, "rb") as f:
+        assert f.read() == expected
+    assert chunkstore.ChunkStore.for_vault(v).get_file(files["chunked"]["chunks"], out)
+    with open(out, "rb") as f:
+        assert f.read() == expected
+
+def test_files_open_after_password_change(home, tmp_path):
+    v, expected = _locker_vault(tmp_path)
+    assert not v.change_master_password("wrong", "new")
+    assert v.change_master_password("pw", "new")
+    v.lock()
+    assert not v.load("pw")
+    assert v.load("new")
+    _assert_files_open(v, expected, tmp_path)
+
+def test_failed_rekey_rolls_back(home, tmp_path):
+    v, expected = _locker_vault(tmp_path)
+    before = dict(v.vault_data["files"])
+    store = dict(v.vault_data[chunkstore.STORE_SECTION])
+    v.save = lambda: False
+    assert not v.change_master_password("pw", "new")
+    del v.save
+    assert v.master_password == "pw"
+    assert dict(v.vault_data["files"]) == before
+    assert v.vault_data[chunkstore.STORE_SECTION] == store
+    _assert_files_open(v, expected, tmp_path)
+    assert v.save()
+    v.lock()
+    assert not v.load("new")
+    assert v.load("pw")
+    _assert_files_open(v, expected, tmp_path)